@@ -0,0 +1,282 @@
+import csv
+import os
+import resource
+import threading
+import time
+
+import soaptestclient
+
+# Default attachment sizes, from 1 MB to 2 GB
+SIZES = [1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2, 1024 ** 3, 2 * 1024 ** 3]
+
+# Memory use of the security server proxy process (resident set size in kilobytes)
+PROXY_MEMORY_COMMAND = 'ps -o rss= -p $(pgrep -o -f ee.ria.xroad.proxy.ProxyMain)'
+
+RESULT_FIELDS = ['size', 'requests', 'successful', 'faults', 'errors', 'seconds', 'throughput_mbs', 'client_memory']
+
+
+def get_own_memory():
+    '''
+    Returns the current memory use (resident set size) of this process, or the peak if the current value is not
+    available.
+    :return: int - bytes
+    '''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_ssh_memory(ssh, command=PROXY_MEMORY_COMMAND):
+    '''
+    Returns a function that reads the memory use of a process over SSH.
+    :param ssh: ssh_client.SSHClient - connection to the server
+    :param command: str - command that prints the resident set size in kilobytes
+    :return: function returning int|None - bytes; None if the process was not found
+    '''
+
+    def get_memory():
+        output, _ = ssh.exec_command(command)
+        return int(output[0]) * 1024 if output and output[0].strip().isdigit() else None
+
+    return get_memory
+
+
+def create_file(path, size):
+    '''
+    Creates a sparse file of zeros, so that even gigabyte attachments take no disk space and are created at once.
+    :param path: str - file path
+    :param size: int - size in bytes
+    :return: None
+    '''
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+
+class MemoryMonitor:
+    '''
+    Polls memory use in a background thread and keeps the peak value.
+    '''
+    interval = 1.0  # Seconds between samples
+
+    def __init__(self, name, get_memory, interval=None):
+        '''
+        :param name: str - name in the results
+        :param get_memory: function returning int|None - memory use in bytes
+        :param interval: float|None - seconds between samples
+        '''
+        self.name = name
+        self.get_memory = get_memory
+        if interval is not None:
+            self.interval = interval
+        self.peak = None
+        self.running = False
+        self.thread = None
+
+    def sample(self):
+        '''
+        Takes a sample and updates the peak.
+        :return: None
+        '''
+        try:
+            memory = self.get_memory()
+        except Exception:
+            memory = None
+        if memory is not None and (self.peak is None or memory > self.peak):
+            self.peak = memory
+
+    def poll(self):
+        '''
+        Takes samples until stopped.
+        :return: None
+        '''
+        while self.running:
+            self.sample()
+            time.sleep(self.interval)
+
+    def start(self):
+        '''
+        Starts polling from a new peak.
+        :return: None
+        '''
+        self.peak = None
+        self.running = True
+        self.thread = threading.Thread(target=self.poll)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stops polling.
+        :return: int|None - peak memory use in bytes
+        '''
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.sample()
+        return self.peak
+
+
+class AttachmentBenchmark:
+    '''
+    Sends requests with one attachment of every size, streamed from a file (see soaptestclient.MultipartBody), and
+    measures the throughput and the peak memory use of the client and of the security servers (polled over SSH) while
+    the requests of a size are running. With the Python mock service (helpers/mock_service.py) as the service, the
+    response reports the attachment size that the service received, which is checked if check_response is True.
+    '''
+    sizes = SIZES
+    repeat = 3  # Requests per size
+    directory = 'temp'  # Directory of the attachment files
+    check_response = True
+
+    def __init__(self, client, body, params, sizes=None, repeat=None, directory=None, monitors=None,
+                 check_response=None, log=None):
+        '''
+        :param client: soaptestclient.SoapTestClient - client with the URL, certificates and timeout
+        :param body: str - request template with {attachment} for the attachment reference
+        :param params: dict - template parameters
+        :param sizes: [int]|None - attachment sizes in bytes
+        :param repeat: int|None - requests per size
+        :param directory: str|None - directory of the attachment files
+        :param monitors: [MemoryMonitor]|None - memory monitors of the servers
+        :param check_response: bool|None - check the attachment size reported by the mock service
+        :param log: logging function
+        '''
+        self.client = client
+        self.body = body
+        self.params = params
+        if sizes is not None:
+            self.sizes = sizes
+        if repeat is not None:
+            self.repeat = repeat
+        if directory is not None:
+            self.directory = directory
+        if check_response is not None:
+            self.check_response = check_response
+        if log is not None:
+            self.log = log
+        self.monitors = [MemoryMonitor('client', get_own_memory)] + (monitors or [])
+        self.results = []
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def query(self, attachment):
+        '''
+        Sends one request with the attachment.
+        :param attachment: soaptestclient.Attachment - attachment
+        :return: (str|None, str|None) - fault code and error name; both None if the request succeeded
+        '''
+        params = dict(self.params)
+        params['attachment'] = attachment.get_reference(self.client.mtom)
+        try:
+            if not self.client.query(body=self.body, params=params, attachments=[attachment]):
+                return self.client.fault_code, None
+        except Exception as e:
+            return None, e.__class__.__name__
+        if self.check_response and self.client.xml is not None and \
+                'size="{0}"'.format(attachment.size) not in self.client.xml:
+            return None, 'SizeMismatch'
+        return None, None
+
+    def run_size(self, size):
+        '''
+        Runs the requests of one attachment size.
+        :param size: int - attachment size in bytes
+        :return: dict - result
+        '''
+        path = os.path.join(self.directory, 'attachment_{0}.bin'.format(size))
+        create_file(path, size)
+        result = {'size': size, 'requests': 0, 'successful': 0, 'faults': {}, 'errors': {}, 'seconds': 0.0}
+        try:
+            attachment = soaptestclient.Attachment(path)
+            for monitor in self.monitors:
+                monitor.start()
+            try:
+                for _ in range(self.repeat):
+                    start = time.time()
+                    fault_code, error = self.query(attachment)
+                    result['requests'] += 1
+                    if fault_code is not None:
+                        result['faults'][fault_code] = result['faults'].get(fault_code, 0) + 1
+                    elif error is not None:
+                        result['errors'][error] = result['errors'].get(error, 0) + 1
+                    else:
+                        result['successful'] += 1
+                        result['seconds'] += time.time() - start
+            finally:
+                for monitor in self.monitors:
+                    result[monitor.name + '_memory'] = monitor.stop()
+        finally:
+            os.remove(path)
+        result['throughput_mbs'] = size * result['successful'] / result['seconds'] / 1024 ** 2 \
+            if result['seconds'] > 0 else 0.0
+        return result
+
+    def run(self):
+        '''
+        Runs the benchmark for all sizes.
+        :return: [dict] - results by size
+        '''
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.client.stream_response = not self.check_response
+        for size in self.sizes:
+            self.log('Sending {0} x {1} MB'.format(self.repeat, size / 1024.0 ** 2))
+            result = self.run_size(size)
+            self.results.append(result)
+            self.log(self.format_result(result))
+        return self.results
+
+    def get_fields(self):
+        '''
+        Returns the result fields, with the memory of every monitor.
+        :return: [str]
+        '''
+        return RESULT_FIELDS + [monitor.name + '_memory' for monitor in self.monitors[1:]]
+
+    def format_result(self, result):
+        '''
+        Returns a result as a line of the report.
+        :param result: dict - result
+        :return: str
+        '''
+        memory = ' '.join('{0:>14}'.format('{0:.0f}'.format(result[monitor.name + '_memory'] / 1024.0 ** 2)
+                                           if result[monitor.name + '_memory'] is not None else '-')
+                          for monitor in self.monitors)
+        return '{0:>10.1f} {1:>5}/{2:<5} {3:>10.2f} {4:>10.1f} {5}{6}{7}'.format(
+            result['size'] / 1024.0 ** 2, result['successful'], result['requests'], result['seconds'],
+            result['throughput_mbs'], memory,
+            ''.join(' {0}: {1}'.format(code, count) for code, count in sorted(result['faults'].items())),
+            ''.join(' {0}: {1}'.format(error, count) for error, count in sorted(result['errors'].items())))
+
+    def report(self):
+        '''
+        Returns the results as a table.
+        :return: [str] - report lines
+        '''
+        lines = ['{0:>10} {1:>11} {2:>10} {3:>10} {4}'.format('size MB', 'ok/sent', 'seconds', 'MB/s', ' '.join(
+            '{0:>14}'.format(monitor.name + ' MB') for monitor in self.monitors))]
+        lines.extend(self.format_result(result) for result in self.results)
+        return lines
+
+    def export_csv(self, path):
+        '''
+        Saves the results as CSV, memory in bytes.
+        :param path: str - file path
+        :return: None
+        '''
+        fields = self.get_fields()
+        with open(path, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for result in self.results:
+                writer.writerow([sum(result[field].values()) if isinstance(result[field], dict) else result[field]
+                                 for field in fields])
@@ -1,6 +1,175 @@
 import ssh_client
+import timing
 import re
 import json
+import collections
+import socket
+import time
+
+
+class AuditLogReader:
+    '''
+    Incremental logfile reader. Remembers the inode and byte offset of a logfile and, on every synchronization, fetches
+    only the bytes that have been appended since the last call. Complete lines are numbered (same numbering as
+    "wc -l" and "tail -n +N" use) and kept in a bounded ring buffer, so that repeated checks of the same log only cost
+    the transfer of new data. Log rotation (inode change or truncation) resets the reader.
+    '''
+
+    # Stat format: inode and size in bytes
+    stat_format = '%i %s'
+
+    def __init__(self, client, logfile, sudo=False, buffer_size=10000):
+        '''
+        Initializes the reader. Nothing is read from the server until the first sync() call.
+        :param client: SSHClient - connection to the server
+        :param logfile: str - logfile path in the server
+        :param sudo: bool - use sudo for reading logfile
+        :param buffer_size: int - maximum number of lines kept in memory
+        '''
+        self.client = client
+        self.logfile = logfile
+        self.sudo = sudo
+        self.error = None
+
+        # File state: inode, bytes read so far and number of complete lines before the unread part
+        self.inode = None
+        self.offset = 0
+        self.line_count = 0
+
+        # Bytes of the last line that has not been terminated with a newline yet; None if its beginning is unknown
+        self.partial = b''
+
+        # Ring buffer of (line_number, line) tuples
+        self.lines = collections.deque(maxlen=buffer_size)
+
+    def reset(self):
+        '''
+        Forgets the file state and buffered lines. Next sync() starts from the current end of the file.
+        :return: None
+        '''
+        self.inode = None
+        self.offset = 0
+        self.line_count = 0
+        self.partial = b''
+        self.lines.clear()
+
+    def run(self, command):
+        '''
+        Runs a shell command (wrapped in "sh -c" so that sudo applies to the whole pipeline) and returns raw output.
+        :param command: str - shell command; double quotes and dollar signs need to be escaped
+        :return: str|None - raw stdout; None if the command failed
+        '''
+        output, error = self.client.exec_command(command='sh -c "{0}"'.format(command), sudo=self.sudo, raw=True)
+        if self.client.exit_status() != 0:
+            self.error = error
+            return None
+        self.error = None
+        return output
+
+    def init_position(self):
+        '''
+        Reads the inode, size and line count of the logfile without downloading its contents. Line count is computed
+        from exactly the number of bytes reported by stat so that offset and line number stay consistent even if the
+        file is being written at the same time.
+        :return: bool - True on success; False otherwise
+        '''
+        # Output: inode, size, number of newlines before size and 1 if the last byte before size is a newline
+        command = ("set -- \\$(stat -c '{1}' {0}) && echo \\$1 \\$2 && head -c \\$2 {0} | wc -l && "
+                   "tail -c +\\$2 {0} | head -c 1 | wc -l").format(self.logfile, self.stat_format)
+        output = self.run(command)
+        if output is None:
+            return False
+        try:
+            inode, size, count, ends_with_newline = output.split()
+            self.inode = inode
+            self.offset = int(size)
+            self.line_count = int(count)
+        except ValueError:
+            self.reset()
+            return False
+
+        # If the file does not end with a newline, the beginning of the last line is unknown; it will be counted but
+        # not buffered when its end is read.
+        if self.offset == 0 or ends_with_newline == b'1':
+            self.partial = b''
+        else:
+            self.partial = None
+        self.lines.clear()
+        return True
+
+    def sync(self):
+        '''
+        Fetches the bytes appended to the logfile since the last call and adds new complete lines to the buffer.
+        :return: bool - True on success; False otherwise
+        '''
+        if self.inode is None:
+            return self.init_position()
+
+        command = "stat -c '{1}' {0} && tail -c +{2} {0}".format(self.logfile, self.stat_format, self.offset + 1)
+        output = self.run(command)
+        if output is None:
+            return False
+
+        # First line is the stat output, everything after it is new file data
+        stat_line, _, data = output.partition(b'\n')
+        try:
+            inode, size = stat_line.split()
+            size = int(size)
+        except ValueError:
+            return False
+
+        if inode != self.inode or size < self.offset:
+            # File was rotated or truncated, start over from the new file
+            self.reset()
+            return self.init_position()
+
+        self.offset += len(data)
+
+        if self.partial is None:
+            # Beginning of the current line is unknown, count the line but skip it
+            if b'\n' not in data:
+                return True
+            data = data.split(b'\n', 1)[1]
+            self.line_count += 1
+            self.partial = b''
+
+        # Split to lines; last element is an unterminated line (or empty string if data ended with a newline)
+        data = self.partial + data
+        new_lines = data.split(b'\n')
+        self.partial = new_lines.pop()
+        for line in new_lines:
+            self.line_count += 1
+            self.lines.append((self.line_count, line.decode('utf-8', 'replace')))
+        return True
+
+    def get_lines(self, lines=None, from_line=None):
+        '''
+        Synchronizes and returns lines from the buffer, or None if the buffer does not cover the requested lines (the
+        caller should then read them from the file). Parameters have the same meaning as in AuditChecker.get_log_lines.
+        :param lines: int | None - if set, number of lines to return
+        :param from_line: int | None - if set, return rows from this line number
+        :return: list[str] | None - lines, empty lines excluded; None if they are not available in the buffer
+        '''
+        if not self.sync():
+            return None
+
+        # Line number of the first line in the buffer; buffer is complete if it starts from the first line
+        first_line = self.lines[0][0] if self.lines else self.line_count + 1
+
+        if from_line is not None:
+            from_line = max(from_line, 1)
+            if from_line < first_line:
+                return None
+            selected = [line for number, line in self.lines if number >= from_line]
+        elif lines is not None:
+            if lines > self.line_count - first_line + 1 and first_line > 1:
+                return None
+            selected = list(self.lines)[-lines:] if lines > 0 else []
+            selected = [line for number, line in selected]
+        else:
+            return None
+
+        return [line for line in selected if line]
 
 
 class AuditChecker:
@@ -18,15 +187,27 @@ class AuditChecker:
 
     # Initialize variables
     client = None
+    host = None
+    reader = None
+    stream = None
+    stream_data = ''
     error = None
     sudo = False
 
+    # Incremental readers shared between instances, keyed by (host, logfile), and their buffer size in lines
+    readers = {}
+    reader_buffer_size = 10000
+
     # Output and checked lines that can be used by the test.
     missing_lines = []
     found_lines = []
     log_output = []
 
-    def __init__(self, host, username, password, logfile=None, sudo=False):
+    # Last entry seen by wait_for
+    last_entry = None
+
+    def __init__(self, host=None, username=None, password=None, logfile=None, sudo=False, incremental=True,
+                 client=None):
         '''
         Sets up the class instance and default parameters. Opens connection to the server.
         :param host: str - hostname of the server
@@ -34,10 +215,19 @@ class AuditChecker:
         :param password: str - SSH password
         :param logfile: str - logfile path in the server
         :param sudo: bool - use sudo for reading logfile. If set, user should be in sudoers list with NOPASSWD.
+        :param incremental: bool - True to read only new data since the last check (shared AuditLogReader); False to
+                                   always download the lines with "tail"
+        :param client: SSHClient|None - existing connection to use instead of opening a new one
         '''
 
-        # Open connection
-        self.client = ssh_client.SSHClient(host, username, password)
+        # Open connection or use the one we got
+        if client is not None:
+            self.client = client
+            if host is None:
+                host = client.host
+        else:
+            self.client = ssh_client.SSHClient(host, username, password)
+        self.host = host
 
         # If different logfile set, save it.
         if logfile is not None:
@@ -46,6 +236,24 @@ class AuditChecker:
         # Should we use sudo for tail command?
         self.sudo = sudo
 
+        if incremental:
+            self.reader = self.get_reader()
+
+    def get_reader(self):
+        '''
+        Returns the incremental reader for this host and logfile, creating it if necessary. Readers are kept between
+        AuditChecker instances so that file position is remembered; the reader always uses the latest connection.
+        :return: AuditLogReader
+        '''
+        key = (self.host, self.logfile)
+        reader = self.readers.get(key)
+        if reader is None:
+            reader = AuditLogReader(self.client, self.logfile, sudo=self.sudo, buffer_size=self.reader_buffer_size)
+            self.readers[key] = reader
+        reader.client = self.client
+        reader.sudo = self.sudo
+        return reader
+
     def get_regex(self):
         '''
         Returns the compiled regex object created from self.line_regex variable.
@@ -53,12 +261,128 @@ class AuditChecker:
         '''
         return re.compile(self.line_regex)
 
+    def parse_line(self, line, rgx=None):
+        '''
+        Parses a log line to a dictionary of regex groups (timestamp, server, type, component, date, time, json) and
+        the decoded JSON data under key "data".
+        :param line: str - log line
+        :param rgx: RegExp object|None - compiled line regex; if None, self.line_regex is used
+        :return: dict|None - parsed entry; None if the line is not a valid log entry
+        '''
+        if rgx is None:
+            rgx = self.get_regex()
+        match = rgx.match(line)
+        if match is None:
+            return None
+        entry = match.groupdict()
+        try:
+            entry['data'] = json.loads(entry['json'])
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(entry['data'], dict):
+            return None
+        return entry
+
+    @staticmethod
+    def entry_matches(check_element, data):
+        '''
+        Checks if log data matches a check element. Check element can be a string (compared to the "event" value,
+        "*" matches everything) or a dictionary that has to be a subset of the data.
+        :param check_element: str|dict - entry to check for
+        :param data: dict - log entry JSON data
+        :return: bool - True if data matches; False otherwise
+        '''
+        if isinstance(check_element, basestring):
+            if check_element == '*':
+                return True
+            check_element = {'event': check_element}
+        return check_element.viewitems() <= data.viewitems()
+
+    def open_stream(self, lines=0):
+        '''
+        Starts following the logfile ("tail -F") on a new channel of the existing connection. Entries logged after this
+        call are available to wait_for() until close_stream() is called. Open the stream before the action that is
+        expected to be logged if the entry may be written before wait_for is called.
+        :param lines: int - number of existing lines from the end of the file to include
+        :return: None
+        '''
+        self.close_stream()
+        command = 'tail -F -n {0} {1}'.format(lines, self.logfile)
+        self.stream = self.client.open_channel(command=command, sudo=self.sudo)
+        self.stream_data = ''
+
+    def close_stream(self):
+        '''
+        Stops following the logfile.
+        :return: None
+        '''
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            except:
+                pass
+            self.stream = None
+            self.stream_data = ''
+
+    def wait_for(self, entry, timeout=30, lines=0, component=None):
+        '''
+        Waits until an entry matching the specified one appears in the log and returns it as soon as it is seen. If a
+        stream has been opened with open_stream(), it is used (and left open); otherwise a stream is opened for the
+        duration of the call.
+        :param entry: str|dict - entry to wait for, same format as a check_log element
+        :param timeout: int|float - maximum time in seconds to wait
+        :param lines: int - if a new stream is opened, number of existing lines from the end of the file to include
+        :param component: str|None - if set, the entry component (for example "X-Road Center UI") must match too
+        :return: dict|None - parsed entry (see parse_line); None if no matching entry was found before timeout
+        '''
+        close_stream = self.stream is None
+        if close_stream:
+            self.open_stream(lines=lines)
+
+        rgx = self.get_regex()
+        end_time = time.time() + timeout
+        try:
+            while True:
+                # Check complete lines that have been received
+                while '\n' in self.stream_data:
+                    line, self.stream_data = self.stream_data.split('\n', 1)
+                    log_entry = self.parse_line(line.strip('\r'), rgx)
+                    if log_entry is None:
+                        continue
+                    self.last_entry = log_entry
+                    if component is not None and log_entry['component'] != component:
+                        continue
+                    if self.entry_matches(entry, log_entry['data']):
+                        return log_entry
+
+                # Wait for more data until timeout
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return None
+                self.stream.settimeout(remaining)
+                try:
+                    data = self.stream.recv(4096)
+                except socket.timeout:
+                    return None
+                if not data:
+                    # Channel closed, nothing more will come
+                    return None
+                self.stream_data += data.decode('utf-8', 'replace')
+        finally:
+            if close_stream:
+                self.close_stream()
+
     def get_line_count(self):
         '''
         Returns the current logfile line count using "wc -l" command. Can be used to limit the number of rows retrieved
         by get_log_lines.
         :return: int - number of lines in the file, or -1 if an error occurs.
         '''
+        if self.reader is not None:
+            if self.reader.sync():
+                return self.reader.line_count
+            return -1
+
         command = 'wc -l < {0}'.format(self.logfile)
         output, error = self.client.exec_command(command=command, sudo=self.sudo)
         if self.error or not output:
@@ -77,6 +401,13 @@ class AuditChecker:
         :param from_line: int | None - if set, return rows from this line number
         :return: list[str] | None - lines from the end of the logfile as a list; None if an error occurs
         '''
+        if self.reader is not None:
+            # Try to get the lines from the incremental reader first
+            output = self.reader.get_lines(lines=lines, from_line=from_line)
+            if output is not None:
+                self.error = None
+                return output
+
         if lines is not None:
             params = '-n -{0}'.format(lines)
         if from_line is not None:
@@ -108,6 +439,7 @@ class AuditChecker:
             self.missing_lines = self.missing_lines[::-1]
             self.found_lines = self.found_lines[::-1]
 
+    @timing.timed('audit')
     def check_log(self, check, lines=None, from_line=None, reverse_match=True, skip_invalid_lines=True, strict=True):
         '''
         Checks if log contains an entry or entries.
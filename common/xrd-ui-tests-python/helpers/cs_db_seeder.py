@@ -0,0 +1,288 @@
+import re
+import subprocess
+
+# Tables of the central server database (centerui_production) that a stand-in database needs. Only used when seeding
+# a local PostgreSQL database instead of a real central server (see CsDatabaseSeeder.create_schema).
+STANDIN_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS member_classes (id serial PRIMARY KEY, code varchar(255), description varchar(255),
+    created_at timestamp, updated_at timestamp);
+CREATE TABLE IF NOT EXISTS identifiers (id serial PRIMARY KEY, object_type varchar(255), xroad_instance varchar(255),
+    member_class varchar(255), member_code varchar(255), subsystem_code varchar(255), service_version varchar(255),
+    service_code varchar(255), server_code varchar(255), type varchar(255), created_at timestamp,
+    updated_at timestamp);
+CREATE TABLE IF NOT EXISTS security_server_clients (id serial PRIMARY KEY, member_code varchar(255),
+    subsystem_code varchar(255), name varchar(255), xroad_member_id integer, member_class_id integer,
+    server_client_id integer, type varchar(255), administrative_contact varchar(255), address varchar(255),
+    created_at timestamp, updated_at timestamp);
+CREATE TABLE IF NOT EXISTS security_servers (id serial PRIMARY KEY, server_code varchar(255), owner_id integer,
+    address varchar(255), created_at timestamp, updated_at timestamp);
+CREATE TABLE IF NOT EXISTS server_clients (id serial PRIMARY KEY, security_server_id integer,
+    security_server_client_id integer, created_at timestamp, updated_at timestamp);
+CREATE TABLE IF NOT EXISTS global_groups (id serial PRIMARY KEY, group_code varchar(255), description varchar(255),
+    member_count integer, created_at timestamp, updated_at timestamp);
+CREATE TABLE IF NOT EXISTS global_group_members (id serial PRIMARY KEY, group_member_id integer,
+    global_group_id integer, created_at timestamp, updated_at timestamp);
+CREATE INDEX IF NOT EXISTS ix_identifiers_member ON identifiers (object_type, member_class, member_code);
+CREATE INDEX IF NOT EXISTS ix_security_server_clients_member ON security_server_clients (type, member_code);
+INSERT INTO member_classes (code, description, created_at, updated_at)
+    SELECT {member_class}, 'Scale test member class', now(), now()
+    WHERE NOT EXISTS (SELECT 1 FROM member_classes WHERE code = {member_class});
+'''
+
+# Inserts members {first}..{last} with their subsystems, the security servers they own, the subsystem registrations
+# on these servers and the global group memberships of the subsystems. Everything is done inside the database with
+# generate_series, so inserting 100 000 members takes seconds and no data goes over the SSH connection.
+SEED_SQL = '''
+SET xroad.user_name = 'scale-seeder';
+BEGIN;
+INSERT INTO identifiers (object_type, xroad_instance, member_class, member_code, type, created_at, updated_at)
+    SELECT 'MEMBER', {instance}, {member_class}, {prefix} || lpad(n::text, 7, '0'), 'ClientId', now(), now()
+    FROM generate_series({first}, {last}) n;
+INSERT INTO security_server_clients (name, member_class_id, member_code, server_client_id, type, created_at,
+                                     updated_at)
+    SELECT 'Scale member ' || i.member_code, c.id, i.member_code, i.id, 'XRoadMember', now(), now()
+    FROM identifiers i JOIN member_classes c ON c.code = i.member_class
+    WHERE i.object_type = 'MEMBER' AND i.xroad_instance = {instance} AND i.member_class = {member_class}
+        AND i.member_code BETWEEN {first_code} AND {last_code};
+INSERT INTO identifiers (object_type, xroad_instance, member_class, member_code, subsystem_code, type, created_at,
+                         updated_at)
+    SELECT 'SUBSYSTEM', {instance}, {member_class}, {prefix} || lpad(n::text, 7, '0'), 'SUB' || s, 'ClientId', now(),
+        now()
+    FROM generate_series({first}, {last}) n, generate_series(1, {subsystems}) s;
+INSERT INTO security_server_clients (member_code, subsystem_code, xroad_member_id, server_client_id, type, created_at,
+                                     updated_at)
+    SELECT i.member_code, i.subsystem_code, m.id, i.id, 'Subsystem', now(), now()
+    FROM identifiers i JOIN security_server_clients m ON m.type = 'XRoadMember' AND m.member_code = i.member_code
+    WHERE i.object_type = 'SUBSYSTEM' AND i.xroad_instance = {instance} AND i.member_class = {member_class}
+        AND i.member_code BETWEEN {first_code} AND {last_code};
+INSERT INTO identifiers (object_type, xroad_instance, member_class, member_code, server_code, type, created_at,
+                         updated_at)
+    SELECT 'SERVER', {instance}, {member_class}, {prefix} || lpad(n::text, 7, '0'), {prefix} || 'SRV' || n,
+        'SecurityServerId', now(), now()
+    FROM generate_series({first}, {last}) n WHERE (n - 1) % {members_per_server} = 0;
+INSERT INTO security_servers (server_code, owner_id, address, created_at, updated_at)
+    SELECT i.server_code, m.id, lower(i.server_code) || '.scale.test', now(), now()
+    FROM identifiers i JOIN security_server_clients m ON m.type = 'XRoadMember' AND m.member_code = i.member_code
+    WHERE i.object_type = 'SERVER' AND i.xroad_instance = {instance} AND i.member_class = {member_class}
+        AND i.member_code BETWEEN {first_code} AND {last_code};
+INSERT INTO server_clients (security_server_id, security_server_client_id, created_at, updated_at)
+    SELECT srv.id, sub.id, now(), now()
+    FROM security_server_clients sub
+        JOIN security_servers srv ON srv.server_code = {prefix} || 'SRV' ||
+            (((substring(sub.member_code FROM {prefix_length} + 1)::integer - 1) / {members_per_server})
+             * {members_per_server} + 1)
+    WHERE sub.type = 'Subsystem' AND sub.member_code BETWEEN {first_code} AND {last_code};
+INSERT INTO global_groups (group_code, description, member_count, created_at, updated_at)
+    SELECT {group_code}, 'Scale test group', 0, now(), now()
+    WHERE NOT EXISTS (SELECT 1 FROM global_groups WHERE group_code = {group_code});
+INSERT INTO global_group_members (group_member_id, global_group_id, created_at, updated_at)
+    SELECT i.id, g.id, now(), now()
+    FROM identifiers i JOIN global_groups g ON g.group_code = {group_code}
+    WHERE i.object_type = 'SUBSYSTEM' AND i.xroad_instance = {instance} AND i.member_class = {member_class}
+        AND i.member_code BETWEEN {first_code} AND {last_code};
+UPDATE global_groups SET member_count = (SELECT count(*) FROM global_group_members
+                                         WHERE global_group_id = global_groups.id),
+    updated_at = now()
+    WHERE group_code = {group_code};
+COMMIT;
+'''
+
+# Removes everything that SEED_SQL has inserted with the prefix
+CLEANUP_SQL = '''
+SET xroad.user_name = 'scale-seeder';
+BEGIN;
+DELETE FROM global_group_members WHERE group_member_id IN
+    (SELECT id FROM identifiers WHERE member_code LIKE {pattern} AND member_class = {member_class});
+DELETE FROM global_groups WHERE group_code = {group_code};
+DELETE FROM server_clients WHERE security_server_client_id IN
+    (SELECT id FROM security_server_clients WHERE member_code LIKE {pattern} AND type = 'Subsystem');
+DELETE FROM security_servers WHERE owner_id IN
+    (SELECT id FROM security_server_clients WHERE member_code LIKE {pattern} AND type = 'XRoadMember');
+DELETE FROM security_server_clients WHERE member_code LIKE {pattern} AND type = 'Subsystem';
+DELETE FROM security_server_clients WHERE member_code LIKE {pattern} AND type = 'XRoadMember';
+DELETE FROM identifiers WHERE member_code LIKE {pattern} AND member_class = {member_class};
+COMMIT;
+'''
+
+COUNT_SQL = "SELECT count(*) FROM security_server_clients WHERE type = 'XRoadMember' AND member_code LIKE {pattern};"
+
+# Queries behind the members table and the member details view, timed on the server side by psql
+BENCHMARK_QUERIES = [
+    ('page', "SELECT id, name, member_code FROM security_server_clients WHERE type = 'XRoadMember' "
+             "ORDER BY name LIMIT 25 OFFSET {offset};"),
+    ('search', "SELECT id, name, member_code FROM security_server_clients WHERE type = 'XRoadMember' "
+               "AND (name ILIKE {search} OR member_code ILIKE {search}) ORDER BY name LIMIT 25;"),
+    ('count', "SELECT count(*) FROM security_server_clients WHERE type = 'XRoadMember';"),
+    ('details', "SELECT m.name, s.subsystem_code, srv.server_code FROM security_server_clients m "
+                "LEFT JOIN security_server_clients s ON s.xroad_member_id = m.id "
+                "LEFT JOIN security_servers srv ON srv.owner_id = m.id "
+                "WHERE m.type = 'XRoadMember' AND m.member_code = {member_code};"),
+    ('global_group', "SELECT count(*) FROM global_group_members gm JOIN global_groups g ON g.id = gm.global_group_id "
+                     "WHERE g.group_code = {group_code};"),
+]
+
+
+def quote(value):
+    '''
+    Quotes a value as an SQL string literal.
+    :param value: str - value
+    :return: str - quoted value
+    '''
+    return "'{0}'".format(str(value).replace("'", "''"))
+
+
+class CsDatabaseSeeder:
+    '''
+    Bulk loads members, subsystems, security servers and global group memberships directly into the central server
+    database for scale testing. SQL is run with psql over SSH on the central server (logged in as the database user, the
+    same way as in the database row tests), or with a local psql when no SSH client is given, for example against a
+    local PostgreSQL stand-in. All seeded rows have member codes starting with the prefix and can be removed with
+    cleanup().
+    '''
+    prefix = 'SCALE'  # Member code prefix of the seeded members
+    subsystems = 1  # Subsystems per member
+    members_per_server = 10  # Every n-th member owns a security server where the subsystems of n members are registered
+    group_code = 'SCALEGROUP'  # Global group the seeded subsystems are added to
+
+    def __init__(self, sshclient, db_user, db_name, instance, member_class, prefix=None, subsystems=None,
+                 members_per_server=None, group_code=None, db_host=None, log=None):
+        '''
+        :param sshclient: SSHClient|None - connection to the central server; None to run psql locally
+        :param db_user: str - database user
+        :param db_name: str - database name
+        :param instance: str - X-Road instance of the seeded members
+        :param member_class: str - member class of the seeded members, must exist in the database
+        :param prefix: str|None - member code prefix
+        :param subsystems: int|None - subsystems per member
+        :param members_per_server: int|None - members per security server
+        :param group_code: str|None - global group code
+        :param db_host: str|None - database host for local psql; local socket if None
+        :param log: logging function
+        '''
+        self.sshclient = sshclient
+        self.db_user = db_user
+        self.db_name = db_name
+        self.db_host = db_host
+        self.instance = instance
+        self.member_class = member_class
+        if prefix is not None:
+            self.prefix = prefix
+        if subsystems is not None:
+            self.subsystems = subsystems
+        if members_per_server is not None:
+            self.members_per_server = members_per_server
+        if group_code is not None:
+            self.group_code = group_code
+        if log is not None:
+            self.log = log
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def get_member_code(self, number):
+        '''
+        Returns the member code of the n-th seeded member.
+        :param number: int - 1-based member number
+        :return: str - member code
+        '''
+        return '{0}{1:07d}'.format(self.prefix, number)
+
+    def psql(self, sql):
+        '''
+        Runs SQL with psql and returns the output lines. Stops at the first error.
+        :param sql: str - SQL statements
+        :return: [str] - output lines (unaligned, tuples only)
+        '''
+        command = 'psql -v ON_ERROR_STOP=1 -q -A -t -U {0} -d {1}'.format(self.db_user, self.db_name)
+        if self.sshclient is None:
+            if self.db_host is not None:
+                command += ' -h {0}'.format(self.db_host)
+            process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            output, error = process.communicate(sql)
+            status = process.returncode
+            output = [line for line in output.splitlines() if line]
+        else:
+            # Pass the SQL as a here-document so that it does not need shell quoting
+            output, error = self.sshclient.exec_command("{0} <<'__SQL__'\n{1}\n__SQL__".format(command, sql))
+            error = ''.join(error)
+            status = self.sshclient.exit_status()
+        if status != 0:
+            raise RuntimeError('psql failed with status {0}: {1}'.format(status, error))
+        return output
+
+    def get_params(self, first=1, last=0):
+        '''
+        Returns the values for the SQL templates, quoted.
+        :param first: int - first member number
+        :param last: int - last member number
+        :return: dict
+        '''
+        return {'instance': quote(self.instance), 'member_class': quote(self.member_class),
+                'prefix': quote(self.prefix), 'prefix_length': len(self.prefix), 'pattern': quote(self.prefix + '%'),
+                'group_code': quote(self.group_code), 'subsystems': int(self.subsystems),
+                'members_per_server': int(self.members_per_server), 'first': int(first), 'last': int(last),
+                'first_code': quote(self.get_member_code(first)), 'last_code': quote(self.get_member_code(last))}
+
+    def create_schema(self):
+        '''
+        Creates the tables used by the seeder if they do not exist. Only for a stand-in database; a central server
+        already has them.
+        :return: None
+        '''
+        self.psql(STANDIN_SCHEMA.format(**self.get_params()))
+
+    def count(self):
+        '''
+        Returns the number of seeded members in the database.
+        :return: int
+        '''
+        return int(self.psql(COUNT_SQL.format(**self.get_params()))[0])
+
+    def seed(self, total):
+        '''
+        Adds members (with their subsystems, servers and group memberships) until there are the given number of seeded
+        members. Levels can be grown step by step: seed(1000), seed(10000), seed(100000).
+        :param total: int - number of seeded members wanted
+        :return: int - number of members added
+        '''
+        existing = self.count()
+        if existing >= total:
+            return 0
+        self.log('Seeding members {0}-{1}'.format(existing + 1, total))
+        self.psql(SEED_SQL.format(**self.get_params(existing + 1, total)))
+        return total - existing
+
+    def cleanup(self):
+        '''
+        Removes all seeded rows.
+        :return: None
+        '''
+        self.log('Removing seeded members with prefix {0}'.format(self.prefix))
+        self.psql(CLEANUP_SQL.format(**self.get_params()))
+
+    def benchmark_queries(self, total, repeat=5):
+        '''
+        Runs the members table and member details queries and returns their server-side run times.
+        :param total: int - number of seeded members, used to pick a page and a member in the middle
+        :param repeat: int - number of times each query is run
+        :return: dict - {query name: [milliseconds]}
+        '''
+        middle = max(1, total // 2)
+        params = self.get_params()
+        params.update({'offset': middle, 'member_code': quote(self.get_member_code(middle)),
+                       'search': quote('%{0}%'.format(self.get_member_code(middle)))})
+        statements = ['\\timing on']
+        for name, query in BENCHMARK_QUERIES:
+            statements.extend([query.format(**params)] * repeat)
+        times = [float(match.group(1)) for match in
+                 (re.match(r'^Time: ([0-9.]+) ms', line) for line in self.psql('\n'.join(statements))) if match]
+        results = {}
+        for i, (name, query) in enumerate(BENCHMARK_QUERIES):
+            results[name] = times[i * repeat:(i + 1) * repeat]
+        return results
@@ -0,0 +1,251 @@
+import csv
+import threading
+
+import load_statistics
+import soap_load_runner
+
+# Columns of the server comparison CSV export
+COMPARISON_FIELDS = ['server', 'url', 'count', 'successful', 'faults', 'errors', 'error_rate', 'throughput',
+                     'p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms', 'max_ms', 'slowdown', 'slow']
+
+
+class Server:
+    '''
+    Security server in a fan-out test: consumer_proxy URL, the client and service of the requests and the TLS
+    certificates.
+    '''
+    client_certificate = None  # Client certificate and key files, or one PEM file with both
+    server_certificate = None  # Server certificate for verification; False to skip verification
+
+    def __init__(self, name, url, client_id, service_id, client_certificate=None, server_certificate=None):
+        '''
+        :param name: str - server name in the results
+        :param url: str - consumer_proxy URL
+        :param client_id: str - client XRoad ID
+        :param service_id: str - service XRoad ID
+        :param client_certificate: (str, str)|str|None - client certificate and key files
+        :param server_certificate: str|bool|None - server certificate for verification
+        '''
+        self.name = name
+        self.url = url
+        self.client_id = client_id
+        self.service_id = service_id
+        if client_certificate is not None:
+            self.client_certificate = client_certificate
+        if server_certificate is not None:
+            self.server_certificate = server_certificate
+
+
+def get_servers(config, get_path=None):
+    '''
+    Returns the security servers from the fanout section of the configuration. fanout.servers lists the server names;
+    the options of a server are NAME.url, NAME.client_id, NAME.service_id, NAME.client_certificate and
+    NAME.server_certificate under fanout section. If a server has no URL or client ID there, service_path and
+    client_id of the configuration section with the same name (eg ss1) are used; the default service is
+    fanout.service_id or the test service of ss2.
+    :param config: ConfReader - configuration
+    :param get_path: function|None - function returning the absolute path of a certificate file
+    :return: [Server]
+    '''
+    default_service = config.get_string('fanout.service_id', '') or '{0} : {1}'.format(
+        config.get('ss2.client_id'), config.get('services.test_service'))
+    servers = []
+    for name in config.get_string('fanout.servers', 'ss1').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        key = name.lower()
+        url = config.get_string('fanout.{0}.url'.format(key), '') or config.get_string(key + '.service_path', '')
+        if not url:
+            raise ValueError('No consumer_proxy URL for security server {0}'.format(name))
+        client_id = config.get_string('fanout.{0}.client_id'.format(key), '') or \
+            config.get_string(key + '.client_id', '') or config.get_string('fanout.client_id', '')
+        service_id = config.get_string('fanout.{0}.service_id'.format(key), '') or default_service
+        client_certificate = config.get_string('fanout.{0}.client_certificate'.format(key), '') or None
+        # Certificate file, or False (or True) read as bool
+        server_certificate = config.get('fanout.{0}.server_certificate'.format(key))
+        if get_path is not None and client_certificate is not None:
+            client_certificate = get_path(client_certificate)
+        if get_path is not None and isinstance(server_certificate, str):
+            server_certificate = get_path(server_certificate)
+        servers.append(Server(name, url, client_id, service_id, client_certificate=client_certificate,
+                              server_certificate=server_certificate))
+    return servers
+
+
+class FanOutRunner:
+    '''
+    Runs the same SOAP workload against several security servers at the same time, each with its own
+    soap_load_runner.LoadRunner and threads, and compares the latency and errors of the servers to find a slow node
+    in one pass. The results are recorded in one load_statistics.LoadStatistics with the server name as the phase.
+    '''
+    threads = 5  # Threads per server
+    duration = 30  # Seconds, including ramp-up
+    rampup = 5  # Seconds to start the threads of a server
+    timeout = 90.0  # Request timeout in seconds
+    slow_factor = 1.5  # A server is slow if its median latency is this many times the median of all servers
+    protocol_version = '4.0'
+    issue = '12345'
+    user_id = 'EE12345678901'
+
+    def __init__(self, servers, template, request_body, response_contains=None, threads=None, duration=None,
+                 rampup=None, timeout=None, slow_factor=None, protocol_version=None, issue=None, user_id=None,
+                 jtl_file=None, log=None):
+        '''
+        :param servers: [Server] - security servers
+        :param template: str - request body template, eg mock/queries/service.xml
+        :param request_body: str - requestBody parameter of the template
+        :param response_contains: str|None - text that a successful response must contain
+        :param threads: int|None - threads per server
+        :param duration: float|None - duration in seconds
+        :param rampup: float|None - ramp-up time in seconds
+        :param timeout: float|None - request timeout in seconds
+        :param slow_factor: float|None - median latency relative to all servers for a slow server
+        :param protocol_version: str|None - X-Road protocol version
+        :param issue: str|None - X-Road issue
+        :param user_id: str|None - X-Road user ID
+        :param jtl_file: str|None - JTL file of every server, with {server} for the server name; None for no files
+        :param log: logging function
+        '''
+        self.servers = servers
+        self.template = template
+        self.request_body = request_body
+        self.response_contains = response_contains
+        if threads is not None:
+            self.threads = threads
+        if duration is not None:
+            self.duration = duration
+        if rampup is not None:
+            self.rampup = rampup
+        if timeout is not None:
+            self.timeout = timeout
+        if slow_factor is not None:
+            self.slow_factor = slow_factor
+        if protocol_version is not None:
+            self.protocol_version = protocol_version
+        if issue is not None:
+            self.issue = issue
+        if user_id is not None:
+            self.user_id = user_id
+        if log is not None:
+            self.log = log
+        self.jtl_file = jtl_file
+        self.statistics = load_statistics.LoadStatistics()
+        self.errors = {}  # Server name: exception that stopped its runner
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def get_runner(self, server):
+        '''
+        Returns the load runner of a server.
+        :param server: Server
+        :return: soap_load_runner.LoadRunner
+        '''
+        params = soap_load_runner.get_params(server.client_id, server.service_id,
+                                             protocol_version=self.protocol_version, issue=self.issue,
+                                             user_id=self.user_id)
+        phase = soap_load_runner.Phase(server.name, server.name, self.threads, self.duration, self.rampup,
+                                       self.request_body, self.response_contains)
+        return soap_load_runner.LoadRunner(
+            server.url, self.template, params, [phase],
+            jtl_file=self.jtl_file.format(server=server.name) if self.jtl_file else None, timeout=self.timeout,
+            client_certificate=server.client_certificate, server_certificate=server.server_certificate,
+            log=lambda text: self.log('{0}: {1}'.format(server.name, text)), statistics=self.statistics)
+
+    def run(self):
+        '''
+        Runs the workload against all servers at the same time.
+        :return: [dict] - comparison of the servers, see compare
+        '''
+
+        def run_server(server, runner):
+            try:
+                runner.run()
+            except Exception as e:
+                self.errors[server.name] = e
+                self.log('{0}: {1}: {2}'.format(server.name, e.__class__.__name__, e))
+
+        threads = [threading.Thread(target=run_server, args=(server, self.get_runner(server)))
+                   for server in self.servers]
+        self.log('Running {0} threads for {1} s against {2} servers'.format(self.threads, self.duration,
+                                                                          len(self.servers)))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.compare()
+
+    def compare(self):
+        '''
+        Returns the results of every server with its median latency relative to the median of all servers
+        (slowdown). A server is slow if the slowdown is at least slow_factor or no requests to it succeeded.
+        :return: [dict] - server, url, slowdown, slow and the summary of load_statistics.PhaseStatistics
+        '''
+        rows = []
+        for server in self.servers:
+            row = self.statistics.get_phase(server.name).summary()
+            row.update({'server': server.name, 'url': server.url})
+            rows.append(row)
+        medians = sorted(row['p50_ms'] for row in rows if row['p50_ms'] is not None)
+        middle = len(medians) // 2
+        if not medians:
+            overall = None
+        else:
+            overall = medians[middle] if len(medians) % 2 else (medians[middle - 1] + medians[middle]) / 2.0
+        for row in rows:
+            row['slowdown'] = row['p50_ms'] / overall if row['p50_ms'] is not None and overall else None
+            row['slow'] = not row['successful'] or (row['slowdown'] is not None and
+                                                    row['slowdown'] >= self.slow_factor)
+        return rows
+
+    def report(self):
+        '''
+        Returns the comparison of the servers as a table, with the faults and errors of every server.
+        :return: [str] - report lines
+        '''
+        names = [load_statistics.get_percentile_name(percent) for percent in load_statistics.PERCENTILES]
+        lines = ['{0:<20} {1:>8} {2:>9} {3:>8} '.format('server', 'count', 'req/s', 'errors') +
+                 ' '.join('{0:>9}'.format(name + ' ms') for name in names) + ' {0:>8}'.format('slowdown')]
+        for row in self.compare():
+            lines.append('{0:<20} {1:>8} {2:>9.1f} {3:>7.2f}% '.format(
+                row['server'][:20], row['count'], row['throughput'], row['error_rate'] * 100) + ' '.join(
+                '{0:>9.1f}'.format(row[name + '_ms']) if row[name + '_ms'] is not None else '{0:>9}'.format('-')
+                for name in names) +
+                (' {0:>7.2f}x'.format(row['slowdown']) if row['slowdown'] is not None else ' {0:>8}'.format('-')) +
+                (' SLOW' if row['slow'] else ''))
+            for code, count in sorted(row['faults'].items()):
+                lines.append('    fault {0}: {1} ({2:.2f}%)'.format(code, count, row['fault_rates'][code] * 100))
+            for error, count in sorted(row['errors'].items()):
+                lines.append('    error {0}: {1}'.format(error, count))
+            if row['server'] in self.errors:
+                lines.append('    stopped: {0}'.format(self.errors[row['server']]))
+        return lines
+
+    def slow_servers(self):
+        '''
+        Returns the names of the slow servers.
+        :return: [str]
+        '''
+        return [row['server'] for row in self.compare() if row['slow']]
+
+    def export_csv(self, path):
+        '''
+        Saves the comparison of the servers as CSV, one row per server.
+        :param path: str - file path
+        :return: None
+        '''
+        with open(path, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(COMPARISON_FIELDS)
+            for row in self.compare():
+                row['faults'] = ';'.join('{0}={1}'.format(code, count) for code, count in sorted(row['faults'].items()))
+                row['errors'] = ';'.join('{0}={1}'.format(error, count)
+                                         for error, count in sorted(row['errors'].items()))
+                writer.writerow([row[field] if row[field] is not None else '' for field in COMPARISON_FIELDS])
@@ -0,0 +1,462 @@
+import csv
+import json
+import threading
+
+import soaptestclient
+
+# Percentiles shown in the reports and exports
+PERCENTILES = [50, 90, 99, 99.9, 100]
+
+# Columns of the summary CSV export
+SUMMARY_FIELDS = ['phase', 'service', 'count', 'successful', 'faults', 'errors', 'error_rate', 'elapsed',
+                  'throughput', 'p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms', 'max_ms']
+
+
+def get_percentile_name(percent):
+    '''
+    Returns the name of a percentile in reports: p50, p99.9; max for 100.
+    :param percent: float - percentile
+    :return: str - name
+    '''
+    if percent == 100:
+        return 'max'
+    return 'p{0:g}'.format(percent)
+
+
+class LatencyHistogram:
+    '''
+    Compact latency histogram in the style of HdrHistogram: values (microseconds) below sub_bucket_count are counted
+    exactly, larger values in buckets whose width doubles with every power of two, so that every value is kept with a
+    relative error below 1 / 10 ** significant_digits. Only non-empty buckets are stored. Histograms with the same
+    precision can be merged, for example the results of several worker processes.
+    '''
+    significant_digits = 2  # Precision of recorded values in decimal digits
+
+    def __init__(self, significant_digits=None):
+        '''
+        :param significant_digits: int|None - precision in decimal digits, 1-5
+        '''
+        if significant_digits is not None:
+            self.significant_digits = significant_digits
+        # Number of exact values in the first bucket; the smallest power of two for the precision
+        self.sub_bucket_bits = (2 * 10 ** self.significant_digits - 1).bit_length()
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.counts = {}  # Bucket index: count
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def get_index(self, value):
+        '''
+        Returns the bucket index of a value.
+        :param value: int - value
+        :return: int - bucket index
+        '''
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        if shift == 0:
+            return value
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (value >> shift) - self.sub_bucket_half
+
+    def get_value_range(self, index):
+        '''
+        Returns the smallest and largest value counted in a bucket.
+        :param index: int - bucket index
+        :return: (int, int) - lowest and highest value
+        '''
+        if index < self.sub_bucket_count:
+            return index, index
+        shift = (index - self.sub_bucket_count) // self.sub_bucket_half + 1
+        sub_bucket = (index - self.sub_bucket_count) % self.sub_bucket_half + self.sub_bucket_half
+        return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        '''
+        Records a value.
+        :param value: int - value, eg latency in microseconds; negative values are recorded as 0
+        :param count: int - number of times the value is recorded
+        :return: None
+        '''
+        value = max(0, int(value))
+        index = self.get_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        '''
+        Adds the values of another histogram with the same precision.
+        :param other: LatencyHistogram
+        :return: None
+        '''
+        if other.significant_digits != self.significant_digits:
+            raise ValueError('Cannot merge histograms with different precision: {0} and {1}'.format(
+                self.significant_digits, other.significant_digits))
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percent):
+        '''
+        Returns the value at a percentile: the highest value of the bucket that contains the value at that rank, never
+        above the largest recorded value.
+        :param percent: float - percentile, 0-100
+        :return: int|None - value; None if the histogram is empty
+        '''
+        if not self.total:
+            return None
+        if percent >= 100:
+            return self.max
+        rank = max(1, int(percent / 100.0 * self.total + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.get_value_range(index)[1], self.max)
+        return self.max
+
+    def to_dict(self):
+        '''
+        Returns the histogram as a dictionary that can be saved as JSON.
+        :return: dict
+        '''
+        return {'significant_digits': self.significant_digits, 'total': self.total, 'min': self.min,
+                'max': self.max, 'counts': dict((str(index), count) for index, count in self.counts.items())}
+
+    @staticmethod
+    def from_dict(data):
+        '''
+        Creates a histogram from a dictionary made by to_dict.
+        :param data: dict
+        :return: LatencyHistogram
+        '''
+        histogram = LatencyHistogram(data['significant_digits'])
+        histogram.counts = dict((int(index), count) for index, count in data['counts'].items())
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+
+class PhaseStatistics:
+    '''
+    Results of one service in one load test phase: latency histogram, successful requests, faults by known fault code
+    (see soaptestclient.get_fault_group), transport errors, and requests and failures per interval for throughput over
+    time.
+    '''
+
+    def __init__(self, significant_digits=None):
+        self.histogram = LatencyHistogram(significant_digits)
+        self.successful = 0
+        self.faults = {}  # Fault code group: count
+        self.errors = {}  # Error name: count
+        self.timeline = {}  # Interval start (seconds since epoch): [requests, failures]
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def count(self):
+        '''
+        Number of requests, including the ones that failed.
+        '''
+        return self.histogram.total
+
+    @property
+    def elapsed(self):
+        '''
+        Time from the start of the first request to the end of the last one, in seconds.
+        '''
+        if self.start_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    def add(self, start_time, latency, fault_code=None, error=None, interval=1):
+        '''
+        Adds the result of a request.
+        :param start_time: float - request start time (seconds since epoch)
+        :param latency: float - request latency in seconds
+        :param fault_code: str|None - fault code if the response was a SOAP fault
+        :param error: str|None - error name if no valid response was received
+        :param interval: int - length of the throughput intervals in seconds
+        :return: None
+        '''
+        self.histogram.record(latency * 1000000)
+        failed = fault_code is not None or error is not None
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        elif fault_code is not None:
+            group = soaptestclient.get_fault_group(fault_code)
+            self.faults[group] = self.faults.get(group, 0) + 1
+        else:
+            self.successful += 1
+        end_time = start_time + latency
+        slot = self.timeline.setdefault(int(end_time // interval * interval), [0, 0])
+        slot[0] += 1
+        slot[1] += int(failed)
+        if self.start_time is None or start_time < self.start_time:
+            self.start_time = start_time
+        if self.end_time is None or end_time > self.end_time:
+            self.end_time = end_time
+
+    def merge(self, other):
+        '''
+        Adds the results of another PhaseStatistics.
+        :param other: PhaseStatistics
+        :return: None
+        '''
+        self.histogram.merge(other.histogram)
+        self.successful += other.successful
+        for code, count in other.faults.items():
+            self.faults[code] = self.faults.get(code, 0) + count
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        for second, (requests, failures) in other.timeline.items():
+            slot = self.timeline.setdefault(second, [0, 0])
+            slot[0] += requests
+            slot[1] += failures
+        if other.start_time is not None and (self.start_time is None or other.start_time < self.start_time):
+            self.start_time = other.start_time
+        if other.end_time is not None and (self.end_time is None or other.end_time > self.end_time):
+            self.end_time = other.end_time
+
+    def summary(self):
+        '''
+        Returns the results as a dictionary.
+        :return: dict - count, successful, faults, errors, error rates, elapsed time, throughput and percentiles (ms)
+        '''
+        count = self.count
+        failures = count - self.successful
+        summary = {'count': count, 'successful': self.successful, 'faults': dict(self.faults),
+                   'errors': dict(self.errors), 'error_rate': float(failures) / count if count else 0.0,
+                   'fault_rates': dict((code, float(n) / count) for code, n in self.faults.items()),
+                   'elapsed': self.elapsed, 'throughput': count / self.elapsed if self.elapsed > 0 else 0.0}
+        for percent in PERCENTILES:
+            value = self.histogram.percentile(percent)
+            summary[get_percentile_name(percent) + '_ms'] = value / 1000.0 if value is not None else None
+        return summary
+
+    def to_dict(self):
+        '''
+        Returns the results as a dictionary that can be saved as JSON.
+        :return: dict
+        '''
+        return {'histogram': self.histogram.to_dict(), 'successful': self.successful, 'faults': self.faults,
+                'errors': self.errors, 'timeline': dict((str(second), slot) for second, slot in self.timeline.items()),
+                'start_time': self.start_time, 'end_time': self.end_time}
+
+    @staticmethod
+    def from_dict(data):
+        '''
+        Creates the results from a dictionary made by to_dict.
+        :param data: dict
+        :return: PhaseStatistics
+        '''
+        statistics = PhaseStatistics()
+        statistics.histogram = LatencyHistogram.from_dict(data['histogram'])
+        statistics.successful = data['successful']
+        statistics.faults = dict(data['faults'])
+        statistics.errors = dict(data['errors'])
+        statistics.timeline = dict((int(second), list(slot)) for second, slot in data['timeline'].items())
+        statistics.start_time = data['start_time']
+        statistics.end_time = data['end_time']
+        return statistics
+
+
+class LoadStatistics:
+    '''
+    Load test results by phase and service code, kept in latency histograms so that the results of several runs or
+    worker processes can be merged (merge, load) and the percentiles compared between security server versions.
+    Results are exported as JSON (with the histograms, see load) and as CSV. Results can be added from multiple
+    threads.
+    '''
+    significant_digits = LatencyHistogram.significant_digits
+    interval = 1  # Length of the throughput intervals in seconds
+
+    def __init__(self, significant_digits=None, interval=None):
+        '''
+        :param significant_digits: int|None - precision of the latency histograms in decimal digits
+        :param interval: int|None - length of the throughput intervals in seconds
+        '''
+        if significant_digits is not None:
+            self.significant_digits = significant_digits
+        if interval is not None:
+            self.interval = interval
+        self.lock = threading.Lock()
+        self.phases = {}  # (phase, service code): PhaseStatistics
+        self.order = []  # Keys in the order they were added
+
+    def get(self, phase, service):
+        '''
+        Returns the results of a phase and service, creating them if needed.
+        :param phase: str - phase name
+        :param service: str - service code
+        :return: PhaseStatistics
+        '''
+        key = (phase, service)
+        statistics = self.phases.get(key)
+        if statistics is None:
+            statistics = self.phases[key] = PhaseStatistics(self.significant_digits)
+            self.order.append(key)
+        return statistics
+
+    def get_phase(self, phase):
+        '''
+        Returns the results of all services of a phase merged together.
+        :param phase: str - phase name
+        :return: PhaseStatistics
+        '''
+        statistics = PhaseStatistics(self.significant_digits)
+        with self.lock:
+            for key in self.order:
+                if key[0] == phase:
+                    statistics.merge(self.phases[key])
+        return statistics
+
+    def add(self, phase, service, start_time, latency, fault_code=None, error=None):
+        '''
+        Adds the result of a request.
+        :param phase: str - phase name
+        :param service: str - service code
+        :param start_time: float - request start time (seconds since epoch)
+        :param latency: float - request latency in seconds
+        :param fault_code: str|None - fault code if the response was a SOAP fault
+        :param error: str|None - error name if no valid response was received
+        :return: None
+        '''
+        with self.lock:
+            self.get(phase, service).add(start_time, latency, fault_code=fault_code, error=error,
+                                         interval=self.interval)
+
+    def merge(self, other):
+        '''
+        Adds the results of another LoadStatistics, eg from another worker process.
+        :param other: LoadStatistics
+        :return: None
+        '''
+        with self.lock:
+            for key in other.order:
+                self.get(*key).merge(other.phases[key])
+
+    def summary(self):
+        '''
+        Returns the summary of every phase and service.
+        :return: [dict] - summaries with phase and service
+        '''
+        rows = []
+        with self.lock:
+            for phase, service in self.order:
+                summary = self.phases[(phase, service)].summary()
+                summary.update({'phase': phase, 'service': service})
+                rows.append(summary)
+        return rows
+
+    def get_timeline(self, phase, service):
+        '''
+        Returns the throughput over time of a phase and service, with empty intervals included.
+        :param phase: str - phase name
+        :param service: str - service code
+        :return: [(int, float, float)] - (seconds from the start, requests per second, failures per second)
+        '''
+        statistics = self.phases[(phase, service)]
+        if not statistics.timeline:
+            return []
+        first = min(statistics.timeline)
+        return [(second - first, statistics.timeline.get(second, [0, 0])[0] / float(self.interval),
+                 statistics.timeline.get(second, [0, 0])[1] / float(self.interval))
+                for second in range(first, max(statistics.timeline) + 1, self.interval)]
+
+    def report(self):
+        '''
+        Returns the results as human-readable lines: percentiles, throughput and error rate per fault code.
+        :return: [str] - report lines
+        '''
+        names = [get_percentile_name(percent) for percent in PERCENTILES]
+        lines = ['{0:<20} {1:<24} {2:>8} {3:>9} {4:>8} '.format('phase', 'service', 'count', 'req/s', 'errors') +
+                 ' '.join('{0:>9}'.format(name + ' ms') for name in names)]
+        for summary in self.summary():
+            lines.append('{0:<20} {1:<24} {2:>8} {3:>9.1f} {4:>7.2f}% '.format(
+                summary['phase'][:20], summary['service'][:24], summary['count'], summary['throughput'],
+                summary['error_rate'] * 100) + ' '.join(
+                '{0:>9.1f}'.format(summary[name + '_ms']) if summary[name + '_ms'] is not None else '{0:>9}'.format('-')
+                for name in names))
+            for code, count in sorted(summary['faults'].items()):
+                lines.append('    fault {0}: {1} ({2:.2f}%)'.format(code, count, summary['fault_rates'][code] * 100))
+            for error, count in sorted(summary['errors'].items()):
+                lines.append('    error {0}: {1}'.format(error, count))
+        return lines
+
+    def to_dict(self):
+        '''
+        Returns the results with histograms as a dictionary that can be saved as JSON.
+        :return: dict
+        '''
+        with self.lock:
+            return {'significant_digits': self.significant_digits, 'interval': self.interval,
+                    'phases': [{'phase': phase, 'service': service,
+                                'statistics': self.phases[(phase, service)].to_dict()}
+                               for phase, service in self.order]}
+
+    @staticmethod
+    def from_dict(data):
+        '''
+        Creates the results from a dictionary made by to_dict.
+        :param data: dict
+        :return: LoadStatistics
+        '''
+        statistics = LoadStatistics(data['significant_digits'], data['interval'])
+        for item in data['phases']:
+            statistics.get(item['phase'], item['service']).merge(PhaseStatistics.from_dict(item['statistics']))
+        return statistics
+
+    def export_json(self, path):
+        '''
+        Saves the results with histograms, summaries and throughput over time as JSON.
+        :param path: str - file path
+        :return: None
+        '''
+        data = self.to_dict()
+        data['summary'] = self.summary()
+        data['timeline'] = [{'phase': phase, 'service': service, 'seconds': self.get_timeline(phase, service)}
+                            for phase, service in self.order]
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def export_csv(self, path):
+        '''
+        Saves the summary of every phase and service as CSV, one row each.
+        :param path: str - file path
+        :return: None
+        '''
+        with open(path, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(SUMMARY_FIELDS)
+            for summary in self.summary():
+                summary['faults'] = ';'.join('{0}={1}'.format(code, count)
+                                             for code, count in sorted(summary['faults'].items()))
+                summary['errors'] = ';'.join('{0}={1}'.format(error, count)
+                                             for error, count in sorted(summary['errors'].items()))
+                writer.writerow([summary[field] if summary[field] is not None else '' for field in SUMMARY_FIELDS])
+
+    @staticmethod
+    def load(paths):
+        '''
+        Loads and merges results saved with export_json, eg from several worker processes.
+        :param paths: [str] - JSON files
+        :return: LoadStatistics
+        '''
+        statistics = None
+        for path in paths:
+            with open(path, 'r') as f:
+                loaded = LoadStatistics.from_dict(json.load(f))
+            if statistics is None:
+                statistics = loaded
+            else:
+                statistics.merge(loaded)
+        return statistics
@@ -1,4 +1,3 @@
-import time
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.keys import Keys
@@ -89,7 +88,7 @@ def logout(self, url=None):
 
     if url is None:
         self.driver.get(self.url)
-        time.sleep(3)
+        self.wait_settled()
         user_info = None
         try:
             user_info = self.by_css(element=login_constants.LOGIN_USERNAME_VALUE_CSS)
@@ -103,7 +102,7 @@ def logout(self, url=None):
             self.driver.get('{0}'.format(self.url))
     else:
         self.driver.get(url)
-        time.sleep(3)
+        self.wait_settled()
         user_info = None
         try:
             user_info = self.by_css(element=login_constants.LOGIN_USERNAME_VALUE_CSS)
@@ -0,0 +1,853 @@
+'''
+Mock X-Road service provider that replaces the SoapUI mock service (mock/service-soapui). Serves the operations of
+the WSDL files in mock/service_wsdl at the paths of their soap:address locations, echoes the X-Road headers of the
+request back in the response and returns the WSDL for "?wsdl" requests. Response delays, sizes, SOAP faults and
+connection resets can be set for all operations or per operation (see Behaviour and get_behaviours) to model slow,
+large or failing service providers. Requests with attachments (multipart/related: SOAP with attachments or MTOM, eg
+mockSwaRef and mockMtom in mock.wsdl) are read as they are received and the attachments are only counted, so their
+size is not limited by memory; the response reports the size of every attachment. Uses only the standard library
+(Python 2.7 and 3) so that it can also be copied to the service host and started with MockRunner over SSH:
+
+    python mock_service.py --port 8088 --workers 4 --config config.ini testservice.wsdl
+'''
+import argparse
+import math
+import os
+import random
+import re
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from xml.etree import ElementTree
+
+WSDL_NAMESPACE = 'http://schemas.xmlsoap.org/wsdl/'
+WSDL_SOAP_NAMESPACE = 'http://schemas.xmlsoap.org/wsdl/soap/'
+XML_SCHEMA_NAMESPACE = 'http://www.w3.org/2001/XMLSchema'
+
+# Line printed when the service is ready, for MockRunner ready_regex
+STARTED_MESSAGE = 'MockService started'
+
+# Parts of the SOAP request: start tag of the envelope (for its namespace declarations), header content and the first
+# element in the body
+ENVELOPE_REGEX = re.compile(br'<(?:([\w.-]+):)?Envelope\b[^>]*>')
+HEADER_REGEX = re.compile(br'<(?:[\w.-]+:)?Header\b[^>]*>(.*?)</(?:[\w.-]+:)?Header>', re.S)
+BODY_ELEMENT_REGEX = re.compile(br'<(?:[\w.-]+:)?Body\b[^>]*>\s*<(?:[\w.-]+:)?([\w.-]+)')
+XMLNS_REGEX = re.compile(br'\sxmlns(?::[\w.-]+)?\s*=\s*("[^"]*"|\'[^\']*\')')
+# Boundary parameter of a multipart content type
+BOUNDARY_REGEX = re.compile(br'boundary\s*=\s*(?:"([^"]+)"|([^\s;]+))', re.I)
+
+RESPONSE_TEMPLATE = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                     b'<{prefix}Envelope{namespaces}><{prefix}Header>{header}</{prefix}Header>'
+                     b'<{prefix}Body>{body}</{prefix}Body></{prefix}Envelope>')
+FAULT_TEMPLATE = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  b'<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"><SOAP-ENV:Body>'
+                  b'<SOAP-ENV:Fault><faultcode>{code}</faultcode><faultstring>{message}</faultstring>'
+                  b'<detail><faultDetail>{detail}</faultDetail></detail></SOAP-ENV:Fault>'
+                  b'</SOAP-ENV:Body></SOAP-ENV:Envelope>')
+
+HTTP_REASONS = {200: b'OK', 400: b'Bad Request', 404: b'Not Found', 405: b'Method Not Allowed',
+                500: b'Internal Server Error'}
+
+# Multipliers of the response size units
+SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Block of generated response data; the same text as in the responses of the JMeter mock service
+DATA_BLOCK = b'1234567890' * 6554
+
+
+def to_bytes(value):
+    '''
+    Returns the value as UTF-8 bytes.
+    :param value: str|bytes|object - value
+    :return: bytes
+    '''
+    if isinstance(value, bytes):
+        return value
+    if not isinstance(value, type(u'')):
+        value = u'{0}'.format(value)
+    return value.encode('utf-8')
+
+
+def escape(value):
+    '''
+    Escapes a value for XML text.
+    :param value: bytes - value
+    :return: bytes
+    '''
+    return to_bytes(value).replace(b'&', b'&amp;').replace(b'<', b'&lt;').replace(b'>', b'&gt;')
+
+
+def parse_size(value):
+    '''
+    Parses a data size: number of bytes, or a number with unit B, KB, MB or GB (eg 10KB, 1.5MB).
+    :param value: str|int - size
+    :return: int - size in bytes
+    '''
+    match = re.match(r'^\s*([0-9.]+)\s*([KMG]?B?)\s*$', str(value).upper())
+    if match is None:
+        raise ValueError('Invalid size: {0}'.format(value))
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_distribution(value):
+    '''
+    Parses a delay distribution in milliseconds and returns a function that returns random delays in seconds:
+    - fixed:MS or MS - always the same delay
+    - uniform:MIN,MAX - any delay between MIN and MAX
+    - normal:MEAN,STDDEV - normal distribution, negative values are 0
+    - exponential:MEAN - exponential distribution, eg random waits for a busy resource
+    - lognormal:MEDIAN,SIGMA - log-normal distribution with a long tail, typical of real service response times
+    :param value: str|int|float|None - distribution; None or empty for no delay
+    :return: function|None - function returning the delay in seconds; None for no delay
+    '''
+    if value is None or str(value).strip() == '':
+        return None
+    name, _, args = str(value).partition(':')
+    if not args:
+        name, args = 'fixed', name
+    name = name.strip().lower()
+    args = [float(arg) for arg in args.split(',')]
+    if name == 'fixed':
+        return lambda: args[0] / 1000
+    if name == 'uniform':
+        return lambda: random.uniform(args[0], args[1]) / 1000
+    if name == 'normal':
+        return lambda: max(0.0, random.normalvariate(args[0], args[1])) / 1000
+    if name == 'exponential':
+        return lambda: random.expovariate(1 / args[0]) / 1000 if args[0] > 0 else 0.0
+    if name == 'lognormal':
+        mu = math.log(args[0]) if args[0] > 0 else 0.0
+        return lambda: random.lognormvariate(mu, args[1]) / 1000
+    raise ValueError('Unknown delay distribution: {0}'.format(value))
+
+
+def get_element_text(xml, name):
+    '''
+    Returns the text of the first element with the local name, or None.
+    :param xml: bytes - XML
+    :param name: str - element local name
+    :return: bytes|None
+    '''
+    match = re.search(br'<(?:[\w.-]+:)?' + re.escape(to_bytes(name)) + br'\b[^>]*>([^<]*)<', xml)
+    return match.group(1).strip() if match else None
+
+
+def java_random_int(seed):
+    '''
+    Returns the first value of java.util.Random(seed).nextInt(), the same random number as the SoapUI mock service.
+    :param seed: int - seed
+    :return: int - signed 32-bit random number
+    '''
+    mask = (1 << 48) - 1
+    seed = (seed ^ 0x5DEECE66D) & mask
+    seed = (seed * 0x5DEECE66D + 0xB) & mask
+    value = seed >> 16
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+
+def xroad_get_random(request_body):
+    '''
+    xroadGetRandom: random number from the seed, like the SoapUI mock service.
+    :param request_body: bytes - request body element
+    :return: bytes - response element content
+    '''
+    seed = get_element_text(request_body, 'seed')
+    try:
+        value = java_random_int(int(float(seed)))
+    except (TypeError, ValueError):
+        value = random.randint(-2 ** 31, 2 ** 31 - 1)
+    return b'<random>' + to_bytes(value) + b'</random>'
+
+
+def body_mass_index(request_body):
+    '''
+    bodyMassIndex: weight (kg) / height (m) squared, rounded to two decimals.
+    :param request_body: bytes - request body element
+    :return: bytes - response element content
+    '''
+    weight = float(get_element_text(request_body, 'weight').replace(b',', b'.'))
+    height = float(get_element_text(request_body, 'height').replace(b',', b'.'))
+    return b'<bodyMassIndex>' + to_bytes(round(weight / (height / 100) ** 2, 2)) + b'</bodyMassIndex>'
+
+
+# Operations with their own implementation; other WSDL operations return the response elements without values
+HANDLERS = {'xroadGetRandom': xroad_get_random, 'bodyMassIndex': body_mass_index}
+
+
+class Behaviour:
+    '''
+    How the mock service responds to an operation: delay before responding, extra data added to the response (in a
+    data element at the end of the response element, sent in blocks so that responses of hundreds of megabytes are
+    never kept in memory), and the probabilities of answering with a SOAP fault or resetting the connection instead.
+    '''
+    delay = None  # Function returning the delay in seconds, see parse_distribution; None for no delay
+    size = 0  # Bytes of extra data in the response
+    fault_rate = 0.0  # Probability of a SOAP fault, 0-1
+    fault_code = 'Server.ServiceFailed'
+    fault_string = 'Mock service fault'
+    reset_rate = 0.0  # Probability of resetting the connection without a response, 0-1
+
+    def __init__(self, delay=None, size=None, fault_rate=None, fault_code=None, fault_string=None, reset_rate=None):
+        '''
+        :param delay: str|None - delay distribution in milliseconds, see parse_distribution
+        :param size: str|int|None - bytes of extra data in the response, see parse_size
+        :param fault_rate: float|None - probability of a SOAP fault
+        :param fault_code: str|None - fault code
+        :param fault_string: str|None - fault string
+        :param reset_rate: float|None - probability of resetting the connection
+        '''
+        if delay is not None:
+            self.delay = parse_distribution(delay)
+        if size is not None:
+            self.size = parse_size(size)
+        if fault_rate is not None:
+            self.fault_rate = float(fault_rate)
+        if fault_code is not None:
+            self.fault_code = fault_code
+        if fault_string is not None:
+            self.fault_string = fault_string
+        if reset_rate is not None:
+            self.reset_rate = float(reset_rate)
+
+
+# Options of Behaviour
+BEHAVIOUR_OPTIONS = ['delay', 'size', 'fault_rate', 'fault_code', 'fault_string', 'reset_rate']
+
+
+def get_behaviours(options):
+    '''
+    Creates the behaviours from configuration options: "option" for all operations and "operation.option" for one
+    operation (eg delay=uniform:10,50 and xroadGetRandom.delay=fixed:500). Operation names are not case-sensitive.
+    :param options: dict - option: value
+    :return: {str|None: Behaviour} - lowercase operation name (None for all operations): behaviour
+    '''
+    defaults = {}
+    operations = {}
+    for key, value in options.items():
+        operation, _, option = str(key).rpartition('.')
+        if option not in BEHAVIOUR_OPTIONS or value is None or str(value).strip() == '':
+            continue
+        if operation:
+            operations.setdefault(operation.lower(), {})[option] = value
+        else:
+            defaults[option] = value
+    behaviours = {None: Behaviour(**defaults)}
+    for operation, values in operations.items():
+        merged = dict(defaults)
+        merged.update(values)
+        behaviours[operation] = Behaviour(**merged)
+    return behaviours
+
+
+def read_behaviours(ini_file, section='mock_behaviour'):
+    '''
+    Reads the behaviours from a section of an INI file, eg the test configuration main/config.ini.
+    :param ini_file: str - INI file
+    :param section: str - section name
+    :return: {str|None: Behaviour} - see get_behaviours
+    '''
+    try:
+        from ConfigParser import RawConfigParser
+    except ImportError:
+        from configparser import RawConfigParser
+    ini = RawConfigParser()
+    ini.read(ini_file)
+    if not ini.has_section(section):
+        return get_behaviours({})
+    return get_behaviours(dict(ini.items(section)))
+
+
+class ResetConnection(Exception):
+    '''
+    Raised by MockService.handle when the connection has to be reset without a response.
+    '''
+
+
+class GeneratedResponse:
+    '''
+    Response body with generated data in the middle. The data is sent in blocks and never kept in memory as a whole.
+    '''
+
+    def __init__(self, prefix, size, suffix):
+        '''
+        :param prefix: bytes - response before the data
+        :param size: int - bytes of data
+        :param suffix: bytes - response after the data
+        '''
+        self.prefix = prefix
+        self.size = size
+        self.suffix = suffix
+        self.length = len(prefix) + size + len(suffix)
+
+    def chunks(self):
+        '''
+        Returns the response in blocks.
+        :return: generator of bytes
+        '''
+        yield self.prefix
+        remaining = self.size
+        while remaining > 0:
+            block = DATA_BLOCK if remaining >= len(DATA_BLOCK) else DATA_BLOCK[:remaining]
+            remaining -= len(block)
+            yield block
+        yield self.suffix
+
+
+def read_multipart(blocks, content_type):
+    '''
+    Reads a multipart/related body (SOAP with attachments or MTOM/XOP) from blocks of data as they are received. Only
+    the root part (the first part, the SOAP envelope) is kept; the other parts are only counted, so attachments of any
+    size take no memory.
+    :param blocks: iterable of bytes - body data
+    :param content_type: bytes - Content-Type header with the boundary
+    :return: (bytes, [(bytes, int)]) - root part and (Content-ID, size in bytes) of every attachment
+    '''
+    match = BOUNDARY_REGEX.search(content_type)
+    if match is None:
+        raise ValueError('No boundary in multipart content type')
+    delimiter = b'\r\n--' + (match.group(1) or match.group(2))
+    keep = len(delimiter) - 1  # Bytes at the end of the data that can be the start of a delimiter
+    data = b'\r\n'  # The first delimiter has no line break before it
+    state = 'preamble'
+    root = None
+    attachments = []
+    content = []
+    content_id = None
+    size = 0
+    for block in blocks:
+        if state == 'end':
+            # Epilogue
+            continue
+        data += block
+        while state != 'end':
+            if state in ('preamble', 'content'):
+                index = data.find(delimiter)
+                part = data[:index] if index >= 0 else data[:-keep]
+                if state == 'content':
+                    size += len(part)
+                    if root is None:
+                        content.append(part)
+                if index < 0:
+                    data = data[-keep:]
+                    break
+                data = data[index:]
+                if state == 'content':
+                    if root is None:
+                        root = b''.join(content)
+                    else:
+                        attachments.append((content_id, size))
+                state = 'delimiter'
+            elif state == 'delimiter':
+                if len(data) < len(delimiter) + 2:
+                    break
+                if data[len(delimiter):len(delimiter) + 2] == b'--':
+                    state = 'end'
+                    break
+                end = data.find(b'\r\n', len(delimiter))
+                if end < 0:
+                    break
+                data = data[end:]
+                state = 'headers'
+            else:
+                # Part headers, from the line break after the delimiter line until an empty line
+                end = data.find(b'\r\n\r\n')
+                if end < 0:
+                    break
+                content_id = None
+                for line in data[2:end].split(b'\r\n'):
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-id':
+                        content_id = value.strip().strip(b'<>')
+                data = data[end + 4:]
+                content = []
+                size = 0
+                state = 'content'
+    if state != 'end' or root is None:
+        raise ValueError('Incomplete multipart body')
+    return root, attachments
+
+
+def get_attachments_content(attachments):
+    '''
+    Returns the response element content that reports the received attachments.
+    :param attachments: [(bytes, int)] - Content-ID and size of every attachment
+    :return: bytes
+    '''
+    return b''.join([b'<data>', to_bytes(len(attachments)), b' attachment(s), ',
+                     to_bytes(sum(size for _, size in attachments)), b' bytes</data><xml>'] +
+                    [b'<attachment contentId="' + escape(content_id or b'').replace(b'"', b'&quot;') + b'" size="' +
+                     to_bytes(size) + b'"/>' for content_id, size in attachments] + [b'</xml>'])
+
+
+class BodyReader:
+    '''
+    Reads a request body from a connection in blocks as they are received, with Content-Length or chunked transfer
+    encoding. Data received after the body is left in buffer.
+    '''
+
+    def __init__(self, connection, buffer, headers, buffer_size=65536):
+        '''
+        :param connection: socket.socket - client connection
+        :param buffer: bytes - data received after the request headers
+        :param headers: {bytes: bytes} - headers with lowercase names
+        :param buffer_size: int - maximum number of bytes received at a time
+        '''
+        self.connection = connection
+        self.buffer = buffer
+        self.buffer_size = buffer_size
+        self.chunked = headers.get(b'transfer-encoding', b'').lower() == b'chunked'
+        self.length = int(headers.get(b'content-length', 0))
+
+    def receive(self, size=None):
+        '''
+        Receives data from the connection.
+        :param size: int|None - maximum number of bytes; buffer_size if None
+        :return: bytes - data
+        '''
+        data = self.connection.recv(max(size or 0, self.buffer_size))
+        if not data:
+            raise socket.error('Connection closed')
+        return data
+
+    def read(self):
+        '''
+        Reads the whole body.
+        :return: bytes - body
+        '''
+        while not self.chunked and len(self.buffer) < self.length:
+            # Receive the rest in as few calls as possible
+            self.buffer += self.receive(self.length - len(self.buffer))
+        return b''.join(self.blocks())
+
+    def blocks(self):
+        '''
+        Returns the body in blocks as they are received.
+        :return: generator of bytes
+        '''
+        if self.chunked:
+            for block in self.chunks():
+                yield block
+            return
+        remaining = self.length
+        while remaining > 0:
+            if not self.buffer:
+                self.buffer = self.receive()
+            block = self.buffer[:remaining]
+            self.buffer = self.buffer[len(block):]
+            remaining -= len(block)
+            yield block
+
+    def chunks(self):
+        '''
+        Returns the data of a body sent with chunked transfer encoding.
+        :return: generator of bytes
+        '''
+        while True:
+            end = self.buffer.find(b'\r\n')
+            while end < 0:
+                self.buffer += self.receive()
+                end = self.buffer.find(b'\r\n')
+            size = int(self.buffer[:end].split(b';')[0], 16)
+            self.buffer = self.buffer[end + 2:]
+            if size == 0:
+                # Skip trailers until the empty line
+                while True:
+                    end = self.buffer.find(b'\r\n')
+                    while end < 0:
+                        self.buffer += self.receive()
+                        end = self.buffer.find(b'\r\n')
+                    line = self.buffer[:end]
+                    self.buffer = self.buffer[end + 2:]
+                    if not line:
+                        return
+            while size > 0:
+                if not self.buffer:
+                    self.buffer = self.receive()
+                block = self.buffer[:size]
+                self.buffer = self.buffer[len(block):]
+                size -= len(block)
+                yield block
+            while len(self.buffer) < 2:
+                self.buffer += self.receive()
+            self.buffer = self.buffer[2:]
+
+
+class Operation:
+    '''
+    Operation of a WSDL service.
+    '''
+
+    def __init__(self, name, namespace, response_element, response_fields, handler=None):
+        '''
+        :param name: str - operation name (request element name)
+        :param namespace: str - target namespace of the WSDL
+        :param response_element: str - response element name
+        :param response_fields: [str] - child elements of the response element
+        :param handler: function|None - function returning the response element content from the request element
+        '''
+        self.name = name
+        self.namespace = namespace
+        self.response_element = response_element
+        self.response_fields = response_fields
+        self.handler = handler
+        self.response_start = to_bytes('<ns1:{0} xmlns:ns1="{1}">'.format(response_element, namespace))
+        self.response_end = to_bytes('</ns1:{0}>'.format(response_element))
+        self.default_content = b''.join(to_bytes('<{0}/>'.format(field)) for field in response_fields)
+
+    def get_response(self, request_body, attachments=None):
+        '''
+        Returns the response body element.
+        :param request_body: bytes - request body content
+        :param attachments: [(bytes, int)]|None - Content-ID and size of the attachments of a multipart request
+        :return: bytes - response body element
+        '''
+        if self.handler is not None:
+            content = self.handler(request_body)
+        elif attachments is not None:
+            content = get_attachments_content(attachments)
+        else:
+            content = self.default_content
+        return self.response_start + content + self.response_end
+
+
+def load_wsdl(path, handlers=None):
+    '''
+    Reads the services of a WSDL file.
+    :param path: str - WSDL file path
+    :param handlers: dict|None - operation name: handler function; HANDLERS if None
+    :return: {str: {str: Operation}} - service path: {operation name: operation}
+    '''
+    if handlers is None:
+        handlers = HANDLERS
+    ns = {'wsdl': WSDL_NAMESPACE, 'soap': WSDL_SOAP_NAMESPACE, 'xs': XML_SCHEMA_NAMESPACE}
+    root = ElementTree.parse(path).getroot()
+    namespace = root.get('targetNamespace')
+
+    # Child elements of the schema elements, for the responses of operations without a handler
+    fields = {}
+    for element in root.findall('wsdl:types/xs:schema/xs:element', ns):
+        fields[element.get('name')] = [child.get('name') for child in element.findall('.//xs:element', ns)]
+    # Message name: element name
+    messages = {}
+    for message in root.findall('wsdl:message', ns):
+        part = message.find('wsdl:part', ns)
+        if part is not None and part.get('element'):
+            messages[message.get('name')] = part.get('element').split(':')[-1]
+    # Operation name: response element name
+    responses = {}
+    for operation in root.findall('wsdl:portType/wsdl:operation', ns):
+        output = operation.find('wsdl:output', ns)
+        if output is not None:
+            responses[operation.get('name')] = messages.get(output.get('message').split(':')[-1])
+    # Binding name: operation names
+    bindings = {}
+    for binding in root.findall('wsdl:binding', ns):
+        bindings[binding.get('name')] = [operation.get('name') for operation in binding.findall('wsdl:operation', ns)]
+
+    services = {}
+    for port in root.findall('wsdl:service/wsdl:port', ns):
+        address = port.find('soap:address', ns)
+        if address is None:
+            continue
+        path = '/' + address.get('location').split('://', 1)[-1].split('/', 1)[-1]
+        operations = services.setdefault(path, {})
+        for name in bindings.get(port.get('binding').split(':')[-1], []):
+            response_element = responses.get(name) or name + 'Response'
+            operations[name] = Operation(name, namespace, response_element, fields.get(response_element, []),
+                                         handlers.get(name))
+    return services
+
+
+class MockService:
+    '''
+    Mock service provider. Every connection is served in its own thread with a minimal HTTP/1.1 implementation that
+    keeps connections open; with workers > 1, that many processes (forked, Unix only) accept connections on the same
+    socket so that the service can use all processor cores. Starting only binds the socket, so the service is ready
+    at once.
+    '''
+    host = '0.0.0.0'
+    port = 8088
+    workers = 1  # Number of processes accepting connections
+    backlog = 1024  # Listen queue length
+    buffer_size = 65536
+
+    def __init__(self, wsdl_files, host=None, port=None, workers=None, log=None, behaviours=None):
+        '''
+        :param wsdl_files: [str] - WSDL files of the services
+        :param host: str|None - address to listen on
+        :param port: int|None - port to listen on; 0 for a free port
+        :param workers: int|None - number of processes
+        :param log: logging function
+        :param behaviours: {str|None: Behaviour}|None - behaviours by lowercase operation name, see get_behaviours
+        '''
+        if host is not None:
+            self.host = host
+        if port is not None:
+            self.port = port
+        if workers is not None:
+            self.workers = workers
+        if log is not None:
+            self.log = log
+        self.services = {}  # Path: {operation name: Operation}
+        self.wsdl = {}  # Path: WSDL file contents
+        for path in wsdl_files:
+            with open(path, 'rb') as f:
+                contents = f.read()
+            for service_path, operations in load_wsdl(path).items():
+                self.services.setdefault(service_path, {}).update(operations)
+                self.wsdl[service_path] = contents
+        self.behaviours = behaviours if behaviours is not None else {None: Behaviour()}
+        self.socket = None
+        self.thread = None
+        self.children = []
+        self.running = False
+        self.error = None
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def get_url(self, path=''):
+        '''
+        Returns the URL of a service on this host.
+        :param path: str - service path, eg /xroadGetRandom
+        :return: str - URL
+        '''
+        host = self.host if self.host not in ('', '0.0.0.0') else socket.gethostname()
+        return 'http://{0}:{1}{2}'.format(host, self.port, path)
+
+    def start(self):
+        '''
+        Starts accepting connections in background threads (and processes if workers > 1) and returns.
+        :return: bool - if the service was started; False if it is already running
+        '''
+        self.error = None
+        if self.running:
+            self.error = 'Already running'
+            return False
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.backlog)
+        self.port = self.socket.getsockname()[1]
+        self.running = True
+        for _ in range(self.workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                # Worker process: accept connections until killed
+                try:
+                    self.accept()
+                finally:
+                    os._exit(0)
+            self.children.append(pid)
+        self.thread = threading.Thread(target=self.accept)
+        self.thread.daemon = True
+        self.thread.start()
+        self.log('{0} on port {1} with {2} process(es): {3}'.format(STARTED_MESSAGE, self.port, self.workers,
+                                                                     ', '.join(sorted(self.services))))
+        return True
+
+    def stop(self):
+        '''
+        Stops accepting connections and stops the worker processes.
+        :return: None
+        '''
+        if not self.running:
+            return
+        self.running = False
+        for pid in self.children:
+            try:
+                os.kill(pid, 15)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        self.children = []
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.socket.close()
+
+    def accept(self):
+        '''
+        Accepts connections and serves every connection in a new thread.
+        :return: None
+        '''
+        while self.running:
+            try:
+                connection, address = self.socket.accept()
+            except socket.error:
+                if not self.running:
+                    return
+                continue
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            thread = threading.Thread(target=self.serve, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def serve(self, connection):
+        '''
+        Serves HTTP requests of a connection until it is closed.
+        :param connection: socket.socket - client connection
+        :return: None
+        '''
+        buffer = b''
+        try:
+            while True:
+                # Request line and headers
+                end = buffer.find(b'\r\n\r\n')
+                while end < 0:
+                    data = connection.recv(self.buffer_size)
+                    if not data:
+                        return
+                    buffer += data
+                    end = buffer.find(b'\r\n\r\n')
+                lines = buffer[:end].split(b'\r\n')
+                buffer = buffer[end + 4:]
+                method, target, version = lines[0].split(b' ', 2)
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(b':')
+                    headers[name.strip().lower()] = value.strip()
+
+                # Body; attachments of multipart requests are counted while they are received
+                reader = BodyReader(connection, buffer, headers, self.buffer_size)
+                request_type = headers.get(b'content-type', b'')
+                if request_type.lower().startswith(b'multipart/'):
+                    blocks = reader.blocks()
+                    try:
+                        body, attachments = read_multipart(blocks, request_type)
+                    except ValueError:
+                        # Answered as an invalid SOAP request after the rest of the body
+                        for _ in blocks:
+                            pass
+                        body, attachments = b'', None
+                else:
+                    body, attachments = reader.read(), None
+                buffer = reader.buffer
+
+                try:
+                    status, content_type, response = self.handle(method, target, headers, body, attachments)
+                except ResetConnection:
+                    # Close with RST instead of FIN
+                    connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                    return
+                connection_header = headers.get(b'connection', b'').lower()
+                keep_alive = connection_header != b'close' if version == b'HTTP/1.1' else \
+                    connection_header == b'keep-alive'
+                generated = isinstance(response, GeneratedResponse)
+                head = b''.join([
+                    b'HTTP/1.1 ', to_bytes(status), b' ', HTTP_REASONS.get(status, b'Unknown'),
+                    b'\r\nContent-Type: ', content_type, b'\r\nContent-Length: ',
+                    to_bytes(response.length if generated else len(response)),
+                    b'\r\nConnection: ', b'keep-alive' if keep_alive else b'close', b'\r\n\r\n'])
+                if generated:
+                    connection.sendall(head)
+                    for chunk in response.chunks():
+                        connection.sendall(chunk)
+                else:
+                    connection.sendall(head + response)
+                if not keep_alive:
+                    return
+        except (socket.error, ValueError):
+            return
+        finally:
+            connection.close()
+
+    def handle(self, method, target, headers, body, attachments=None):
+        '''
+        Handles a request.
+        :param method: bytes - HTTP method
+        :param target: bytes - request target (path and query)
+        :param headers: {bytes: bytes} - headers with lowercase names
+        :param body: bytes - request body; the root part of a multipart request
+        :param attachments: [(bytes, int)]|None - Content-ID and size of the attachments of a multipart request
+        :return: (int, bytes, bytes|GeneratedResponse) - HTTP status, content type and response body
+        '''
+        path, _, query = target.partition(b'?')
+        path = path.decode('utf-8')
+        operations = self.services.get(path)
+        if operations is None:
+            return 404, b'text/plain', to_bytes('No service at {0}'.format(path))
+        if method == b'GET':
+            if query.lower() == b'wsdl':
+                return 200, b'text/xml; charset=utf-8', self.wsdl[path]
+            return 405, b'text/plain', b'Use POST for SOAP requests or ?wsdl for the WSDL'
+        if method != b'POST':
+            return 405, b'text/plain', b'Use POST for SOAP requests'
+
+        envelope = ENVELOPE_REGEX.search(body)
+        operation_match = BODY_ELEMENT_REGEX.search(body)
+        if envelope is None or operation_match is None:
+            return 500, b'text/xml; charset=utf-8', self.get_fault('Client.InvalidSoap', 'Invalid SOAP request')
+        operation = operations.get(operation_match.group(1).decode('utf-8'))
+        if operation is None:
+            return 500, b'text/xml; charset=utf-8', self.get_fault(
+                'Server.UnknownOperation', 'Unknown operation {0}'.format(operation_match.group(1).decode('utf-8')))
+
+        behaviour = self.behaviours.get(operation.name.lower()) or self.behaviours[None]
+        if behaviour.delay is not None:
+            time.sleep(behaviour.delay())
+        if behaviour.reset_rate and random.random() < behaviour.reset_rate:
+            raise ResetConnection()
+        if behaviour.fault_rate and random.random() < behaviour.fault_rate:
+            return 500, b'text/xml; charset=utf-8', self.get_fault(behaviour.fault_code, behaviour.fault_string)
+        try:
+            response_body = operation.get_response(body[operation_match.start(1):], attachments)
+        except (TypeError, ValueError, AttributeError, ZeroDivisionError) as e:
+            return 500, b'text/xml; charset=utf-8', self.get_fault('Server.InvalidRequest', 'Invalid request',
+                                                                   detail=str(e))
+        header = HEADER_REGEX.search(body)
+        prefix = envelope.group(1) + b':' if envelope.group(1) else b''
+        response = RESPONSE_TEMPLATE.replace(b'{prefix}', prefix) \
+            .replace(b'{namespaces}', b''.join(match.group(0) for match in XMLNS_REGEX.finditer(envelope.group(0)))) \
+            .replace(b'{header}', header.group(1) if header is not None else b'') \
+            .replace(b'{body}', response_body)
+        if behaviour.size:
+            # Extra data at the end of the response element
+            position = response.rindex(operation.response_end)
+            return 200, b'text/xml; charset=utf-8', GeneratedResponse(response[:position] + b'<data>', behaviour.size,
+                                                                      b'</data>' + response[position:])
+        return 200, b'text/xml; charset=utf-8', response
+
+    @staticmethod
+    def get_fault(code, message, detail=''):
+        '''
+        Returns a SOAP fault response.
+        :param code: str - fault code
+        :param message: str - fault string
+        :param detail: str - fault detail
+        :return: bytes - response body
+        '''
+        return FAULT_TEMPLATE.replace(b'{code}', escape(code)).replace(b'{message}', escape(message)) \
+            .replace(b'{detail}', escape(detail))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock X-Road service provider')
+    parser.add_argument('wsdl', nargs='+', help='WSDL files of the services')
+    parser.add_argument('--host', default=MockService.host)
+    parser.add_argument('--port', type=int, default=MockService.port)
+    parser.add_argument('--workers', type=int, default=MockService.workers)
+    parser.add_argument('--config', help='INI file with a mock_behaviour section, eg main/config.ini')
+    args = parser.parse_args()
+    mock = MockService(args.wsdl, host=args.host, port=args.port, workers=args.workers,
+                       log=lambda text: sys.stdout.write(text + '\n') or sys.stdout.flush(),
+                       behaviours=read_behaviours(args.config) if args.config else None)
+    mock.start()
+    # Stop the worker processes also when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.stop()
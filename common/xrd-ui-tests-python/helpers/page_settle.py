@@ -0,0 +1,110 @@
+import time
+
+from selenium.common.exceptions import UnexpectedAlertPresentException, WebDriverException
+from selenium.webdriver.support.events import AbstractEventListener
+
+# Script that installs the page activity tracker (once per page) and returns the current state. The tracker counts
+# pending XMLHttpRequest and fetch calls (including the ones not made with jQuery) and remembers the time of the last
+# change: a request starting or finishing or any DOM mutation seen by a MutationObserver.
+SETTLE_SCRIPT = '''
+var s = window.__xroadSettle;
+if (!s) {
+    s = window.__xroadSettle = {pending: 0, lastChange: Date.now()};
+    var changed = function () { s.lastChange = Date.now(); };
+    var finished = function () { s.pending--; changed(); };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        var done = false;
+        s.pending++;
+        changed();
+        this.addEventListener('loadend', function () { if (!done) { done = true; finished(); } });
+        try {
+            return send.apply(this, arguments);
+        } catch (e) {
+            if (!done) { done = true; finished(); }
+            throw e;
+        }
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            s.pending++;
+            changed();
+            return fetch.apply(this, arguments).then(function (r) { finished(); return r; },
+                                                     function (e) { finished(); throw e; });
+        };
+    }
+    if (window.MutationObserver && document.documentElement) {
+        new MutationObserver(changed).observe(document.documentElement,
+            {childList: true, subtree: true, attributes: true, characterData: true});
+    }
+}
+return {ready: document.readyState, jquery: window.jQuery ? window.jQuery.active : 0, pending: s.pending,
+        quiet: Date.now() - s.lastChange};
+'''
+
+# Defaults for wait_settled
+SETTLE_TIMEOUT = 30  # Maximum time to wait, in seconds
+SETTLE_QUIET_PERIOD = 0.3  # Time without requests or DOM changes after which the page is considered settled, seconds
+SETTLE_POLL_INTERVAL = 0.1  # Time between checks, in seconds
+
+
+def wait_settled(driver, timeout=SETTLE_TIMEOUT, quiet_period=SETTLE_QUIET_PERIOD, poll_interval=SETTLE_POLL_INTERVAL):
+    '''
+    Waits until the page has settled: document is loaded, no jQuery AJAX, XMLHttpRequest or fetch requests are
+    pending and the DOM has not changed for quiet_period seconds. Returns as soon as that happens, so the wait is only
+    as long as the page needs. If an alert is open, the page waits for the user and is considered settled.
+    :param driver: WebDriver
+    :param timeout: float - maximum time to wait in seconds
+    :param quiet_period: float - time without requests or DOM changes in seconds
+    :param poll_interval: float - time between checks in seconds
+    :return: bool - True if the page settled; False on timeout
+    '''
+    quiet_ms = quiet_period * 1000
+    end_time = time.time() + timeout
+    while True:
+        wait = poll_interval
+        try:
+            state = driver.execute_script(SETTLE_SCRIPT)
+            if state['ready'] == 'complete' and not state['jquery'] and not state['pending']:
+                if state['quiet'] >= quiet_ms:
+                    return True
+                # Nothing pending, only wait for the rest of the quiet period
+                wait = max(poll_interval, (quiet_ms - state['quiet']) / 1000.0)
+        except UnexpectedAlertPresentException:
+            return True
+        except WebDriverException:
+            # Page is being replaced, try again
+            pass
+
+        remaining = end_time - time.time()
+        if remaining <= 0:
+            return False
+        time.sleep(min(wait, remaining))
+
+
+class SettleListener(AbstractEventListener):
+    '''
+    WebDriver event listener that waits for the page to settle after every click and navigation, so that the next
+    step does not need a fixed sleep. Used with selenium.webdriver.support.events.EventFiringWebDriver. A page that
+    does not settle in time does not raise an error here; the next step finds out whether the page is usable.
+    '''
+
+    def __init__(self, timeout=SETTLE_TIMEOUT, quiet_period=SETTLE_QUIET_PERIOD):
+        self.timeout = timeout
+        self.quiet_period = quiet_period
+
+    def settle(self, driver):
+        wait_settled(driver, timeout=self.timeout, quiet_period=self.quiet_period)
+
+    def after_click(self, element, driver):
+        self.settle(driver)
+
+    def after_navigate_to(self, url, driver):
+        self.settle(driver)
+
+    def after_navigate_back(self, driver):
+        self.settle(driver)
+
+    def after_navigate_forward(self, driver):
+        self.settle(driver)
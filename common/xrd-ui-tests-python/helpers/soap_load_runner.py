@@ -0,0 +1,339 @@
+import csv
+import threading
+import time
+import uuid
+from xml.etree import ElementTree
+
+import requests
+
+import load_statistics
+import soaptestclient
+import xroad
+
+# Columns of the JMeter CSV result (JTL) file, in the order JMeter writes them
+JTL_FIELDS = ['timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName', 'dataType', 'success',
+              'failureMessage', 'bytes', 'sentBytes', 'grpThreads', 'allThreads', 'URL', 'Latency', 'IdleTime',
+              'Connect']
+
+# HTTP headers sent by the JMeter load test (common/xrd-jmeter-tests)
+JMETER_HEADERS = {'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': ''}
+
+
+def get_url(proto, host, port, path):
+    '''
+    Returns the service URL from the JMeter test parameters.
+    :param proto: str - protocol, http or https
+    :param host: str - security server or service host
+    :param port: int|str - port
+    :param path: str - path, eg / or /cgi-bin/consumer_proxy
+    :return: str - URL
+    '''
+    if not path.startswith('/'):
+        path = '/' + path
+    return '{0}://{1}:{2}{3}'.format(proto, host, port, path)
+
+
+def get_params(client_id, service_id, protocol_version='4.0', issue='12345', user_id='EE12345678901'):
+    '''
+    Returns the request template parameters (same names as in mock/queries/service.xml) for a client and a service.
+    :param client_id: str - client XRoad ID, eg "XTEE-CI : COM : 00000002 : MockSystem"
+    :param service_id: str - service XRoad ID, eg "XTEE-CI : COM : 00000002 : MockSystem : mock.v1"
+    :param protocol_version: str - X-Road protocol version
+    :param issue: str - X-Road issue
+    :param user_id: str - X-Road user ID
+    :return: dict - template parameters, without requestBody
+    '''
+    client = xroad.split_xroad_id(client_id)
+    service = xroad.split_xroad_id(service_id)
+    return {'xroadProtocolVersion': protocol_version, 'xroadIssue': issue, 'xroadUserId': user_id,
+            'memberInstance': client['instance'], 'memberClass': client['class'], 'memberCode': client['code'],
+            'subsystemCode': client['subsystem'] or '',
+            'serviceMemberInstance': service['instance'], 'serviceMemberClass': service['class'],
+            'serviceMemberCode': service['code'], 'serviceSubsystemCode': service['subsystem'] or '',
+            'serviceCode': service['service_name'], 'serviceVersion': service['service_version'] or ''}
+
+
+class Phase:
+    '''
+    One thread group of the load test. Threads are started evenly during rampup seconds and send requests one after
+    another until duration seconds have passed from the start of the phase, the same way as a JMeter thread group with
+    a scheduler.
+    '''
+    response_contains = None  # Text that a successful response must contain (JMeter response assertion)
+
+    def __init__(self, name, label, threads, duration, rampup, request_body, response_contains=None):
+        '''
+        :param name: str - thread group name, used in thread names
+        :param label: str - sampler label in the results
+        :param threads: int - number of threads
+        :param duration: float - phase duration in seconds, including ramp-up
+        :param rampup: float - time in seconds to start all threads
+        :param request_body: str - requestBody parameter of the request template
+        :param response_contains: str|None - text that a successful response must contain
+        '''
+        self.name = name
+        self.label = label
+        self.threads = threads
+        self.duration = duration
+        self.rampup = rampup
+        self.request_body = request_body
+        if response_contains is not None:
+            self.response_contains = response_contains
+
+
+class JtlWriter:
+    '''
+    Writes samples to a JMeter CSV result (JTL) file that JMeter, its HTML report generator and the Jenkins
+    Performance plugin can read. Samples can be written from multiple threads.
+    '''
+
+    def __init__(self, path):
+        '''
+        :param path: str - JTL file path; overwritten if it exists
+        '''
+        self.lock = threading.Lock()
+        self.file = open(path, 'wb')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(JTL_FIELDS)
+
+    def write(self, sample):
+        '''
+        Writes a sample.
+        :param sample: dict - sample with JTL_FIELDS keys
+        :return: None
+        '''
+        row = [sample[field] for field in JTL_FIELDS]
+        with self.lock:
+            self.writer.writerow(row)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class LoadRunner:
+    '''
+    Python version of the JMeter load test in common/xrd-jmeter-tests: runs the phases (warm-up and main test) one
+    after another, sending SOAP requests from mock/queries/loadtest.xml with a new message ID every time. Every thread
+    keeps one keep-alive connection open. Samples are written to a JTL file, summarized per phase with
+    soaptestclient.LoadTestResult and recorded in latency histograms by phase and service code (statistics).
+    '''
+    timeout = 90.0  # Request timeout in seconds
+    headers = JMETER_HEADERS
+    client_certificate = None  # Client certificate and key files for HTTPS
+    server_certificate = None  # Server certificate for verification; False to skip verification
+    fault_text = 'Fault>'  # A response containing this text is a failure (JMeter not-soap-fault assertion)
+
+    def __init__(self, url, template, params, phases, jtl_file=None, timeout=None, headers=None,
+                 client_certificate=None, server_certificate=None, log=None, statistics=None):
+        '''
+        :param url: str - service URL
+        :param template: str - request body template
+        :param params: dict - template parameters; requestBody is taken from the phase
+        :param phases: [Phase] - phases to run
+        :param jtl_file: str|None - JTL file to write the samples to
+        :param timeout: float|None - request timeout in seconds
+        :param headers: dict|None - HTTP headers
+        :param client_certificate: (str, str)|None - client certificate and key files
+        :param server_certificate: str|bool|None - server certificate for verification
+        :param log: logging function
+        :param statistics: load_statistics.LoadStatistics|None - results to add the samples to; new if None
+        '''
+        self.url = url
+        self.template = soaptestclient.get_template(template)
+        self.params = params
+        self.phases = phases
+        self.jtl_file = jtl_file
+        if timeout is not None:
+            self.timeout = timeout
+        if headers is not None:
+            self.headers = headers
+        if client_certificate is not None:
+            self.client_certificate = client_certificate
+        if server_certificate is not None:
+            self.server_certificate = server_certificate
+        if log is not None:
+            self.log = log
+        self.statistics = statistics if statistics is not None else load_statistics.LoadStatistics()
+        self.parser = soaptestclient.SoapTestClient()
+        self.writer = None
+        self.active_lock = threading.Lock()
+        self.active = 0  # Number of running threads
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def get_body(self, phase):
+        '''
+        Returns the request body of the phase with a new message ID.
+        :param phase: Phase
+        :return: str - request body
+        '''
+        params = dict(self.params)
+        params['requestBody'] = phase.request_body
+        params['uuid'] = str(uuid.uuid4())
+        return self.template.render(params)
+
+    def check_response(self, phase, response, content):
+        '''
+        Checks the response the same way as the JMeter assertions.
+        :param phase: Phase
+        :param response: requests.Response
+        :param content: str - response body
+        :return: (str|None, str|None, str|None) - (failure message, fault code, error name); all None if the response
+                 is successful
+        '''
+        if self.fault_text in content:
+            try:
+                fault = self.parser.get_fault(content)
+            except ElementTree.ParseError:
+                fault = None
+            code = (fault['code'] if fault is not None else None) or 'Unknown'
+            return 'SOAP fault {0}'.format(code), code, None
+        if response.status_code != 200:
+            return 'HTTP {0}'.format(response.status_code), None, 'HTTP{0}'.format(response.status_code)
+        if phase.response_contains is not None and phase.response_contains not in content:
+            return 'Response does not contain {0}'.format(phase.response_contains), None, 'InvalidResponse'
+        return None, None, None
+
+    def sample(self, session, phase, thread_name):
+        '''
+        Sends one request and returns the sample.
+        :param session: requests.Session - session of the thread
+        :param phase: Phase
+        :param thread_name: str - thread name in the results
+        :return: dict - sample with JTL_FIELDS keys, fault_code, error (error name), start (start time) and seconds
+                        (elapsed time)
+        '''
+        body = self.get_body(phase)
+        sample = {'label': phase.label, 'threadName': thread_name, 'dataType': 'text', 'URL': self.url,
+                  'sentBytes': len(body), 'bytes': 0, 'IdleTime': 0, 'Connect': 0}
+        start_time = time.time()
+        try:
+            response = session.post(url=self.url, data=body, headers=self.headers, timeout=self.timeout,
+                                    cert=self.client_certificate, verify=self.server_certificate, stream=True)
+            latency = time.time() - start_time
+            try:
+                content = response.content
+            finally:
+                response.close()
+            failure, sample['fault_code'], sample['error'] = self.check_response(phase, response, content)
+            sample.update({'responseCode': response.status_code, 'responseMessage': response.reason or '',
+                           'bytes': len(content)})
+        except requests.RequestException as e:
+            latency = time.time() - start_time
+            failure = '{0}: {1}'.format(e.__class__.__name__, e)
+            sample.update({'responseCode': e.__class__.__name__, 'responseMessage': e.__class__.__name__,
+                           'fault_code': None, 'error': e.__class__.__name__})
+        elapsed = time.time() - start_time
+        with self.active_lock:
+            threads = self.active
+        sample.update({'timeStamp': int(start_time * 1000), 'elapsed': int(elapsed * 1000),
+                       'Latency': int(latency * 1000), 'success': 'false' if failure else 'true',
+                       'failureMessage': failure or '', 'grpThreads': threads, 'allThreads': threads,
+                       'start': start_time, 'seconds': elapsed})
+        return sample
+
+    def record(self, phase, sample, result):
+        '''
+        Saves a sample to the JTL file, the phase result and the statistics.
+        :param phase: Phase
+        :param sample: dict - sample
+        :param result: soaptestclient.LoadTestResult - phase result
+        :return: None
+        '''
+        if self.writer is not None:
+            self.writer.write(sample)
+        result.add(sample['seconds'], fault_code=sample['fault_code'], error=sample['error'])
+        self.statistics.add(phase.name, self.params.get('serviceCode') or '-', sample['start'], sample['seconds'],
+                            fault_code=sample['fault_code'], error=sample['error'])
+
+    def run_phase(self, phase, group):
+        '''
+        Runs one phase.
+        :param phase: Phase
+        :param group: int - thread group number, used in thread names
+        :return: soaptestclient.LoadTestResult - phase result
+        '''
+        result = soaptestclient.LoadTestResult()
+        end_time = {}
+
+        def worker(number, delay):
+            time.sleep(delay)
+            if time.time() >= end_time['phase']:
+                return
+            with self.active_lock:
+                self.active += 1
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            thread_name = '{0} {1}-{2}'.format(phase.name, group, number)
+            try:
+                while time.time() < end_time['phase']:
+                    self.record(phase, self.sample(session, phase, thread_name), result)
+            finally:
+                session.close()
+                with self.active_lock:
+                    self.active -= 1
+
+        self.log('Phase {0}: {1} threads, ramp-up {2} s, duration {3} s'.format(phase.name, phase.threads,
+                                                                              phase.rampup, phase.duration))
+        # Threads start at even intervals during ramp-up, the same as in JMeter
+        interval = float(phase.rampup) / phase.threads if phase.threads else 0
+        threads = [threading.Thread(target=worker, args=(number + 1, number * interval))
+                   for number in range(phase.threads)]
+        result.start_time = time.time()
+        end_time['phase'] = result.start_time + phase.duration
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.end_time = time.time()
+
+        for line in result.report():
+            self.log('{0}: {1}'.format(phase.name, line))
+        return result
+
+    def run(self):
+        '''
+        Runs all phases one after another.
+        :return: [(Phase, soaptestclient.LoadTestResult)] - results of the phases
+        '''
+        results = []
+        if self.jtl_file is not None:
+            self.writer = JtlWriter(self.jtl_file)
+        try:
+            for group, phase in enumerate(self.phases):
+                results.append((phase, self.run_phase(phase, group + 1)))
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+        return results
+
+
+def get_phases(config, request_body):
+    '''
+    Returns the warm-up and main phases from the loadtest section of the configuration. Parameter names are the same
+    as in the JMeter test; the warm-up phase is left out if wthreads or wduration is 0.
+    :param config: ConfReader - configuration
+    :param request_body: str - requestBody parameter for the phases that do not set their own
+    :return: [Phase]
+    '''
+    phases = []
+    if config.get_int('loadtest.wthreads', 10) and config.get_float('loadtest.wduration', 10):
+        phases.append(Phase('warmup', 'warmup-mock', config.get_int('loadtest.wthreads', 10),
+                            config.get_float('loadtest.wduration', 10), config.get_float('loadtest.wrampup', 2),
+                            config.get_string('loadtest.wrequest_body', '') or request_body))
+    phases.append(Phase('load-test-mock', 'mock_bodyData_10KB', config.get_int('loadtest.threads', 10),
+                        config.get_float('loadtest.duration', 60), config.get_float('loadtest.rampup', 10),
+                        config.get_string('loadtest.request_body', '') or request_body,
+                        config.get_string('loadtest.response_contains', '') or None))
+    return phases
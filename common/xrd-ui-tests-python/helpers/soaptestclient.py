@@ -1,9 +1,16 @@
+import atexit
+import math
+import os
 import requests
+import threading
 import time
 import re
+import string
 import uuid
 from xml.etree import ElementTree
 
+import timing
+
 # If the access rights are ok but the service endpoint has a problem, it may return:
 # - Server.ServerProxy.ServiceFailed.InvalidContentType
 # - Server.ServerProxy.ServiceFailed.NetworkError
@@ -24,6 +31,473 @@ from xml.etree import ElementTree
 # Invalid protocolVersion in request XML
 # - Client.InvalidProtocolVersion
 
+# Fault codes above, used for grouping faults in load test results
+FAULT_CODES = ['Server.ServerProxy.ServiceFailed.InvalidContentType', 'Server.ServerProxy.ServiceFailed.NetworkError',
+               'Server.ServerProxy.AccessDenied', 'Server.ServerProxy.UnknownService',
+               'Server.ServerProxy.ServiceDisabled', 'Server.ClientProxy.UnknownMember',
+               'Server.ClientProxy.InternalError', 'Client.InconsistentHeaders', 'Client.InvalidSoap',
+               'Client.InvalidProtocolVersion']
+
+
+def get_fault_group(fault_code):
+    '''
+    Returns the known fault code (see FAULT_CODES) that the fault code belongs to, or the fault code itself if it is
+    not one of the known codes.
+    :param fault_code: str - fault code from the response
+    :return: str - known fault code or fault_code
+    '''
+    for code in FAULT_CODES:
+        if fault_code == code or fault_code.startswith(code + '.'):
+            return code
+    return fault_code
+
+
+class LoadTestResult:
+    '''
+    Collects the results of a load test (see SoapTestClient.load_test). Results can be added from multiple threads.
+    '''
+    start_time = None
+    end_time = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []  # Latencies of all completed requests (including faults), in seconds
+        self.successful = 0  # Number of requests without a fault
+        self.faults = {}  # Fault code group: count
+        self.errors = {}  # Transport or parsing error name: count
+
+    def add(self, latency, fault_code=None, error=None):
+        '''
+        Adds the result of a single request.
+        :param latency: float - request latency in seconds
+        :param fault_code: str|None - fault code if the response was a SOAP fault
+        :param error: str|None - error name if no valid response was received
+        :return: None
+        '''
+        with self.lock:
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+                return
+            self.latencies.append(latency)
+            if fault_code is None:
+                self.successful += 1
+            else:
+                group = get_fault_group(fault_code)
+                self.faults[group] = self.faults.get(group, 0) + 1
+
+    @property
+    def count(self):
+        '''
+        Number of requests sent, including the ones that failed.
+        '''
+        return len(self.latencies) + sum(self.errors.values())
+
+    @property
+    def elapsed(self):
+        '''
+        Duration of the load test in seconds.
+        '''
+        if self.start_time is None:
+            return 0
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def throughput(self):
+        '''
+        Completed requests per second.
+        '''
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, percent):
+        '''
+        Returns the latency percentile (nearest rank).
+        :param percent: float - percentile, 0-100
+        :return: float|None - latency in seconds; None if there are no results
+        '''
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        rank = int(math.ceil(percent / 100.0 * len(latencies))) - 1
+        return latencies[min(max(rank, 0), len(latencies) - 1)]
+
+    def summary(self):
+        '''
+        Returns the results as a dictionary.
+        :return: dict - count, successful, faults, errors, elapsed, throughput and latencies (seconds)
+        '''
+        return {'count': self.count, 'successful': self.successful, 'faults': dict(self.faults),
+                'errors': dict(self.errors), 'elapsed': self.elapsed, 'throughput': self.throughput,
+                'p50': self.percentile(50), 'p95': self.percentile(95), 'p99': self.percentile(99),
+                'max': self.percentile(100)}
+
+    def report(self):
+        '''
+        Returns the results as human-readable lines.
+        :return: [str] - report lines
+        '''
+        summary = self.summary()
+        lines = ['Requests: {0}, successful: {1}, elapsed: {2:.2f} s, throughput: {3:.2f} req/s'.format(
+            summary['count'], summary['successful'], summary['elapsed'], summary['throughput'])]
+        if summary['p50'] is not None:
+            lines.append('Latency: p50={0:.1f} ms, p95={1:.1f} ms, p99={2:.1f} ms, max={3:.1f} ms'.format(
+                summary['p50'] * 1000, summary['p95'] * 1000, summary['p99'] * 1000, summary['max'] * 1000))
+        for code, count in sorted(summary['faults'].items()):
+            lines.append('Fault {0}: {1}'.format(code, count))
+        for error, count in sorted(summary['errors'].items()):
+            lines.append('Error {0}: {1}'.format(error, count))
+        return lines
+
+
+class RequestTemplate:
+    '''
+    Request body template with {parameter} placeholders, split once into static segments and placeholders so that
+    rendering only formats the parameters and joins the segments. Result is the same as text.format(**params).
+    '''
+    formatter = string.Formatter()
+
+    def __init__(self, text):
+        self.text = text
+        self.segments = []  # Static text before each placeholder, and after the last one
+        self.slots = []  # (parameter name or None, single-placeholder format string) for each placeholder
+        self.positional = False  # True if the template has {} or {0} placeholders that need positional arguments
+        literal = []
+        for literal_text, field_name, format_spec, conversion in self.formatter.parse(text):
+            literal.append(literal_text)
+            if field_name is None:
+                continue
+            self.segments.append(''.join(literal))
+            literal = []
+            if field_name == '' or field_name[0].isdigit():
+                self.positional = True
+            field = '{{{0}{1}{2}}}'.format(field_name, '!' + conversion if conversion else '',
+                                           ':' + format_spec if format_spec else '')
+            # Plain {name} placeholders can be filled in without formatting if the value is a string
+            simple = not conversion and not format_spec and re.match(r'[A-Za-z_]\w*$', field_name)
+            self.slots.append((field_name if simple else None, type(text)(field)))
+        self.segments.append(''.join(literal))
+
+    def render(self, params):
+        '''
+        Returns the template with placeholders replaced.
+        :param params: dict - parameters to be replaced in the template
+        :return: str - rendered text
+        '''
+        if self.positional:
+            return self.text.format(**params)
+        parts = [self.segments[0]]
+        for index, (name, field) in enumerate(self.slots):
+            value = params[name] if name is not None else None
+            parts.append(value if type(value) is str else field.format(**params))
+            parts.append(self.segments[index + 1])
+        return ''.join(parts)
+
+
+# Templates loaded from files (by path) and created from request bodies (by text)
+template_files = {}
+templates = {}
+templates_lock = threading.Lock()
+templates_max = 100  # Maximum number of templates created from request bodies that are cached
+
+
+def load_template(path):
+    '''
+    Returns the template from a file. Every file is read only once.
+    :param path: str - template file path
+    :return: RequestTemplate
+    '''
+    with templates_lock:
+        template = template_files.get(path)
+        if template is None:
+            with open(path, 'r') as f:
+                template = RequestTemplate(f.read())
+            template_files[path] = template
+            templates[template.text] = template
+        return template
+
+
+def get_template(text):
+    '''
+    Returns the compiled template for a request body.
+    :param text: str - request body template
+    :return: RequestTemplate
+    '''
+    template = templates.get(text)
+    if template is None:
+        template = RequestTemplate(text)
+        with templates_lock:
+            if len(templates) >= templates_max:
+                templates.clear()
+            templates[text] = template
+    return template
+
+
+def stream_template(text, params, name, chunks):
+    '''
+    Returns a request body that is rendered from a template with parameters, except for the {name} placeholder that is
+    replaced with chunks as they are generated, eg requestBody scaled up with itertools.repeat(request_body, count).
+    Only the chunk being sent is kept in memory. A new UUID is set as the request ID if params has no uuid.
+    :param text: str - request body template
+    :param params: dict - parameters to be replaced in the template
+    :param name: str - name of the placeholder replaced with the chunks
+    :param chunks: iterable of str - content of the placeholder
+    :return: generator of str - request body
+    '''
+    params = dict(params)
+    if 'uuid' not in params:
+        params['uuid'] = str(uuid.uuid4())
+    marker = '{0}-{1}'.format(name, uuid.uuid4().hex)
+    params[name] = marker
+    before, _, after = get_template(text).render(params).partition(marker)
+    yield before
+    for chunk in chunks:
+        yield chunk
+    yield after
+
+
+class ResponseStream:
+    '''
+    File-like wrapper around the content of a streamed requests response, so that the response can be parsed while it
+    is being received.
+    '''
+    chunk_size = 16384
+
+    def __init__(self, response):
+        self.chunks = response.iter_content(self.chunk_size)
+        self.buffer = b''
+
+    def read(self, size=-1):
+        '''
+        Reads up to size bytes; less only at the end of the response.
+        :param size: int - number of bytes to read; negative to read everything
+        :return: bytes - data read
+        '''
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        data = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return data
+
+
+# Sessions shared by SoapTestClient instances, keyed by (client certificate, server certificate, pool size)
+sessions = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(client_certificate=None, server_certificate=None, pool_size=10):
+    '''
+    Returns a requests session with a pool of keep-alive connections for the given certificates. Sessions are shared
+    between all clients using the same certificates, so that queries to the same security server reuse open
+    connections (and their TLS sessions) instead of connecting and doing a TLS handshake for every query.
+    :param client_certificate: (str, str)|str|None - client certificate and key files
+    :param server_certificate: str|bool|None - server certificate for verification
+    :param pool_size: int - maximum number of connections kept open per host
+    :return: requests.Session
+    '''
+    key = (client_certificate, server_certificate, pool_size)
+    with sessions_lock:
+        session = sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            sessions[key] = session
+        return session
+
+
+def close_sessions():
+    '''
+    Closes all shared sessions and their connections.
+    :return: None
+    '''
+    with sessions_lock:
+        for session in sessions.values():
+            session.close()
+        sessions.clear()
+
+
+atexit.register(close_sessions)
+
+
+class Attachment:
+    '''
+    Attachment of a multipart/related request (SOAP with attachments or MTOM), read from a file while the request is
+    being sent.
+    '''
+    content_type = 'application/octet-stream'
+
+    def __init__(self, path, content_id=None, content_type=None):
+        '''
+        :param path: str - attachment file
+        :param content_id: str|None - Content-ID without angle brackets; generated if None
+        :param content_type: str|None - content type of the attachment
+        '''
+        self.path = path
+        self.content_id = content_id if content_id is not None else '{0}@x-road.test'.format(uuid.uuid4().hex)
+        if content_type is not None:
+            self.content_type = content_type
+        self.size = os.path.getsize(path)
+
+    def get_reference(self, mtom=False):
+        '''
+        Returns the reference to the attachment for the SOAP body: a swaRef URI or an MTOM xop:Include element.
+        :param mtom: bool - True for MTOM, False for SOAP with attachments
+        :return: str - element content referring to the attachment
+        '''
+        if mtom:
+            return '<xop:Include xmlns:xop="http://www.w3.org/2004/08/xop/include" href="cid:{0}"/>'.format(
+                self.content_id)
+        return 'cid:{0}'.format(self.content_id)
+
+
+class MultipartBody:
+    '''
+    multipart/related request body with the SOAP envelope as the root part and attachments read from their files in
+    blocks while the body is sent, so attachments of any size are never kept in memory. The length is known in advance,
+    so requests sends the body with Content-Length (it is iterable and file-like, see requests.models.PreparedRequest).
+    '''
+    block_size = 65536
+    root_content_id = 'rootpart@x-road.test'
+
+    def __init__(self, envelope, attachments, mtom=False):
+        '''
+        :param envelope: str - SOAP envelope
+        :param attachments: [Attachment] - attachments
+        :param mtom: bool - True for MTOM (root part application/xop+xml), False for SOAP with attachments (text/xml)
+        '''
+        if not isinstance(envelope, bytes):
+            envelope = envelope.encode('utf-8')
+        self.boundary = 'MIMEBoundary_{0}'.format(uuid.uuid4().hex)
+        self.attachments = attachments
+        if mtom:
+            root_type = 'application/xop+xml; charset=UTF-8; type="text/xml"'
+            self.content_type = 'multipart/related; type="application/xop+xml"; start="<{0}>"; ' \
+                                'start-info="text/xml"; boundary="{1}"'.format(self.root_content_id, self.boundary)
+        else:
+            root_type = 'text/xml; charset=UTF-8'
+            self.content_type = 'multipart/related; type="text/xml"; start="<{0}>"; boundary="{1}"'.format(
+                self.root_content_id, self.boundary)
+
+        # Part headers before every attachment and the end of the body
+        self.root = self.get_part_header(root_type, self.root_content_id, '8bit') + envelope
+        self.headers = ['\r\n' + self.get_part_header(attachment.content_type, attachment.content_id, 'binary')
+                        for attachment in attachments]
+        self.end = '\r\n--{0}--\r\n'.format(self.boundary).encode('ascii')
+        self.length = len(self.root) + sum(len(header) + attachment.size for header, attachment in
+                                           zip(self.headers, attachments)) + len(self.end)
+        self.blocks = None
+        self.buffer = b''
+
+    def get_part_header(self, content_type, content_id, transfer_encoding):
+        '''
+        Returns the boundary and headers of a part.
+        :param content_type: str - content type
+        :param content_id: str - Content-ID without angle brackets
+        :param transfer_encoding: str - Content-Transfer-Encoding
+        :return: bytes
+        '''
+        return '--{0}\r\nContent-Type: {1}\r\nContent-Transfer-Encoding: {2}\r\nContent-ID: <{3}>\r\n\r\n'.format(
+            self.boundary, content_type, transfer_encoding, content_id).encode('ascii')
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        '''
+        Returns the body in blocks, reading the attachments from their files.
+        :return: generator of bytes
+        '''
+        yield self.root
+        for header, attachment in zip(self.headers, self.attachments):
+            yield header
+            with open(attachment.path, 'rb') as f:
+                while True:
+                    block = f.read(self.block_size)
+                    if not block:
+                        break
+                    yield block
+        yield self.end
+
+    def read(self, size=-1):
+        '''
+        Reads the next part of the body, at most size bytes.
+        :param size: int - maximum number of bytes to read; negative to read everything
+        :return: bytes - data read; empty at the end of the body
+        '''
+        if self.blocks is None:
+            self.blocks = iter(self)
+        if size < 0:
+            data = self.buffer + b''.join(self.blocks)
+            self.buffer = b''
+            return data
+        if not self.buffer:
+            self.buffer = next(self.blocks, b'')
+        data = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return data
+
+class ChunkedBody:
+    '''
+    Request body read from a file or generated by an iterable (eg a generator or stream_template) while it is sent,
+    with chunked transfer encoding, so that the size of the body is not limited by the client memory. Small chunks are
+    joined into blocks of about block_size bytes to keep the number of chunks and socket writes low.
+    '''
+    block_size = 65536
+
+    def __init__(self, source, block_size=None):
+        '''
+        :param source: file-like object|iterable of str - body
+        :param block_size: int|None - size of the blocks sent
+        '''
+        self.source = source
+        if block_size is not None:
+            self.block_size = block_size
+
+    def __iter__(self):
+        '''
+        Returns the body in blocks, encoded as UTF-8. requests sends every block as a chunk and ends the body at an
+        empty block, so no empty blocks are returned.
+        :return: generator of bytes
+        '''
+        if hasattr(self.source, 'read'):
+            while True:
+                block = self.source.read(self.block_size)
+                if not block:
+                    return
+                yield block.encode('utf-8') if not isinstance(block, bytes) else block
+        blocks = []
+        size = 0
+        for chunk in self.source:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('utf-8')
+            blocks.append(chunk)
+            size += len(chunk)
+            if size >= self.block_size:
+                yield b''.join(blocks)
+                blocks = []
+                size = 0
+        if size:
+            yield b''.join(blocks)
+
+
+def is_streamed(body):
+    '''
+    Returns True if the request body is sent with chunked transfer encoding: a file-like object, an iterator (eg a
+    generator) or a ChunkedBody.
+    :param body: str|file-like object|iterator|ChunkedBody - request body
+    :return: bool
+    '''
+    return isinstance(body, ChunkedBody) or hasattr(body, 'read') or hasattr(body, 'next') or \
+        hasattr(body, '__next__')
+
+
 class SoapTestClient:
     '''
     Test client to send SOAP queries to the test services. Uses XML ElementTree for parsing XML and UUID to generate
@@ -38,7 +512,8 @@ class SoapTestClient:
     fault = None
     fault_code = None
     fault_message = None
-    xml = None
+    xml = None  # Last response XML; only set if stream_response is False
+    service = None  # Service data of the last response
     verify_service_data = None
     params = None
     query_timeout = 90.0  # Query timeout in seconds
@@ -69,10 +544,17 @@ class SoapTestClient:
     faults_successful = None
     faults_unsuccessful = None
 
+    pool_size = 10  # Maximum number of keep-alive connections per host
+    stream_response = True  # Parse responses while receiving them, without keeping the response XML
+    drain_limit = 1048576  # Read at most this many bytes of unparsed response to keep the connection open
+    share_session = True  # Use the session shared with other clients with the same certificates (see get_session)
+    session = None
+    mtom = False  # Send attachments with MTOM/XOP instead of SOAP with attachments (swaRef)
+
     def __init__(self, url=None, body=None, client_certificate=None, server_certificate=None, query_timeout=None,
                  retry_interval=None, fail_timeout=None, headers=None, xroad_namespace=None,
                  xroad_identifiers_namespace=None, faults_successful=None, faults_unsuccessful=None,
-                 verify_service=None, params=None, log=None):
+                 verify_service=None, params=None, log=None, pool_size=None, share_session=None, mtom=None):
         '''
         Initializes the class and sets default values for all necessary parameters (if specified).
 
@@ -92,6 +574,9 @@ class SoapTestClient:
         :param verify_service: dict{} - verify specified service parameters; if one doesn't match, query fails
         :param params: dict{}|None - default parameters for query
         :param log: logging function
+        :param pool_size: int - maximum number of keep-alive connections per host
+        :param share_session: bool - True to share connections with other clients; False to use own session
+        :param mtom: bool - True to send attachments with MTOM, False for SOAP with attachments
         '''
 
         # Internal variables are set only if the parameters are not None.
@@ -126,6 +611,35 @@ class SoapTestClient:
             self.params = params
         if log is not None:
             self.log = log
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if share_session is not None:
+            self.share_session = share_session
+        if mtom is not None:
+            self.mtom = mtom
+
+    def get_session(self):
+        '''
+        Returns the session used for sending queries. Connections are kept open between queries.
+        :return: requests.Session
+        '''
+        if self.share_session:
+            return get_session(self.client_certificate, self.server_certificate, self.pool_size)
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        return self.session
+
+    def close(self):
+        '''
+        Closes the connections of the client's own session. Shared sessions are closed with close_sessions().
+        :return: None
+        '''
+        if self.session is not None:
+            self.session.close()
+            self.session = None
 
     def log(self, str):
         '''
@@ -135,15 +649,20 @@ class SoapTestClient:
         '''
         print(str)
 
-    def query(self, url=None, body=None, params=None, timeout=None):
+    @timing.timed('soap', detail='url')
+    def query(self, url=None, body=None, params=None, timeout=None, attachments=None):
         '''
         Sends a query to the service. All parameters are optional and if not set, they're replaced with default
         ones that were supplied to the init method.
         :param url: str|None - URL of the service
-        :param body: str|None - request body (XML)
+        :param body: str|file-like object|iterator|None - request body (XML); a file or an iterator (eg a generator or
+                                    stream_template) is sent as it is read, with chunked transfer encoding and
+                                    without replacing parameters (see ChunkedBody)
         :param params: dict|None - parameters to be replaced in the body; example: body="Hello, {name}",
                                     params={'name': 'John'} will result in body="Hello, John"
         :param timeout: int - query timeout in seconds
+        :param attachments: [Attachment]|None - attachments sent from their files in a multipart/related request;
+                                    body has to be a string
         :return: bool - True if the query succeeded and no Fault element was found in the result; False otherwise
         '''
 
@@ -164,9 +683,14 @@ class SoapTestClient:
         self.fault_message = None
         self.query_uuid = None
         self.xml = None
+        self.service = None
+
+        streamed = is_streamed(body)
+        if streamed and attachments:
+            raise ValueError('Attachments cannot be sent with a streamed body')
 
         # Do we need to replace parameters at all?
-        if self.set_default_params:
+        if self.set_default_params and not streamed:
             # If no params are set, use at least an uuid to make the request unique
             if params is None:
                 self.query_uuid = uuid.uuid4()
@@ -177,17 +701,112 @@ class SoapTestClient:
                 params['uuid'] = self.query_uuid
 
             # Replace all {parameters} in body
-            body = body.format(**params)
+            body = get_template(body).render(params)
+
+        headers = self.headers
+        if streamed:
+            # Sent with chunked transfer encoding while it is read
+            if not isinstance(body, ChunkedBody):
+                body = ChunkedBody(body)
+        elif attachments:
+            # Attachments are read from their files while the request is sent
+            body = MultipartBody(body, attachments, mtom=self.mtom)
+            headers = dict(self.headers)
+            headers['Content-Type'] = body.content_type
 
         # Send the query as POST request
         self.log('Sending query')
-        r = requests.post(url=url, data=body, headers=self.headers, timeout=timeout,
-                          cert=self.client_certificate, verify=self.server_certificate)
-        # Set last XML to be query result
-        self.xml = r.text
+        r = self.get_session().post(url=url, data=body, headers=headers, timeout=timeout,
+                                    cert=self.client_certificate, verify=self.server_certificate,
+                                    stream=self.stream_response)
+        if self.stream_response:
+            # Parse the response until we know if it is a fault and what the service is
+            fault, self.service = self.read_response(r)
+        else:
+            # Set last XML to be query result
+            self.xml = r.text
+
+            # Try to find Fault element - if exists, we got an error
+            fault = self.get_fault(self.xml)
+        if fault is not None:
+            # Return XML string and fault data
+            self.fault = fault
+            self.fault_message = self.fault['message']
+            self.fault_code = self.fault['code']
+            # Return False because we got a fault
+            return False
+
+        # Return True because the request succeeded
+        return True
+
+    def read_response(self, response):
+        '''
+        Parses a streamed response and closes it. Reading stops as soon as a Fault element has been found or the
+        response body content starts, so the body is never kept in memory. Up to drain_limit bytes of the rest of the
+        response are read and discarded so that the connection can be reused; otherwise the connection is closed.
+        :param response: requests.Response - response of a request sent with stream=True
+        :return: (dict{code, message, detail}|None, dict|None) - (fault data, service data)
+        '''
+        try:
+            stream = ResponseStream(response)
+            result = self.parse_response(stream)
+            drained = 0
+            while drained < self.drain_limit:
+                data = stream.read(65536)
+                if not data:
+                    break
+                drained += len(data)
+            return result
+        finally:
+            response.close()
+
+    def parse_response(self, source):
+        '''
+        Parses the SOAP envelope from a file-like object, reading only as much as needed: until the Fault element has
+        ended or the first element in the body that is not a Fault has started.
+        :param source: file-like object - response data
+        :return: (dict{code, message, detail}|None, dict|None) - (fault data, service data)
+        '''
+        ns = {'xroad': self.xroad_namespace, 'id': self.xroad_identifiers_namespace}
+        service_tag = '{{{0}}}service'.format(self.xroad_namespace)
+        body_tag = None
+        fault_tag = None
+        fault = None
+        service = None
+
+        # Tags of the currently open elements
+        path = []
+        for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if body_tag is None:
+                    # Get the namespace of the root element, same as SOAP-ENV in fault_xpath
+                    rm = re.match('\{(.*)\}', element.tag)
+                    prefix = '{{{0}}}'.format(rm.group(1)) if rm else ''
+                    body_tag = prefix + 'Body'
+                    fault_tag = prefix + 'Fault'
+                if path and path[-1] == body_tag and element.tag != fault_tag:
+                    # Body content starts and it is not a fault, no need to read further
+                    break
+                path.append(element.tag)
+            else:
+                path.pop()
+                if element.tag == fault_tag and path and path[-1] == body_tag:
+                    fault = {'code': element.find(self.fault_code_xpath).text,
+                             'message': element.find(self.fault_string_xpath).text,
+                             'detail': element.find(self.fault_detail_xpath).text}
+                    break
+                if element.tag == service_tag and service is None:
+                    service = self.parse_service(element, ns)
+        return fault, service
 
+    def get_fault(self, xml):
+        '''
+        Parses the response and returns the fault data if the response is a SOAP fault.
+        :param xml: str - response XML
+        :return: dict{code, message, detail}|None - fault data; None if the response is not a fault
+        '''
         # Get the object model from XML
-        root = ElementTree.fromstring(self.xml)
+        root = ElementTree.fromstring(xml)
 
         # Get the namespace of the element and save it to ns variable as SOAP-ENV
         rm = re.match('\{(.*)\}', root.tag)
@@ -195,20 +814,108 @@ class SoapTestClient:
 
         ns = {'SOAP-ENV': namespace}
 
-        # Try to find Fault element - if exists, we got an error
         fault = root.find(self.fault_xpath, ns)
-        if fault is not None:
-            # Return XML string and fault data
-            self.fault = {'code': fault.find(self.fault_code_xpath).text,
-                          'message': fault.find(self.fault_string_xpath).text,
-                          'detail': fault.find(self.fault_detail_xpath).text}
-            self.fault_message = self.fault['message']
-            self.fault_code = self.fault['code']
-            # Return False because we got a fault
-            return False
+        if fault is None:
+            return None
+        return {'code': fault.find(self.fault_code_xpath).text,
+                'message': fault.find(self.fault_string_xpath).text,
+                'detail': fault.find(self.fault_detail_xpath).text}
 
-        # Return True because the request succeeded
-        return True
+    def get_query_body(self, body, params):
+        '''
+        Returns the request body with parameters replaced and, if set_default_params is True, a new UUID as the
+        request ID.
+        :param body: str - request body template
+        :param params: dict|None - parameters to be replaced in the body
+        :return: str - request body
+        '''
+        if not self.set_default_params:
+            return body
+        params = dict(params) if params is not None else {}
+        if 'uuid' not in params:
+            params['uuid'] = str(uuid.uuid4())
+        return get_template(body).render(params)
+
+    def load_test(self, url=None, body=None, params=None, timeout=None, concurrency=10, duration=None,
+                  requests_count=None):
+        '''
+        Sends queries from concurrent threads to measure how the service behaves under load. Every thread keeps one
+        keep-alive connection open and sends the next query as soon as it gets the previous response. Every query gets
+        a new UUID. The test runs until duration seconds have passed or requests_count queries have been sent
+        (whichever comes first); if neither is set, every thread sends one query.
+        :param url: str|None - URL of the service
+        :param body: str|None - request body template (XML)
+        :param params: dict|None - parameters to be replaced in the body
+        :param timeout: int|None - single query timeout in seconds
+        :param concurrency: int - number of threads (and connections)
+        :param duration: float|None - test duration in seconds
+        :param requests_count: int|None - number of queries to send
+        :return: LoadTestResult - test results
+        '''
+        if url is None:
+            url = self.url
+        if timeout is None:
+            timeout = self.query_timeout
+        if body is None:
+            body = self.body
+        if params is None:
+            params = self.params
+        if duration is None and requests_count is None:
+            requests_count = concurrency
+
+        result = LoadTestResult()
+        counter = {'sent': 0}
+        counter_lock = threading.Lock()
+
+        def next_request():
+            # Reserve the next request; returns False if the test is over
+            if duration is not None and time.time() >= result.start_time + duration:
+                return False
+            with counter_lock:
+                if requests_count is not None and counter['sent'] >= requests_count:
+                    return False
+                counter['sent'] += 1
+                return True
+
+        def worker():
+            # One session with a single connection per thread keeps one keep-alive connection per thread
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            try:
+                while next_request():
+                    query_body = self.get_query_body(body, params)
+                    start_time = time.time()
+                    try:
+                        r = session.post(url=url, data=query_body, headers=self.headers, timeout=timeout,
+                                         cert=self.client_certificate, verify=self.server_certificate, stream=True)
+                        fault = self.read_response(r)[0]
+                    except requests.RequestException as e:
+                        result.add(time.time() - start_time, error=e.__class__.__name__)
+                        continue
+                    except ElementTree.ParseError:
+                        result.add(time.time() - start_time, error='InvalidResponse')
+                        continue
+                    latency = time.time() - start_time
+                    result.add(latency, fault_code=(fault['code'] or 'Unknown') if fault is not None else None)
+            finally:
+                session.close()
+
+        self.log('Starting load test: {0} threads, duration={1}, requests={2}'.format(concurrency, duration,
+                                                                                      requests_count))
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        result.start_time = time.time()
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.end_time = time.time()
+
+        for line in result.report():
+            self.log(line)
+        return result
 
     def check_query_success(self, url=None, body=None, params=None, query_timeout=None, faults=None):
         '''
@@ -405,6 +1112,10 @@ class SoapTestClient:
         :return: dict{instance, class, code, subsystem, service, service_version} - service data dictionary
         '''
 
+        # Service data is saved when the response is parsed
+        if self.service is not None:
+            return self.service
+
         # If no XML is set, return None
         if self.xml is None:
             return None
@@ -419,6 +1130,21 @@ class SoapTestClient:
         namespace = rm.group(1) if rm else ''
         ns = {'SOAP-ENV': namespace, 'xroad': self.xroad_namespace, 'id': self.xroad_identifiers_namespace}
 
+        # Try to find service element - if exists, we got a result
+        xroad = root.find(self.xroad_service_xpath, ns)
+
+        if xroad is not None:
+            self.service = self.parse_service(xroad, ns)
+        return self.service
+
+    def parse_service(self, xroad, ns):
+        '''
+        Returns service parameters from the service element.
+        :param xroad: Element - service element
+        :param ns: dict - namespaces, including "id" for XRoad identifiers
+        :return: dict{instance, class, code, subsystem, service, service_version} - service data dictionary
+        '''
+
         '''
           Example service tag:
           <xrd:service id:objectType="SERVICE">
@@ -431,20 +1157,15 @@ class SoapTestClient:
           </xrd:service>
         '''
 
-        # Try to find service element - if exists, we got a result
-        xroad = root.find(self.xroad_service_xpath, ns)
-
-        if xroad is not None:
-            # Return XML string and fault data. Elements are found using set XPaths.
-            service_name = xroad.find(self.xroad_service_code_xpath, ns).text
-            service_version = xroad.find(self.xroad_service_version_xpath, ns).text
-            return {'instance': xroad.find(self.xroad_service_instance_xpath, ns).text,
-                    'class': xroad.find(self.xroad_service_member_class_xpath, ns).text,
-                    'code': xroad.find(self.xroad_service_member_code_xpath, ns).text,
-                    'subsystem': xroad.find(self.xroad_service_member_subsystem_xpath, ns).text,
-                    'service': '{0}.{1}'.format(service_name, service_version), 'service_name': service_name,
-                    'service_version': service_version}
-        return None
+        # Elements are found using set XPaths.
+        service_name = xroad.find(self.xroad_service_code_xpath, ns).text
+        service_version = xroad.find(self.xroad_service_version_xpath, ns).text
+        return {'instance': xroad.find(self.xroad_service_instance_xpath, ns).text,
+                'class': xroad.find(self.xroad_service_member_class_xpath, ns).text,
+                'code': xroad.find(self.xroad_service_member_code_xpath, ns).text,
+                'subsystem': xroad.find(self.xroad_service_member_subsystem_xpath, ns).text,
+                'service': '{0}.{1}'.format(service_name, service_version), 'service_name': service_name,
+                'service_version': service_version}
 
     def verify_service(self, service=None):
         '''
@@ -1,5 +1,141 @@
+import atexit
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+
 import paramiko  # https://github.com/paramiko/paramiko
 
+import timing
+
+
+class SSHConnectionPool:
+    '''
+    Process-wide pool of authenticated SSH connections, keyed by (host, username, credentials). SSHClient instances
+    connecting with the same credentials share one paramiko.SSHClient, so every command only opens a new channel on the
+    existing transport instead of doing a full TCP and SSH handshake and authentication.
+
+    Connections are health-checked when they are handed out (dead ones are replaced) and connections that nobody has
+    used for idle_timeout seconds are closed.
+    '''
+
+    idle_timeout = 300  # Close unused connections after this many seconds
+
+    def __init__(self, idle_timeout=None):
+        '''
+        Initializes an empty pool.
+        :param idle_timeout: int|None - seconds after which unused connections are closed
+        '''
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        self.lock = threading.RLock()
+        self.connections = {}
+        self.pid = os.getpid()
+
+    def check_process(self):
+        '''
+        Forgets connections inherited from a parent process; a transport cannot be shared between processes.
+        :return: None
+        '''
+        if self.pid != os.getpid():
+            self.connections = {}
+            self.pid = os.getpid()
+
+    @staticmethod
+    def is_alive(client):
+        '''
+        Checks if the connection is still usable.
+        :param client: paramiko.SSHClient
+        :return: bool - True if the transport is active and accepts data; False otherwise
+        '''
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    def acquire(self, key, connect):
+        '''
+        Returns a pooled connection for the key, connecting with the connect function if there is no usable one.
+        :param key: tuple - (host, username, password, key_file, key_password)
+        :param connect: function - returns a new connected paramiko.SSHClient
+        :return: paramiko.SSHClient
+        '''
+        with self.lock:
+            self.check_process()
+            self.evict_idle()
+            entry = self.connections.get(key)
+            if entry is not None and not self.is_alive(entry['client']):
+                # Connection has died, replace it
+                self.remove(key)
+                entry = None
+            if entry is None:
+                entry = {'client': connect(), 'users': 0, 'last_used': time.time()}
+                self.connections[key] = entry
+            entry['users'] += 1
+            entry['last_used'] = time.time()
+            return entry['client']
+
+    def release(self, client):
+        '''
+        Returns a connection to the pool. It stays open until it has been idle for idle_timeout seconds.
+        :param client: paramiko.SSHClient
+        :return: bool - True if the connection belonged to the pool; False otherwise
+        '''
+        with self.lock:
+            self.check_process()
+            for entry in self.connections.values():
+                if entry['client'] is client:
+                    entry['users'] = max(entry['users'] - 1, 0)
+                    entry['last_used'] = time.time()
+                    self.evict_idle()
+                    return True
+        return False
+
+    def remove(self, key):
+        '''
+        Closes a connection and removes it from the pool.
+        :param key: tuple - connection key
+        :return: None
+        '''
+        entry = self.connections.pop(key, None)
+        if entry is not None:
+            try:
+                entry['client'].close()
+            except Exception:
+                pass
+
+    def evict_idle(self):
+        '''
+        Closes connections that are not in use and have been idle for longer than idle_timeout.
+        :return: None
+        '''
+        now = time.time()
+        for key, entry in list(self.connections.items()):
+            if entry['users'] == 0 and now - entry['last_used'] > self.idle_timeout:
+                self.remove(key)
+
+    def close_all(self):
+        '''
+        Closes all pooled connections.
+        :return: None
+        '''
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            for key in list(self.connections.keys()):
+                self.remove(key)
+
+
+# Connection pool shared by all SSHClient instances of this process
+pool = SSHConnectionPool()
+atexit.register(pool.close_all)
+
 
 class SSHClient:
     '''
@@ -11,12 +147,15 @@ class SSHClient:
     stderr = None
     debug = False
     client = None
+    host = None
     server_password = None
     sudo_password = None
     connect_key = None
     key_password = None
+    use_pool = True  # Share connections with the same credentials (see SSHConnectionPool)
+    pooled = False  # True if the current connection is from the pool
 
-    def __init__(self, host, username, password=None, key_file=None, key_password=None):
+    def __init__(self, host, username, password=None, key_file=None, key_password=None, use_pool=None):
         '''
         Connects to host.
         If sudo is needed in connection, user to connect as should also be in sudoers file.
@@ -30,7 +169,14 @@ class SSHClient:
         :param password: None|string - user password; required for user-pass authentication or when using sudo with password
         :param key_file: None|string - private key file for SSH connections
         :param key_password: None|string - if private key file is password-protected, key file password
+        :param use_pool: None|bool - True to use a pooled connection, False to open a private one; None for default
         '''
+        if use_pool is not None:
+            self.use_pool = use_pool
+
+        # Channels opened by this instance, closed when the instance is closed
+        self.channels = []
+
         if password is not None and key_file is None:
             # If password starts with "key:", treat it like key_file was set. If key_file was set, do not override it.
             if password.startswith('key:'):
@@ -116,26 +262,70 @@ class SSHClient:
             return self.stdout.readline().strip('\n')
         return None
 
-    def exec_command(self, command, sudo=False, timeout=None):
-        """
-        Executes the command.
-        To enable sudo, param must be true, default False
-        Returns console output as string array(each line one element) removes '\n' from lines.
-        :param command: string - command to send
+    def get_command(self, command, sudo=False):
+        '''
+        Returns the command to be sent to the server, prefixed with sudo if needed.
+        :param command: str - command to send
         :param sudo: bool - True to send sudo before command
-        :return: string array
-        """
+        :return: str - command
+        '''
         if sudo:
             # command = 'echo "' + self.server_password + '" | sudo -S ' + command
             if self.sudo_password is None or self.sudo_password == '':
                 command = 'sudo {0}'.format(command)
             else:
                 command = 'echo "{0}" | sudo -S {1}'.format(self.sudo_password, command)
+        return command
+
+    def open_channel(self, command, sudo=False, pty=True):
+        '''
+        Executes a long-running command (for example "tail -F") on a new channel of the existing connection and returns
+        the channel without waiting for the command to finish. Output can be read with channel.recv().
+        :param command: str - command to send
+        :param sudo: bool - True to send sudo before command
+        :param pty: bool - request a pseudo-terminal so that the remote command is terminated when the channel closes;
+                           stdout and stderr are combined in that case
+        :return: paramiko.Channel - channel the command is running on
+        '''
+        command = self.get_command(command, sudo=sudo)
+        if self.debug:
+            print('Open channel: {0}'.format(command))
+
+        channel = self.client.get_transport().open_session()
+        self.add_channel(channel)
+        if pty:
+            channel.get_pty()
+        channel.exec_command(command)
+        return channel
+
+    def add_channel(self, channel):
+        '''
+        Remembers a channel opened by this instance so that it can be closed together with the instance, even if the
+        connection itself stays open in the pool.
+        :param channel: paramiko.Channel
+        :return: None
+        '''
+        self.channels = [ch for ch in self.channels if not ch.closed]
+        self.channels.append(channel)
+
+    @timing.timed('ssh', detail='command')
+    def exec_command(self, command, sudo=False, timeout=None, raw=False):
+        """
+        Executes the command.
+        To enable sudo, param must be true, default False
+        Returns console output as string array(each line one element) removes '\n' from lines.
+        :param command: string - command to send
+        :param sudo: bool - True to send sudo before command
+        :param raw: bool - True to return stdout unprocessed as a single string (byte counts are preserved)
+        :return: string array; or (str, string array) if raw is True
+        """
+        command = self.get_command(command, sudo=sudo)
         if self.debug:
             print('Execute: {0}'.format(command))
 
         # Execute command, read output (stdout, stderr)
         stdin, stdout, stderr = self.client.exec_command(command)
+        self.add_channel(stdout.channel)
 
         self.stdin = stdin
         self.stdout = stdout
@@ -143,6 +333,15 @@ class SSHClient:
 
         out_clean = []
         out_error = []
+        if raw:
+            # Read the whole stdout as it is, without splitting or stripping anything
+            out_raw = stdout.read()
+            for ln in stderr:
+                out_error.append(ln)
+
+            # Get the exit status after the output has been read so that large outputs do not block the channel
+            self.status = stdout.channel.recv_exit_status()
+            return out_raw, out_error
         if timeout is None:
             # Get the exit status and save it internally
             self.status = stdout.channel.recv_exit_status()
@@ -166,6 +365,67 @@ class SSHClient:
         # Return output and error buffer
         return out_clean, out_error
 
+    @timing.timed('ssh')
+    def exec_batch(self, commands, sudo=False):
+        """
+        Executes a list of commands in one round trip. Commands are sent as a script to a single "sh -s" channel and
+        output of each command is followed by a unique marker line with the command index and exit status, so that
+        stdout, stderr and exit status can be separated again. Commands are independent: a failing command does not
+        stop the following ones.
+        :param commands: [str] - commands to send
+        :param sudo: bool|[bool] - True to send sudo before every command; or a list with a value for each command
+        :return: [([str], [str], int)] - (stdout lines, stderr lines, exit status) for each command; stdout lines are
+                                         cleaned like in exec_command
+        """
+        if not isinstance(sudo, list):
+            sudo = [sudo] * len(commands)
+
+        # Marker that cannot appear in the output by accident
+        marker = 'XRDBATCH{0}'.format(uuid.uuid4().hex)
+
+        script = []
+        for index, command in enumerate(commands):
+            # Commands must not read the script itself from stdin
+            script.append('{{ {0}\n}} </dev/null\n'.format(self.get_command(command, sudo=sudo[index])))
+            script.append('status=$?; printf \'\\n{0} {1} %d\\n\' $status; printf \'\\n{0} {1}\\n\' >&2\n'.format(
+                marker, index))
+
+        if self.debug:
+            print('Execute batch: {0}'.format(commands))
+
+        stdin, stdout, stderr = self.client.exec_command('sh -s')
+        self.add_channel(stdout.channel)
+        stdin.write(''.join(script))
+        stdin.flush()
+        stdin.channel.shutdown_write()
+
+        out_raw = stdout.read()
+        err_raw = stderr.read()
+        self.status = stdout.channel.recv_exit_status()
+
+        # Split the output by markers; re.split returns [output, index, status, output, index, status, ..., rest]
+        out_parts = re.split('\n{0} (\\d+) (-?\\d+)\n'.format(marker), out_raw)
+        err_parts = re.split('\n{0} \\d+\n'.format(marker), err_raw)
+
+        results = []
+        for index in range(len(commands)):
+            if 3 * index + 2 >= len(out_parts):
+                # Script was interrupted, no output for the rest of the commands
+                results.append(([], [], -1))
+                continue
+            out_clean = [line for line in out_parts[3 * index].split('\n') if line]
+            out_error = []
+            if index < len(err_parts) and err_parts[index]:
+                out_error = [line + '\n' for line in err_parts[index].split('\n')]
+                out_error[-1] = out_error[-1][:-1]
+                if not out_error[-1]:
+                    out_error.pop()
+            results.append((out_clean, out_error, int(out_parts[3 * index + 2])))
+
+        if results:
+            self.status = results[-1][2]
+        return results
+
     def open(self, host, username, password=None, key_file=None, key_password=None):
         '''
         Connects to host.
@@ -185,22 +445,190 @@ class SSHClient:
                 self.server_password = None
             # Always set password for sudo
             self.sudo_password = password
-            # add allowed key (currently disabled because we add all keys automatically)
-            # key = paramiko.RSAKey(data=base64.b64decode(b'AAA...'))
-            self.client = paramiko.SSHClient()
-            # Set host key policy (add unknown keys automatically for testing)
-            self.client.set_missing_host_key_policy(paramiko.client.AutoAddPolicy())
-            # Connect to server
-            self.client.connect(host, username=username, password=self.server_password, pkey=self.connect_key)
+            self.host = host
+
+            def connect():
+                # add allowed key (currently disabled because we add all keys automatically)
+                # key = paramiko.RSAKey(data=base64.b64decode(b'AAA...'))
+                client = paramiko.SSHClient()
+                # Set host key policy (add unknown keys automatically for testing)
+                client.set_missing_host_key_policy(paramiko.client.AutoAddPolicy())
+                # Connect to server
+                client.connect(host, username=username, password=self.server_password, pkey=self.connect_key)
+                return client
+
+            if self.use_pool:
+                # Get an authenticated connection from the pool
+                self.client = pool.acquire((host, username, password, key_file, key_password), connect)
+                self.pooled = True
+            else:
+                self.client = connect()
+                self.pooled = False
             # Set default exit status
             self.status = -1
 
     def close(self):
         '''
-        Close the connection.
+        Close the connection. Pooled connections are only returned to the pool; channels opened by this instance are
+        closed in both cases.
         :return: None
         '''
         if self.client is not None:
-            self.client.close()
+            for channel in self.channels:
+                try:
+                    channel.close()
+                except Exception:
+                    pass
+            self.channels = []
+            if self.pooled:
+                pool.release(self.client)
+            else:
+                self.client.close()
             self.client = None
             self.status = -1
+
+
+class ShellTimeout(Exception):
+    '''
+    Raised when a command sent to an InteractiveShell does not get to the prompt in time or the channel is closed.
+    '''
+
+    def __init__(self, message, output):
+        '''
+        :param message: str - error message
+        :param output: str - output read before the timeout
+        '''
+        Exception.__init__(self, message)
+        self.output = output
+
+
+class InteractiveShell:
+    '''
+    Expect-style driver for an interactive shell (for example "sudo su - xroad" followed by commands that ask for a PIN).
+    Every command is sent as a line and the output is read in chunks until one of the expected regular expressions
+    matches at the end of the output, so the call returns as soon as the prompt is back and output of any length is
+    read completely.
+    '''
+    # Shell prompts ("$ ", "# ", "> ") and questions like "Password: " or "PIN: "
+    prompt = r'(?:[$#>]|[Pp]assword[^\n]*:|PIN[^\n]*:)[ \t]*\Z'
+    timeout = 30  # Default timeout for a single command, in seconds
+    chunk_size = 65536
+    overlap = 1024  # Bytes of previous output that are searched again when new output arrives
+    debug = False
+
+    def __init__(self, client, prompt=None, timeout=None, width=1000):
+        '''
+        Opens a shell on a new channel and waits for the first prompt.
+        :param client: SSHClient|paramiko.SSHClient - connected client
+        :param prompt: None|str|[str] - regular expression(s) that mark the end of command output; None for default
+        :param timeout: None|float - default timeout for commands, in seconds
+        :param width: int - terminal width; wide enough to keep long lines from wrapping
+        '''
+        if prompt is not None:
+            self.prompt = prompt
+        if timeout is not None:
+            self.timeout = timeout
+
+        if isinstance(client, SSHClient):
+            self.channel = client.client.invoke_shell(width=width)
+            client.add_channel(self.channel)
+        else:
+            self.channel = client.invoke_shell(width=width)
+
+        # Output that has been read but not consumed yet
+        self.buffer = ''
+        self.banner = self.expect(self.prompt)[1]
+
+    @staticmethod
+    def compile(patterns):
+        '''
+        Compiles the pattern or list of patterns.
+        :param patterns: str|[str]|regex
+        :return: [regex]
+        '''
+        if not isinstance(patterns, list):
+            patterns = [patterns]
+        return [re.compile(pattern) if isinstance(pattern, basestring) else pattern for pattern in patterns]
+
+    def expect(self, patterns, timeout=None):
+        '''
+        Reads output until one of the patterns matches. Match is accepted only when there is no more output waiting,
+        so that a line that only looks like a prompt in the middle of the output does not end the command.
+        :param patterns: str|[str] - regular expression(s) to wait for
+        :param timeout: None|float - timeout in seconds; None for default
+        :return: (int, str) - (index of the matching pattern or -1 on timeout or closed channel, output read)
+        '''
+        if timeout is None:
+            timeout = self.timeout
+        regexes = self.compile(patterns)
+        end_time = time.time() + timeout
+
+        chunks = [self.buffer]
+        output = self.buffer
+        searched = 0
+        self.buffer = ''
+        while True:
+            if output:
+                start = max(0, searched - self.overlap)
+                for index, regex in enumerate(regexes):
+                    if regex.search(output, start) and not self.channel.recv_ready():
+                        return index, output
+                searched = len(output)
+
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return -1, output
+            self.channel.settimeout(remaining)
+            try:
+                data = self.channel.recv(self.chunk_size)
+            except socket.timeout:
+                return -1, output
+            if not data:
+                # Channel closed
+                return -1, output
+            if self.debug:
+                print(data)
+            chunks.append(data)
+            output = ''.join(chunks)
+
+    def send(self, data):
+        '''
+        Sends data to the shell as it is.
+        :param data: str - data to send
+        :return: None
+        '''
+        self.channel.sendall(data)
+
+    def sendline(self, line, expect=None, timeout=None):
+        '''
+        Sends a line and waits for the prompt. Raises ShellTimeout if the prompt does not come in time (for example a
+        command hangs at an unexpected password question) or the channel is closed.
+        :param line: str - line to send
+        :param expect: None|str|[str] - regular expression(s) to wait for instead of the prompt
+        :param timeout: None|float - timeout in seconds; None for default
+        :return: str - output of the command, including the echoed command line and the prompt
+        '''
+        self.send(line + '\n')
+        index, output = self.expect(self.prompt if expect is None else expect, timeout=timeout)
+        if index == -1:
+            raise ShellTimeout('No prompt in {0} seconds or the channel was closed'.format(
+                self.timeout if timeout is None else timeout), output)
+        return output
+
+    def run(self, commands, timeout=None):
+        '''
+        Sends lines one by one, waiting for the prompt after every one of them.
+        :param commands: [str] - lines to send
+        :param timeout: None|float|[float] - timeout for every command or a list with timeout for each command
+        :return: [str] - output of each command
+        '''
+        if not isinstance(timeout, list):
+            timeout = [timeout] * len(commands)
+        return [self.sendline(command, timeout=timeout[index]) for index, command in enumerate(commands)]
+
+    def close(self):
+        '''
+        Closes the shell channel.
+        :return: None
+        '''
+        self.channel.close()
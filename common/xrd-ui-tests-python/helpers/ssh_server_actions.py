@@ -5,33 +5,47 @@ import time
 
 import datetime
 
+import hashlib
+
 import ssh_client
 from view_models import keys_and_certificates_table
 
-def exec_commands(self, sshclient, commands, timeout=1):
-    channel = sshclient.invoke_shell()
-    time.sleep(1)
-    channel.recv(9999)
+# Directory where the configuration client saves the downloaded global configuration
+GLOBAL_CONF_DIR = '/etc/xroad/globalconf'
+
+def exec_commands(self, sshclient, commands, timeout=None):
+    """
+    Sends commands to an interactive shell one by one. Every command is sent as soon as the previous one has returned
+    to a prompt (shell prompt or a password/PIN question). Raises ssh_client.ShellTimeout if a command does not
+    return to a prompt in time.
+    :param self: MainController object
+    :param sshclient: SSHClient|paramiko.SSHClient - connected client
+    :param commands: [str] - lines to send
+    :param timeout: None|float|[float] - maximum time to wait for each command, in seconds; None for default
+    :return: str - output of the last command
+    """
+    if not isinstance(timeout, list):
+        timeout = [timeout] * len(commands)
+    shell = ssh_client.InteractiveShell(sshclient)
     output = None
-    for command in commands:
-        self.log('Sending "{}" to stdin'.format(command))
-        channel.send(command + "\n")
-        while not channel.recv_ready():  # Wait for the server to read and respond
-            time.sleep(0.1)
-        time.sleep(timeout)
-        output = channel.recv(9999) # read in
-        time.sleep(0.1)
-    channel.close()
+    try:
+        for index, command in enumerate(commands):
+            self.log('Sending "{}" to stdin'.format(command))
+            output = shell.sendline(command, timeout=timeout[index])
+    finally:
+        shell.close()
     return output
 
+
 def exec_as_xroad(sshclient, command):
     stdout, stderr = sshclient.exec_command('sudo -Hu {0} {1}'.format('xroad', command), sudo=True)
     return stdout, stderr
 
 def refresh_ocsp(sshclient):
-    sshclient.exec_command(command='rm /var/cache/xroad/*ocsp', sudo=True)
-    sshclient.exec_command(command='service xroad-signer restart', sudo=True)
-    sshclient.exec_command(command='service xroad-proxy restart', sudo=True)
+    # Remove cached OCSP responses and restart the services in one round trip
+    sshclient.exec_batch(commands=['rm /var/cache/xroad/*ocsp',
+                                   'service xroad-signer restart',
+                                   'service xroad-proxy restart'], sudo=True)
 
 
 def get_server_time(ssh_host, ssh_username, ssh_password):
@@ -120,6 +134,22 @@ def get_key_conf_csr_count(sshclient):
     return sshclient.exec_command(
         command='grep "<certRequest.*>" {0} | wc -l'.format(keys_and_certificates_table.KEY_CONFIG_FILE), sudo=True)[0][
         0]
+
+
+def get_key_conf_counts(sshclient, key_type):
+    """
+    Gets count of keys of specified type, device objects and csr objects in system configuration with one request.
+    :param sshclient: obj - sshclient instance
+    :param key_type: str - key type
+    :return: (str, str, str) - keys count, token count, csr count
+    """
+    results = sshclient.exec_batch(commands=[
+        'grep "key usage=\\\"{0}\\\"" {1} | wc -l'.format(key_type, keys_and_certificates_table.KEY_CONFIG_FILE),
+        'grep "<device>" {0} | wc -l'.format(keys_and_certificates_table.KEY_CONFIG_FILE),
+        'grep "<certRequest.*>" {0} | wc -l'.format(keys_and_certificates_table.KEY_CONFIG_FILE)], sudo=True)
+    return tuple(out[0] for out, err, status in results)
+
+
 def get_server_name(self):
     return self.by_id('server-info').get_attribute('data-instance')
 
@@ -136,3 +166,122 @@ def cp(ssh_client_instance, src, destination, sudo=False):
 def mv(ssh_client_instance, src, destination, sudo=False):
     mv_command = 'mv {0} {1}'.format(src, destination)
     return ssh_client_instance.exec_command(mv_command, sudo)
+
+
+def get_global_conf_hash(sshclient, file_pattern='*.xml', conf_dir=GLOBAL_CONF_DIR):
+    """
+    Gets a hash of the global configuration that the server has downloaded. The hash only changes when the contents
+    of the configuration files change, so it can be used as a configuration version.
+    :param sshclient: obj - sshclient instance
+    :param file_pattern: str - files to include; "*.xml" for configuration data, "*.metadata" to detect every download
+    :param conf_dir: str - global configuration directory
+    :return: str|None - hash of the configuration files; None if no files were found
+    """
+    output, error = sshclient.exec_command(
+        command='find {0} -type f -name \'{1}\' -exec md5sum {{}} +'.format(conf_dir, file_pattern), sudo=True)
+    if not output:
+        return None
+    return hashlib.md5('\n'.join(sorted(output)).encode('utf-8')).hexdigest()
+
+
+def global_conf_contains(sshclient, text, conf_dir=GLOBAL_CONF_DIR):
+    """
+    Checks if the global configuration that the server has downloaded contains a string.
+    :param sshclient: obj - sshclient instance
+    :param text: str - string to look for (for example "<memberCode>00000010</memberCode>")
+    :param conf_dir: str - global configuration directory
+    :return: bool - True if at least one configuration file contains the string; False otherwise
+    """
+    # Quote the string for shell
+    text = "'{0}'".format(text.replace("'", "'\\''"))
+    sshclient.exec_command(command='grep -rqF --include=\'*.xml\' {0} {1}'.format(text, conf_dir), sudo=True)
+    return sshclient.exit_status() == 0
+
+
+def wait_for_global_conf(sshclient, previous_hash=None, contains=None, not_contains=None, timeout=120, interval=5,
+                         file_pattern='*.xml', conf_dir=GLOBAL_CONF_DIR, log=None):
+    """
+    Waits until a global configuration change made in the central server has reached the server, instead of sleeping
+    a fixed time. Polls the downloaded global configuration over SSH and returns as soon as all set conditions are met:
+    - contains: configuration contains the string;
+    - not_contains: configuration does not contain the string;
+    - previous_hash: configuration hash differs from previous_hash.
+    If no condition is set, the current hash is read first and used as previous_hash; take the hash before making the
+    change in the central server instead if possible.
+    :param sshclient: obj - sshclient instance
+    :param previous_hash: str|None - configuration hash (get_global_conf_hash) from before the change
+    :param contains: str|None - wait until the configuration contains this string
+    :param not_contains: str|None - wait until the configuration does not contain this string
+    :param timeout: int - maximum time in seconds to wait
+    :param interval: int - polling interval in seconds
+    :param file_pattern: str - files to include in the hash
+    :param conf_dir: str - global configuration directory
+    :param log: function|None - logging function
+    :return: bool - True if the change was detected; False if timeout occurred
+    """
+    if contains is None and not_contains is None and previous_hash is None:
+        previous_hash = get_global_conf_hash(sshclient, file_pattern=file_pattern, conf_dir=conf_dir)
+
+    if log is not None:
+        log('Waiting up to {0} seconds for global configuration change'.format(timeout))
+
+    start_time = time.time()
+    while True:
+        result = True
+        if previous_hash is not None:
+            result = get_global_conf_hash(sshclient, file_pattern=file_pattern, conf_dir=conf_dir) != previous_hash
+        if result and contains is not None:
+            result = global_conf_contains(sshclient, contains, conf_dir=conf_dir)
+        if result and not_contains is not None:
+            result = not global_conf_contains(sshclient, not_contains, conf_dir=conf_dir)
+
+        if result:
+            if log is not None:
+                log('Global configuration changed after {0:.1f} seconds'.format(time.time() - start_time))
+            return True
+
+        if time.time() + interval > start_time + timeout:
+            if log is not None:
+                log('Global configuration did not change in {0} seconds'.format(timeout))
+            return False
+        time.sleep(interval)
+
+
+def wait_for_global_conf_update(ssh_host, ssh_username, ssh_password, previous_hash=None, contains=None,
+                                not_contains=None, timeout=120, file_pattern='*.xml', log=None):
+    """
+    Opens a connection to the server and waits for a global configuration change (see wait_for_global_conf).
+    :param ssh_host: string (only hostname)
+    :param ssh_username: string
+    :param ssh_password: string
+    :param previous_hash: str|None - configuration hash from before the change
+    :param contains: str|None - wait until the configuration contains this string
+    :param not_contains: str|None - wait until the configuration does not contain this string
+    :param timeout: int - maximum time in seconds to wait
+    :param file_pattern: str - files to include in the hash
+    :param log: function|None - logging function
+    :return: bool - True if the change was detected; False if timeout occurred
+    """
+    client = ssh_client.SSHClient(ssh_host, username=ssh_username, password=ssh_password)
+    try:
+        return wait_for_global_conf(client, previous_hash=previous_hash, contains=contains, not_contains=not_contains,
+                                    timeout=timeout, file_pattern=file_pattern, log=log)
+    finally:
+        client.close()
+
+
+def get_global_conf_version(ssh_host, ssh_username, ssh_password, file_pattern='*.xml'):
+    """
+    Opens a connection to the server and returns the global configuration hash (see get_global_conf_hash). Take it
+    before making a change in the central server and pass it to wait_for_global_conf_update as previous_hash.
+    :param ssh_host: string (only hostname)
+    :param ssh_username: string
+    :param ssh_password: string
+    :param file_pattern: str - files to include in the hash
+    :return: str|None - configuration hash
+    """
+    client = ssh_client.SSHClient(ssh_host, username=ssh_username, password=ssh_password)
+    try:
+        return get_global_conf_hash(client, file_pattern=file_pattern)
+    finally:
+        client.close()
@@ -0,0 +1,273 @@
+import glob
+import importlib
+import inspect
+import os
+import sqlite3
+import sys
+import time
+import unittest
+
+import timing
+
+# Time categories of the breakdown; the rest of the wall-clock time is "other"
+CATEGORIES = ['ui', 'ssh', 'soap', 'audit', 'sleep']
+
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL, label TEXT);
+CREATE TABLE IF NOT EXISTS results (run_id INTEGER, test TEXT, status TEXT, duration REAL, ui REAL, ssh REAL,
+    soap REAL, audit REAL, sleep REAL, other REAL, baseline REAL, regression INTEGER);
+CREATE INDEX IF NOT EXISTS ix_results_test ON results (test, run_id);
+'''
+
+
+def find_test_classes(tests_dir, package='tests', pattern='Xroad*.py'):
+    '''
+    Finds the use case test classes (unittest.TestCase classes in tests/*/Xroad*.py).
+    :param tests_dir: str - tests directory
+    :param package: str - package name of the tests directory
+    :param pattern: str - file name pattern
+    :return: [str] - test classes as "module.ClassName"
+    '''
+    classes = []
+    for path in sorted(glob.glob(os.path.join(tests_dir, '*', pattern))):
+        module_name = '{0}.{1}.{2}'.format(package, os.path.basename(os.path.dirname(path)),
+                                           os.path.splitext(os.path.basename(path))[0])
+        module = importlib.import_module(module_name)
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, unittest.TestCase) and cls.__module__ == module_name:
+                classes.append('{0}.{1}'.format(module_name, name))
+    return classes
+
+
+def median(values):
+    '''
+    Returns the median of the values.
+    :param values: [float]
+    :return: float|None
+    '''
+    if not values:
+        return None
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+class TimingHistory:
+    '''
+    SQLite database of benchmark runs and the timing of every test in them.
+    '''
+
+    def __init__(self, path):
+        '''
+        :param path: str - database file; created if it does not exist
+        '''
+        self.db = sqlite3.connect(path)
+        self.db.executescript(HISTORY_SCHEMA)
+
+    def add_run(self, label=None):
+        '''
+        Adds a new run.
+        :param label: str|None - label of the run, eg X-Road version
+        :return: int - run ID
+        '''
+        run_id = self.db.execute('INSERT INTO runs (started, label) VALUES (?, ?)', (time.time(), label)).lastrowid
+        self.db.commit()
+        return run_id
+
+    def add_result(self, run_id, result):
+        '''
+        Saves the result of a test.
+        :param run_id: int - run ID
+        :param result: dict - test, status, duration, baseline, regression and times of CATEGORIES and "other"
+        :return: None
+        '''
+        self.db.execute('INSERT INTO results (run_id, test, status, duration, ui, ssh, soap, audit, sleep, other, '
+                        'baseline, regression) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        [run_id, result['test'], result['status'], result['duration']] +
+                        [result[category] for category in CATEGORIES + ['other']] +
+                        [result['baseline'], int(result['regression'])])
+        self.db.commit()
+
+    def get_durations(self, test, limit, before_run):
+        '''
+        Returns the durations of the latest successful runs of a test.
+        :param test: str - test ID
+        :param limit: int - maximum number of runs
+        :param before_run: int - only runs before this run ID
+        :return: [float] - durations in seconds, latest first
+        '''
+        return [row[0] for row in self.db.execute(
+            'SELECT duration FROM results WHERE test = ? AND status = ? AND run_id < ? ORDER BY run_id DESC LIMIT ?',
+            (test, 'passed', before_run, limit))]
+
+    def close(self):
+        self.db.close()
+
+
+class BenchmarkResult(unittest.TextTestResult):
+    '''
+    Test result that saves the wall-clock time and status of every test.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        unittest.TextTestResult.__init__(self, *args, **kwargs)
+        self.start_times = {}
+        self.timings = []  # [(test ID, status, seconds)]
+        self.statuses = {}
+
+    def startTest(self, test):
+        self.start_times[test.id()] = time.time()
+        unittest.TextTestResult.startTest(self, test)
+
+    def addSuccess(self, test):
+        self.statuses[test.id()] = 'passed'
+        unittest.TextTestResult.addSuccess(self, test)
+
+    def addFailure(self, test, err):
+        self.statuses[test.id()] = 'failed'
+        unittest.TextTestResult.addFailure(self, test, err)
+
+    def addError(self, test, err):
+        self.statuses[test.id()] = 'error'
+        unittest.TextTestResult.addError(self, test, err)
+
+    def addSkip(self, test, reason):
+        self.statuses[test.id()] = 'skipped'
+        unittest.TextTestResult.addSkip(self, test, reason)
+
+    def stopTest(self, test):
+        unittest.TextTestResult.stopTest(self, test)
+        test_id = test.id()
+        self.timings.append((test_id, self.statuses.get(test_id, 'error'), time.time() - self.start_times[test_id]))
+
+
+class SuiteBenchmark:
+    '''
+    Runs use case test classes one by one and records the wall-clock time of every test, with a breakdown into UI,
+    SSH, SOAP, audit log and sleep time (from helpers/timing.py spans), into a SQLite history. A test is flagged as a
+    regression when it takes more than threshold (eg 0.2 = 20%) longer than the median of its last successful runs.
+    '''
+    threshold = 0.2  # Allowed slowdown relative to the rolling median
+    window = 10  # Number of earlier successful runs in the rolling median
+    min_runs = 3  # Minimum number of earlier runs needed to compare
+    label = None  # Label of the run, eg X-Road version
+
+    def __init__(self, tests, history, label=None, threshold=None, window=None, min_runs=None, log=None):
+        '''
+        :param tests: [str] - test classes as "module.ClassName"
+        :param history: TimingHistory - history database
+        :param label: str|None - label of the run
+        :param threshold: float|None - allowed slowdown, 0.2 = 20%
+        :param window: int|None - number of earlier runs in the rolling median
+        :param min_runs: int|None - minimum number of earlier runs needed to compare
+        :param log: logging function
+        '''
+        self.tests = tests
+        self.history = history
+        if label is not None:
+            self.label = label
+        if threshold is not None:
+            self.threshold = threshold
+        if window is not None:
+            self.window = window
+        if min_runs is not None:
+            self.min_runs = min_runs
+        if log is not None:
+            self.log = log
+        self.results = []
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    @staticmethod
+    def timed_sleep(sleep):
+        '''
+        Returns a replacement for time.sleep that records fixed sleeps of the tests as "sleep" spans. Sleeps inside
+        measured steps (polling in UI waits, SSH reads, ...) are already part of these steps and are not recorded.
+        :param sleep: function - original time.sleep
+        :return: function
+        '''
+
+        def timed(seconds):
+            stack = timing.tracer.get_stack()
+            if stack and stack[-1].category in CATEGORIES:
+                return sleep(seconds)
+            with timing.tracer.span('sleep', 'sleep'):
+                return sleep(seconds)
+
+        return timed
+
+    def evaluate(self, run_id, test, status, duration):
+        '''
+        Builds the result of a test and compares its duration with the rolling median of earlier runs.
+        :param run_id: int - run ID
+        :param test: str - test ID
+        :param status: str - passed, failed, error or skipped
+        :param duration: float - wall-clock time in seconds
+        :return: dict - result
+        '''
+        totals = timing.tracer.take_totals(test)
+        result = {'test': test, 'status': status, 'duration': duration, 'baseline': None, 'regression': False}
+        for category in CATEGORIES:
+            result[category] = totals.get(category, 0.0)
+        result['other'] = max(0.0, duration - sum(result[category] for category in CATEGORIES))
+
+        durations = self.history.get_durations(test, self.window, run_id)
+        if len(durations) >= self.min_runs:
+            result['baseline'] = median(durations)
+            result['regression'] = status == 'passed' and duration > result['baseline'] * (1 + self.threshold)
+        return result
+
+    def run(self):
+        '''
+        Runs the tests and saves the results to the history.
+        :return: [dict] - results of all tests
+        '''
+        run_id = self.history.add_run(self.label)
+        enabled = timing.tracer.enabled
+        sleep = time.sleep
+        timing.tracer.enabled = True
+        time.sleep = self.timed_sleep(sleep)
+        try:
+            for name in self.tests:
+                module_name, class_name = name.rsplit('.', 1)
+                suite = unittest.TestLoader().loadTestsFromTestCase(
+                    getattr(importlib.import_module(module_name), class_name))
+                runner = unittest.TextTestRunner(stream=sys.stderr, verbosity=2, resultclass=BenchmarkResult)
+                for test, status, duration in runner.run(suite).timings:
+                    result = self.evaluate(run_id, test, status, duration)
+                    self.history.add_result(run_id, result)
+                    self.results.append(result)
+                    self.log('{0}: {1} in {2:.1f} s{3}'.format(test, status, duration,
+                                                               ' REGRESSION' if result['regression'] else ''))
+        finally:
+            time.sleep = sleep
+            timing.tracer.enabled = enabled
+        return self.results
+
+    def regressions(self):
+        '''
+        Returns the tests that were flagged as regressions.
+        :return: [dict] - results
+        '''
+        return [result for result in self.results if result['regression']]
+
+    def report(self):
+        '''
+        Returns the timing table of the run.
+        :return: [str] - report lines
+        '''
+        columns = ['duration'] + CATEGORIES + ['other', 'baseline']
+        lines = ['{0:<70} {1:<8} '.format('test', 'status') + ' '.join('{0:>9}'.format(c) for c in columns)]
+        for result in self.results:
+            lines.append('{0:<70} {1:<8} '.format(result['test'][-70:], result['status']) + ' '.join(
+                '{0:>9.2f}'.format(result[c]) if result[c] is not None else '{0:>9}'.format('-') for c in columns) +
+                (' REGRESSION' if result['regression'] else ''))
+        lines.append('Regressions (over {0:.0f}% slower than the median of the last {1} runs): {2}'.format(
+            self.threshold * 100, self.window, len(self.regressions())))
+        return lines
@@ -0,0 +1,233 @@
+import importlib
+import multiprocessing
+import os
+import Queue
+import sys
+import tempfile
+import time
+import traceback
+import unittest
+
+import webdriver_pool
+
+# Resource set for tests that have not declared their resources; conflicts with every other test
+ALL_RESOURCES = None
+
+
+class SuiteEntry:
+    '''
+    Single test class in a parallel suite with the set of resources (servers, clients, global groups, ...) it uses.
+    Two entries conflict if their resource sets overlap; conflicting entries are run in the order they were declared.
+    '''
+
+    def __init__(self, name, test, resources=None, before=None, after=None):
+        '''
+        :param name: str - name used in the report
+        :param test: str - test class as "module.ClassName"
+        :param resources: None|set(str) - resources the test uses; None to use the "resources" attribute of the test
+                                          class, or to conflict with all other tests if the class does not have one
+        :param before: None|function - function called in the worker process before the test; return value is passed
+                                       to after
+        :param after: None|function(value) - function called in the worker process after the test
+        '''
+        self.name = name
+        self.test = test
+        self.resources = resources
+        self.before = before
+        self.after = after
+
+    def get_test_class(self):
+        '''
+        Imports and returns the test class.
+        :return: unittest.TestCase class
+        '''
+        module_name, class_name = self.test.rsplit('.', 1)
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def load_resources(self):
+        '''
+        Reads the resources from the test class if they were not declared with the entry.
+        :return: None
+        '''
+        if self.resources is None:
+            resources = getattr(self.get_test_class(), 'resources', ALL_RESOURCES)
+            self.resources = set(resources) if resources is not None else ALL_RESOURCES
+
+    def conflicts(self, other):
+        '''
+        Checks if the entries cannot be run at the same time.
+        :param other: SuiteEntry
+        :return: bool - True if the resource sets overlap or either one is not declared
+        '''
+        if self.resources is ALL_RESOURCES or other.resources is ALL_RESOURCES:
+            return True
+        return bool(self.resources & other.resources)
+
+
+def run_entry(entry, log_file, results):
+    '''
+    Runs a suite entry in a worker process and puts the result to the results queue.
+    :param entry: SuiteEntry - entry to run
+    :param log_file: str - file to write the test output to
+    :param results: multiprocessing.Queue - queue for the result dictionary
+    :return: None
+    '''
+    result = {'name': entry.name, 'run': 0, 'failures': [], 'errors': [], 'skipped': 0, 'log': log_file}
+    start_time = time.time()
+    with open(log_file, 'w') as log:
+        # Output of the test (print and the runner) goes to the log file so that parallel tests do not mix
+        sys.stdout = sys.stderr = log
+        try:
+            value = entry.before() if entry.before is not None else None
+            suite = unittest.TestLoader().loadTestsFromTestCase(entry.get_test_class())
+            ret = unittest.TextTestRunner(stream=log, verbosity=2).run(suite)
+            result['run'] = ret.testsRun
+            result['failures'] = [(test.id(), tb) for test, tb in ret.failures]
+            result['errors'] = [(test.id(), tb) for test, tb in ret.errors]
+            result['skipped'] = len(ret.skipped)
+            if entry.after is not None:
+                entry.after(value)
+        except Exception:
+            result['errors'].append((entry.name, traceback.format_exc()))
+        finally:
+            # Worker processes exit without running atexit handlers, so the pooled browsers are closed here
+            webdriver_pool.pool.close_all()
+        log.flush()
+    result['time'] = time.time() - start_time
+    results.put(result)
+
+
+class SuiteScheduler:
+    '''
+    Runs test classes in parallel worker processes. An entry is started when no entry declared before it that uses
+    any of the same resources is still waiting or running, so the order of dependent tests stays the same as in a
+    sequential run and tests on different servers run at the same time. Every worker is a new process, so every test
+    class has its own MainController, WebDriver and connections.
+    '''
+    workers = 4  # Maximum number of tests running at the same time
+    log_dir = None  # Directory for the output of tests; temporary directory if not set
+    poll_interval = 1  # Seconds between checks of crashed worker processes
+
+    def __init__(self, entries, workers=None, log_dir=None, log=None):
+        '''
+        :param entries: [SuiteEntry] - tests in the sequential order
+        :param workers: int|None - maximum number of tests running at the same time
+        :param log_dir: str|None - directory for test output files
+        :param log: logging function
+        '''
+        self.entries = entries
+        if workers is not None:
+            self.workers = workers
+        if log_dir is not None:
+            self.log_dir = log_dir
+        if log is not None:
+            self.log = log
+        self.results = []
+
+    def log(self, str):
+        '''
+        Default logging function.
+        :param str: str - text to be logged
+        :return: None
+        '''
+        print(str)
+
+    def run(self):
+        '''
+        Runs all entries and returns the results in the declared order.
+        :return: [dict] - result for each entry: name, run, failures, errors, skipped, time, log
+        '''
+        if self.log_dir is None:
+            self.log_dir = tempfile.mkdtemp(prefix='xroad-suite-')
+        for entry in self.entries:
+            entry.load_resources()
+
+        results_queue = multiprocessing.Queue()
+        waiting = list(self.entries)
+        running = {}  # Entry name: (process, entry)
+        results = {}
+        start_time = time.time()
+
+        while waiting or running:
+            # Start every entry that does not conflict with an earlier unfinished entry
+            for entry in list(waiting):
+                if len(running) >= self.workers:
+                    break
+                earlier = waiting[:waiting.index(entry)] + [item[1] for item in running.values()]
+                if any(entry.conflicts(other) for other in earlier):
+                    continue
+                log_file = os.path.join(self.log_dir, '{0:02d}_{1}.log'.format(self.entries.index(entry) + 1,
+                                                                                entry.name))
+                process = multiprocessing.Process(target=run_entry, args=(entry, log_file, results_queue))
+                process.start()
+                running[entry.name] = (process, entry)
+                waiting.remove(entry)
+                self.log('{0} STARTED ({1})'.format(entry.name, ', '.join(sorted(entry.resources or ['all']))))
+
+            # Wait for a test to finish
+            try:
+                result = results_queue.get(timeout=self.poll_interval)
+            except Queue.Empty:
+                result = None
+                for name, (process, entry) in running.items():
+                    if not process.is_alive() and process.exitcode != 0:
+                        # Worker died without sending the result
+                        result = {'name': name, 'run': 0, 'failures': [], 'skipped': 0, 'time': 0,
+                                  'errors': [(name, 'Worker exited with code {0}'.format(process.exitcode))],
+                                  'log': None}
+                        break
+            if result is None:
+                continue
+
+            process = running.pop(result['name'])[0]
+            process.join()
+            results[result['name']] = result
+            self.log('{0} FINISHED in {1:.0f} s: {2}'.format(result['name'], result['time'],
+                                                            'OK' if self.is_successful(result) else 'FAILED'))
+
+        self.elapsed = time.time() - start_time
+        self.results = [results[entry.name] for entry in self.entries]
+        return self.results
+
+    @staticmethod
+    def is_successful(result):
+        '''
+        Checks if the test class had no failures or errors.
+        :param result: dict - entry result
+        :return: bool
+        '''
+        return not result['failures'] and not result['errors']
+
+    def successful(self):
+        '''
+        Checks if all test classes succeeded.
+        :return: bool
+        '''
+        return all(self.is_successful(result) for result in self.results)
+
+    def report(self):
+        '''
+        Returns the merged report of all test classes.
+        :return: [str] - report lines
+        '''
+        lines = []
+        total = {'run': 0, 'failures': 0, 'errors': 0, 'skipped': 0, 'time': 0}
+        for result in self.results:
+            lines.append('{0}: {1}, run {2}, failures {3}, errors {4}, skipped {5}, {6:.0f} s'.format(
+                result['name'], 'OK' if self.is_successful(result) else 'FAILED', result['run'],
+                len(result['failures']), len(result['errors']), result['skipped'], result['time']))
+            total['run'] += result['run']
+            total['failures'] += len(result['failures'])
+            total['errors'] += len(result['errors'])
+            total['skipped'] += result['skipped']
+            total['time'] += result['time']
+        lines.append('Total: run {0}, failures {1}, errors {2}, skipped {3}'.format(
+            total['run'], total['failures'], total['errors'], total['skipped']))
+        lines.append('Elapsed {0:.0f} s, sequential time {1:.0f} s'.format(self.elapsed, total['time']))
+
+        for result in self.results:
+            for test_id, tb in result['failures'] + result['errors']:
+                lines.append('=' * 70)
+                lines.append('{0}: {1} (output in {2})'.format(result['name'], test_id, result['log']))
+                lines.append(tb)
+        return lines
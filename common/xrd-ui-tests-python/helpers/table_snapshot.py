@@ -0,0 +1,126 @@
+# Script that reads all rows of a table with one WebDriver call. arguments[0] is a table (or tbody) element or a list of
+# row elements, arguments[1] the CSS selector of the rows inside the table. Texts are normalized the same way as
+# WebElement.text does it: non-breaking spaces are replaced and whitespace is collapsed.
+TABLE_SNAPSHOT_SCRIPT = '''
+var rows = arguments[0];
+if (!Array.isArray(rows)) {
+    rows = rows.querySelectorAll(arguments[1]);
+}
+var text = function (element) {
+    var value = element.innerText;
+    if (value === undefined || value === null) {
+        value = element.textContent || '';
+    }
+    return value.replace(/\\u00a0/g, ' ').replace(/[ \\t\\r\\f\\v]+/g, ' ').replace(/ ?\\n ?/g, '\\n')
+        .replace(/\\n+/g, '\\n').trim();
+};
+var result = [];
+for (var i = 0; i < rows.length; i++) {
+    var row = rows[i];
+    var cells = [];
+    var tds = row.querySelectorAll('td');
+    for (var j = 0; j < tds.length; j++) {
+        cells.push(text(tds[j]));
+    }
+    result.push({element: row, id: row.id || '', classes: row.className || '', text: text(row), cells: cells});
+}
+return result;
+'''
+
+
+class TableSnapshot:
+    '''
+    Contents of a table read with a single JavaScript call (see MainController.table_snapshot) instead of one WebDriver
+    request per row and cell. Each row is a dictionary:
+        element: WebElement - the row element, for clicking
+        id: str - id attribute of the row
+        classes: [str] - classes of the row
+        text: str - text of the whole row, as WebElement.text
+        cells: [str] - texts of the td cells
+    Lookups by cell value go through an index that is built once per column, so finding a row in a table of thousands
+    of rows does not need any more requests to the browser.
+    '''
+
+    def __init__(self, rows):
+        '''
+        :param rows: [dict] - rows returned by TABLE_SNAPSHOT_SCRIPT
+        '''
+        self.rows = []
+        for row in rows:
+            self.rows.append({'element': row['element'], 'id': row['id'], 'classes': row['classes'].split(),
+                              'text': row['text'], 'cells': row['cells']})
+        self.indexes = {}  # Column index: {cell text: first row index}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def get_index(self, column):
+        '''
+        Returns the index of the column values, building it on first use.
+        :param column: int|str - zero-based cell index, or "text" for the text of the whole row
+        :return: dict - {value: zero-based index of the first row with the value}
+        '''
+        index = self.indexes.get(column)
+        if index is None:
+            index = {}
+            for i, row in enumerate(self.rows):
+                if column == 'text':
+                    value = row['text']
+                elif column < len(row['cells']):
+                    value = row['cells'][column]
+                else:
+                    continue
+                index.setdefault(value, i)
+            self.indexes[column] = index
+        return index
+
+    def find(self, column, value):
+        '''
+        Finds the first row that has the value in the column.
+        :param column: int|str - zero-based cell index, or "text" for the text of the whole row
+        :param value: str - cell text to look for
+        :return: int|None - zero-based row index or None if not found
+        '''
+        return self.get_index(column).get(value)
+
+    def find_row(self, column, value):
+        '''
+        Finds the first row that has the value in the column.
+        :param column: int|str - zero-based cell index, or "text" for the text of the whole row
+        :param value: str - cell text to look for
+        :return: dict|None - row or None if not found
+        '''
+        row_index = self.find(column, value)
+        return self.rows[row_index] if row_index is not None else None
+
+    def column(self, column):
+        '''
+        Returns the texts of a column from all rows.
+        :param column: int - zero-based cell index
+        :return: [str] - cell texts; empty string for rows that do not have the cell
+        '''
+        return [row['cells'][column] if column < len(row['cells']) else '' for row in self.rows]
+
+
+def get_snapshot(driver, table, rows_css='tbody tr'):
+    '''
+    Reads the rows of a table with one JavaScript call. Elements of an EventFiringWebDriver are unwrapped, so the
+    driver can also be the parent of an element, which is always the plain WebDriver.
+    :param driver: WebDriver
+    :param table: WebElement|[WebElement] - table or tbody element, or a list of already found row elements
+    :param rows_css: str - CSS selector of the rows inside the table element
+    :return: TableSnapshot
+    '''
+    if isinstance(table, TableSnapshot):
+        return table
+    if isinstance(table, (list, tuple)):
+        table = [getattr(row, 'wrapped_element', row) for row in table]
+    else:
+        table = getattr(table, 'wrapped_element', table)
+    return TableSnapshot(driver.execute_script(TABLE_SNAPSHOT_SCRIPT, table, rows_css))
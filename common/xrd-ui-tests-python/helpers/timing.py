@@ -0,0 +1,287 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+
+# Use case number at the beginning of a log message: "UC MEMBER_04: 1. ...", "SS_14 2. ...", "MEMBER_47 ..."
+USE_CASE_REGEX = re.compile(r'^\s*(?:UC\s+)?([A-Z][A-Z0-9]*_[0-9]+[a-z]?)\b')
+
+
+class Span:
+    '''
+    Context manager that measures one step. Spans opened inside another span in the same thread are its children.
+    '''
+
+    def __init__(self, tracer, name, category, detail=None):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.detail = detail
+        self.children_time = 0.0
+
+    def __enter__(self):
+        self.tracer.push(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exctype, excvalue, exctrace):
+        self.duration = time.time() - self.start
+        self.error = exctype is not None
+        self.tracer.pop(self)
+        return False
+
+
+class NoSpan:
+    '''
+    Span that does nothing, used when timing is disabled.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, excvalue, exctrace):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+class Tracer:
+    '''
+    Collects timing spans of test steps (UI actions, SSH commands, SOAP queries, log checks). Every span records the
+    test and the use case (taken from the last "UC XXX_NN" log message, see MainController.log) that were running when
+    it started, its parent span, total time and self time (total time minus the time of its children). Spans are
+    exported as JSON lines and as folded stacks ("test;use case;span;child self-time-in-microseconds") that flame graph
+    tools (flamegraph.pl, speedscope) read directly.
+    '''
+    enabled = False  # Record spans; when False, spans cost one attribute lookup
+    json_file = None  # JSON lines file the spans are appended to
+    folded_file = None  # Folded stacks file for flame graphs
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = []  # Finished spans as dictionaries
+        self.totals = {}  # Self time by test and category: {test: {category: seconds}}; kept after export
+        self.test = None  # Current test ID
+        self.use_case = None  # Current use case, eg "MEMBER_47"
+        self.next_id = 1
+
+    def get_stack(self):
+        '''
+        Returns the open spans of the current thread.
+        :return: [Span]
+        '''
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def set_test(self, test):
+        '''
+        Sets the test that the following spans belong to and clears the use case.
+        :param test: str - test ID
+        :return: None
+        '''
+        self.test = test
+        self.use_case = None
+
+    def set_use_case(self, message):
+        '''
+        Sets the current use case if the log message starts with a use case number. Does nothing when timing is
+        disabled or the message is not a string (exceptions and dicts are logged, too).
+        :param message: str - log message
+        :return: None
+        '''
+        if not self.enabled or not isinstance(message, basestring):
+            return
+        match = USE_CASE_REGEX.match(message)
+        if match is not None:
+            self.use_case = match.group(1)
+
+    def span(self, name, category='step', detail=None):
+        '''
+        Returns a context manager that measures the code inside the with block.
+        :param name: str - step name
+        :param category: str - step category: ui, ssh, soap, audit, sleep, step
+        :param detail: str|None - extra information, eg the SSH command
+        :return: Span|NoSpan
+        '''
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name, category, detail)
+
+    def push(self, span):
+        '''
+        Opens a span as a child of the innermost open span of the thread.
+        :param span: Span
+        :return: None
+        '''
+        stack = self.get_stack()
+        span.parent = stack[-1] if stack else None
+        span.test = self.test
+        span.use_case = self.use_case
+        with self.lock:
+            span.id = self.next_id
+            self.next_id += 1
+        stack.append(span)
+
+    def pop(self, span):
+        '''
+        Closes the span and saves it as a finished span.
+        :param span: Span
+        :return: None
+        '''
+        stack = self.get_stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        if span.parent is not None:
+            span.parent.children_time += span.duration
+        path = []
+        parent = span.parent
+        while parent is not None:
+            path.insert(0, parent.name)
+            parent = parent.parent
+        record = {'id': span.id, 'parent': span.parent.id if span.parent is not None else None,
+                  'name': span.name, 'category': span.category, 'test': span.test, 'use_case': span.use_case,
+                  'start': span.start, 'duration': span.duration,
+                  'self': max(0.0, span.duration - span.children_time), 'path': path, 'error': span.error,
+                  'pid': os.getpid(), 'thread': threading.current_thread().name}
+        if span.detail is not None:
+            record['detail'] = span.detail
+        with self.lock:
+            self.spans.append(record)
+            categories = self.totals.setdefault(span.test, {})
+            categories[span.category] = categories.get(span.category, 0.0) + record['self']
+
+    def take(self):
+        '''
+        Returns and forgets the finished spans.
+        :return: [dict] - spans
+        '''
+        with self.lock:
+            spans = self.spans
+            self.spans = []
+        return spans
+
+    def take_totals(self, test):
+        '''
+        Returns and forgets the self time of a test by category.
+        :param test: str - test ID
+        :return: {category: seconds}
+        '''
+        with self.lock:
+            return self.totals.pop(test, {})
+
+    @staticmethod
+    def get_folded(spans):
+        '''
+        Converts spans to folded stacks for flame graphs. The value of a stack is the self time in microseconds.
+        :param spans: [dict] - spans
+        :return: [str] - lines "frame;frame;frame value"
+        '''
+        totals = {}
+        for span in spans:
+            frames = [span['test'] or 'unknown', span['use_case'] or '-'] + span['path'] + [span['name']]
+            key = ';'.join(frame.replace(';', ':').replace(' ', '_') for frame in frames)
+            totals[key] = totals.get(key, 0) + int(span['self'] * 1000000)
+        return ['{0} {1}'.format(stack, value) for stack, value in sorted(totals.items()) if value > 0]
+
+    @staticmethod
+    def get_summary(spans):
+        '''
+        Sums the self time of the spans by use case and category.
+        :param spans: [dict] - spans
+        :return: {use case: {category: seconds}}
+        '''
+        summary = {}
+        for span in spans:
+            categories = summary.setdefault(span['use_case'] or '-', {})
+            categories[span['category']] = categories.get(span['category'], 0.0) + span['self']
+        return summary
+
+    def configure(self, enabled, json_file=None, folded_file=None):
+        '''
+        Enables or disables recording and sets the export files.
+        :param enabled: bool - True to record spans
+        :param json_file: str|None - JSON lines file
+        :param folded_file: str|None - folded stacks file
+        :return: None
+        '''
+        self.enabled = enabled
+        self.json_file = json_file
+        self.folded_file = folded_file
+
+    def export(self):
+        '''
+        Appends the finished spans to the JSON lines file and their folded stacks to the flame graph file, then
+        forgets them.
+        :return: [dict] - exported spans
+        '''
+        spans = self.take()
+        if not spans:
+            return spans
+        if self.json_file is not None:
+            with open(self.json_file, 'a') as f:
+                f.write(''.join(json.dumps(span, sort_keys=True) + '\n' for span in spans))
+        if self.folded_file is not None:
+            with open(self.folded_file, 'a') as f:
+                f.write(''.join(line + '\n' for line in self.get_folded(spans)))
+        return spans
+
+
+def timed(category, name=None, detail=None):
+    '''
+    Decorator that runs the function inside a span.
+    :param category: str - step category
+    :param name: str|None - step name; function name if None
+    :param detail: str|None - name of the argument to save as span detail
+    :return: decorator
+    '''
+
+    def decorator(function):
+        span_name = name or function.__name__
+        detail_index = None
+        if detail is not None:
+            detail_index = inspect.getargspec(function).args.index(detail)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            value = None
+            if detail_index is not None:
+                value = kwargs.get(detail, args[detail_index] if detail_index < len(args) else None)
+                if value is not None:
+                    value = str(value)[:200]
+            with Span(tracer, span_name, category, value):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Tracer shared by the whole process
+tracer = Tracer()
+
+
+def span(name, category='step', detail=None):
+    '''
+    Measures the code inside the with block, for example:
+        with timing.span('register client', 'step'):
+            ...
+    :param name: str - step name
+    :param category: str - step category
+    :param detail: str|None - extra information
+    :return: context manager
+    '''
+    return tracer.span(name, category, detail)
+
+
+# Spans not exported by MainController.tearDown are written when the process exits
+atexit.register(tracer.export)
@@ -1,20 +1,76 @@
+import os
+import shutil
+import tempfile
+import threading
+
 from selenium import webdriver
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
-
-def get_webdriver(type=webdriver.Firefox, download_dir='', log_dir='', marionette=False):
+# Window size used in headless mode (there is no screen to take the size from)
+HEADLESS_WINDOW_SIZE = (1920, 1080)
+
+# Serializes Firefox starts that set MOZ_HEADLESS, as the environment is shared by all threads of the process
+HEADLESS_ENVIRONMENT_LOCK = threading.Lock()
+
+# Firefox preferences for a lean profile: no images, animations, extensions, telemetry or background traffic
+FIREFOX_LEAN_PREFERENCES = {
+    'permissions.default.image': 2,
+    'toolkit.cosmeticAnimations.enabled': False,
+    'ui.prefersReducedMotion': 1,
+    'browser.tabs.animate': False,
+    'browser.fullscreen.animate': False,
+    'extensions.enabledScopes': 0,
+    'extensions.autoDisableScopes': 15,
+    'extensions.update.enabled': False,
+    'extensions.pocket.enabled': False,
+    'xpinstall.enabled': False,
+    'toolkit.telemetry.enabled': False,
+    'toolkit.telemetry.unified': False,
+    'toolkit.telemetry.archive.enabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'datareporting.policy.dataSubmissionEnabled': False,
+    'app.update.enabled': False,
+    'app.update.auto': False,
+    'app.normandy.enabled': False,
+    'browser.shell.checkDefaultBrowser': False,
+    'browser.startup.page': 0,
+    'browser.startup.homepage_override.mstone': 'ignore',
+    'browser.safebrowsing.malware.enabled': False,
+    'browser.safebrowsing.phishing.enabled': False,
+    'browser.safebrowsing.downloads.enabled': False,
+    'browser.newtabpage.enabled': False,
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'media.autoplay.enabled': False,
+}
+
+# Chrome switches for a lean profile
+CHROME_LEAN_ARGUMENTS = ['--blink-settings=imagesEnabled=false', '--disable-extensions', '--disable-default-apps',
+                         '--disable-background-networking', '--disable-sync', '--disable-translate',
+                         '--disable-component-update', '--metrics-recording-only', '--no-first-run',
+                         '--safebrowsing-disable-auto-update', '--mute-audio', '--wm-window-animations-disabled',
+                         '--disable-renderer-backgrounding']
+
+
+def get_webdriver(type=webdriver.Firefox, download_dir='', log_dir='', marionette=False, headless=False, lean=False,
+                  profile_template=None):
     '''
     Gets the webdriver object depending on the type set.
     :param type: RemoteWebDriver - type of the WebDriver, allowed: Firefox, Chrome, Ie
     :param download_dir: str - path of the download directory
     :param log_dir: str - path of the logfile
     :param marionette: bool - used only for Firefox; True for Selenium 3; False for Selenium 2
+    :param headless: bool - True to run the browser without a window (Firefox and Chrome)
+    :param lean: bool - True to disable images, animations, extensions and telemetry (Firefox and Chrome)
+    :param profile_template: str|None - directory of the profile template; created on first use (Firefox and Chrome)
     :return: WebDriver object
     '''
     if type == webdriver.Firefox:
-        return get_firefox(download_dir=download_dir, log_dir=log_dir, marionette=marionette)
+        return get_firefox(download_dir=download_dir, log_dir=log_dir, marionette=marionette, headless=headless,
+                           lean=lean, profile_template=profile_template)
     elif type == webdriver.Chrome:
-        return get_chrome(download_dir=download_dir, log_dir=log_dir)
+        return get_chrome(download_dir=download_dir, log_dir=log_dir, headless=headless, lean=lean,
+                          profile_template=profile_template)
     elif type == webdriver.Ie:
         return get_ie(download_dir=download_dir, log_dir=log_dir)
     return None
@@ -30,25 +86,75 @@ def get_ie(download_dir='', log_dir=''):
     return webdriver.Ie()
 
 
-def get_chrome(download_dir='', log_dir=''):
+def get_chrome(download_dir='', log_dir='', headless=False, lean=False, profile_template=None):
     '''
-    Stub for getting Chrome WebDriver
+    Returns a Chrome WebDriver that accepts untrusted certificates and downloads files automatically to the specified
+    download directory.
     :param download_dir: str - path of the download directory
     :param log_dir: str - path of the logfile
+    :param headless: bool - True to run the browser without a window
+    :param lean: bool - True to disable images, animations, extensions and background traffic
+    :param profile_template: str|None - user data directory to copy for every browser; created on first use
     :return: WebDriver object
     '''
-    return webdriver.Chrome()
+    options = webdriver.ChromeOptions()
+    options.add_argument('--ignore-certificate-errors')
+    options.add_experimental_option('prefs', {'download.default_directory': download_dir,
+                                              'download.prompt_for_download': False})
+    if headless:
+        options.add_argument('--headless')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--window-size={0},{1}'.format(*HEADLESS_WINDOW_SIZE))
+    if lean:
+        for argument in CHROME_LEAN_ARGUMENTS:
+            options.add_argument(argument)
+
+    if profile_template:
+        # Chrome locks its user data directory, so every browser gets its own copy of the template
+        user_data_dir = tempfile.mkdtemp(prefix='chrome-profile-')
+        if os.path.isdir(profile_template):
+            shutil.rmtree(user_data_dir)
+            shutil.copytree(profile_template, user_data_dir)
+        options.add_argument('--user-data-dir={0}'.format(user_data_dir))
+
+    capabilities = DesiredCapabilities().CHROME
+    capabilities['acceptSslCerts'] = True
+    capabilities['acceptInsecureCerts'] = True
 
+    driver = webdriver.Chrome(chrome_options=options, desired_capabilities=capabilities,
+                              service_log_path=log_dir or None)
 
-def get_firefox(download_dir='', log_dir='', marionette=False):
+    if profile_template and not os.path.isdir(profile_template):
+        # Save the profile Chrome created on the first start as the template for the next browsers
+        save_profile_template(user_data_dir, profile_template)
+    return driver
+
+
+def save_profile_template(profile_dir, profile_template):
     '''
-    Returns a Firefox WebDriver that accepts untrusted certificates, will no ask to resume from crashes,
-    does not use cache, uses specified download directory and logfile, downloads files automatically.
-    :param download_dir: str - path of the download directory
-    :param log_dir: str - path of the logfile
-    :param marionette: bool - False to use Selenium 2, True for Selenium 3
-    :return: WebDriver object
+    Copies a browser profile to the template directory. If another browser has already saved the template, nothing
+    is done.
+    :param profile_dir: str - profile directory
+    :param profile_template: str - template directory
+    :return: None
+    '''
+    try:
+        shutil.copytree(profile_dir, profile_template, ignore=shutil.ignore_patterns('Singleton*', '*.lock', 'lock'))
+    except (OSError, shutil.Error):
+        pass
+
+
+def get_firefox_profile(profile_template=None, lean=False):
     '''
+    Returns a new Firefox profile. If a profile template is set, the profile is a copy of the template; the template
+    is created (with the common and the lean preferences) on first use.
+    :param profile_template: str|None - directory of the profile template
+    :param lean: bool - True to disable images, animations, extensions and telemetry
+    :return: FirefoxProfile
+    '''
+    if profile_template and os.path.isdir(profile_template):
+        return webdriver.FirefoxProfile(profile_directory=profile_template)
+
     # New firefox profile
     profile = webdriver.FirefoxProfile()
 
@@ -62,6 +168,31 @@ def get_firefox(download_dir='', log_dir='', marionette=False):
     # Disable cache
     profile.set_preference('network.http.use-cache', False)
 
+    if lean:
+        for key, value in FIREFOX_LEAN_PREFERENCES.items():
+            profile.set_preference(key, value)
+
+    if profile_template:
+        # Save the profile as the template for the next browsers
+        profile.update_preferences()
+        save_profile_template(profile.path, profile_template)
+    return profile
+
+
+def get_firefox(download_dir='', log_dir='', marionette=False, headless=False, lean=False, profile_template=None):
+    '''
+    Returns a Firefox WebDriver that accepts untrusted certificates, will no ask to resume from crashes,
+    does not use cache, uses specified download directory and logfile, downloads files automatically.
+    :param download_dir: str - path of the download directory
+    :param log_dir: str - path of the logfile
+    :param marionette: bool - False to use Selenium 2, True for Selenium 3
+    :param headless: bool - True to run the browser without a window; needs Firefox 56 or later
+    :param lean: bool - True to disable images, animations, extensions and telemetry
+    :param profile_template: str|None - directory of the profile template; created on first use
+    :return: WebDriver object
+    '''
+    profile = get_firefox_profile(profile_template=profile_template, lean=lean)
+
     # Set download dir and don't ask for confirmation
     profile.set_preference("browser.download.folderList", 2)
 
@@ -81,5 +212,21 @@ def get_firefox(download_dir='', log_dir='', marionette=False):
     capabilities['handleAlerts'] = True
     capabilities['marionette'] = marionette  # Uncomment this line to use Selenium 3 with Firefox <=47
 
-    # Start Firefox with our profile and capabilities and return the WebDriver
-    return webdriver.Firefox(firefox_profile=profile, capabilities=capabilities)
+    if not headless:
+        # Start Firefox with our profile and capabilities and return the WebDriver
+        return webdriver.Firefox(firefox_profile=profile, capabilities=capabilities)
+
+    if hasattr(webdriver, 'FirefoxOptions'):
+        options = webdriver.FirefoxOptions()
+        options.add_argument('-headless')
+        driver = webdriver.Firefox(firefox_profile=profile, capabilities=capabilities, firefox_options=options)
+    else:
+        # Selenium 2 has no Firefox options; Firefox 56 and later read headless mode from the environment
+        with HEADLESS_ENVIRONMENT_LOCK:
+            os.environ['MOZ_HEADLESS'] = '1'
+            try:
+                driver = webdriver.Firefox(firefox_profile=profile, capabilities=capabilities)
+            finally:
+                os.environ.pop('MOZ_HEADLESS', None)
+    driver.set_window_size(*HEADLESS_WINDOW_SIZE)
+    return driver
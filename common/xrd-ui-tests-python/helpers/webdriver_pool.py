@@ -0,0 +1,169 @@
+import atexit
+import os
+import threading
+import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+
+def get_server_url(url):
+    '''
+    Returns the server part (scheme and host) of the URL, used as pool key.
+    :param url: str - URL
+    :return: str - scheme://host[:port]
+    '''
+    parsed = urlparse.urlparse(url)
+    return '{0}://{1}'.format(parsed.scheme, parsed.netloc)
+
+
+class WebDriverPool:
+    '''
+    Process-wide pool of browser sessions. Instead of quitting the browser after every test class and starting a new
+    one (with a new profile and a new login), drivers are returned to the pool and handed out again. A driver is
+    preferably given to the next user of the same (driver type, server URL, username), because it is still logged in
+    there; otherwise any idle driver is reused and the caller has to reset the session state (see
+    MainController.reset_webdriver). Drivers that do not respond anymore are replaced transparently.
+    '''
+    max_idle = 4  # Maximum number of idle drivers kept open
+    warmed_up = False  # True if browsers have been started in advance in this process
+
+    def __init__(self, max_idle=None):
+        if max_idle is not None:
+            self.max_idle = max_idle
+        self.lock = threading.RLock()
+        self.idle = []  # Idle drivers: [(key, driver)], most recently used last
+        self.pid = os.getpid()
+
+    def check_process(self):
+        '''
+        Forgets the drivers inherited from the parent process after a fork; the browser sessions belong to the parent.
+        :return: None
+        '''
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.idle = []
+            self.warmed_up = False
+
+    @staticmethod
+    def is_alive(driver):
+        '''
+        Checks if the browser session still responds.
+        :param driver: WebDriver
+        :return: bool
+        '''
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def quit(driver):
+        '''
+        Quits the driver, ignoring errors from already dead sessions.
+        :param driver: WebDriver
+        :return: None
+        '''
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def warm_up(self, count, create, driver_type=None):
+        '''
+        Starts browsers in advance (in parallel) and adds them to the pool as idle drivers without a server or user.
+        :param count: int - number of idle drivers to have in the pool
+        :param create: function - function that starts a new driver
+        :param driver_type: type - WebDriver type, part of the key
+        :return: None
+        '''
+        with self.lock:
+            self.check_process()
+            if self.warmed_up:
+                return
+            self.warmed_up = True
+            count = min(count, self.max_idle) - len(self.idle)
+        started = []
+
+        def start():
+            try:
+                started.append(create())
+            except WebDriverException:
+                pass
+
+        threads = [threading.Thread(target=start) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self.lock:
+            for driver in started:
+                self.idle.insert(0, ((driver_type, None, None), driver))
+
+    def acquire(self, key, create):
+        '''
+        Returns a driver for the key: an idle driver with the same key, or any idle driver of the same type, or a new
+        one started with the create function.
+        :param key: (type, str, str) - driver type, server URL, username
+        :param create: function - function that starts a new driver
+        :return: (WebDriver, bool) - driver and True if it was taken from the pool (and may have state from earlier
+                                     tests); False if it was just started
+        '''
+        with self.lock:
+            self.check_process()
+            # Same key first (most recently used first), then other drivers of the same type
+            candidates = [item for item in reversed(self.idle) if item[0] == key] + \
+                         [item for item in reversed(self.idle) if item[0] != key and item[0][0] == key[0]]
+            for item in candidates:
+                self.idle.remove(item)
+                if self.is_alive(item[1]):
+                    return item[1], True
+                # Dead session, replace it
+                self.quit(item[1])
+        return create(), False
+
+    def release(self, driver, key):
+        '''
+        Returns the driver to the pool after closing extra windows. If the pool is full, the least recently used idle
+        driver is quit.
+        :param driver: WebDriver
+        :param key: (type, str, str) - driver type, server URL and username the driver was used with
+        :return: None
+        '''
+        try:
+            # Close alerts and popup windows left over from the test
+            try:
+                driver.switch_to.alert.dismiss()
+            except WebDriverException:
+                pass
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+        except Exception:
+            self.quit(driver)
+            return
+
+        with self.lock:
+            self.check_process()
+            self.idle.append((key, driver))
+            while len(self.idle) > self.max_idle:
+                self.quit(self.idle.pop(0)[1])
+
+    def close_all(self):
+        '''
+        Quits all idle drivers.
+        :return: None
+        '''
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            for key, driver in self.idle:
+                self.quit(driver)
+            self.idle = []
+
+
+# Driver pool shared by all MainController instances of this process
+pool = WebDriverPool()
+atexit.register(pool.close_all)
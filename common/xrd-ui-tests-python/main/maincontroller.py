@@ -11,9 +11,12 @@ import inspect
 import selenium.webdriver.support.expected_conditions as conditions
 import selenium.webdriver.support.ui as ui
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.events import EventFiringWebDriver
 
-from helpers import confreader, webdriver_init, mockrunner, login
+from helpers import confreader, webdriver_init, webdriver_pool, mockrunner, login, soaptestclient, page_settle, \
+    table_snapshot, timing, mock_service
 from main.assert_helper import AssertHelper
 
 from selenium.webdriver.common.action_chains import ActionChains
@@ -24,7 +27,9 @@ class MainController(AssertHelper):
     configuration = 'config.ini'
 
     close_webdriver = True  # Close webdriver in tearDown
+    reuse_webdriver = False  # Return webdriver to the pool instead of quitting it (see helpers/webdriver_pool.py)
     driver = None  # Init webdriver variable
+    driver_key = None  # Driver type, server URL and username of the current webdriver (pool key)
     driver_type = webdriver.Firefox  # Webdriver type, currently only Firefox is supported
     driver_autostart = False  # Autostart webdriver in setUp
     mock_service = None  # Init mock service variable
@@ -36,6 +41,9 @@ class MainController(AssertHelper):
     debug = True  # Show debug messages
     logdata = []  # Reserved for temporary storage of log entries to be checked later
     number = None  # Management request revoked ID
+    settle_pages = True  # Wait for the page to settle after every click and page load (see helpers/page_settle.py)
+    settle_timeout = page_settle.SETTLE_TIMEOUT  # Maximum time to wait for the page to settle, in seconds
+    settle_quiet_period = page_settle.SETTLE_QUIET_PERIOD  # Time without AJAX or DOM changes to consider page settled
 
     # MainController path (../ relative from maincontroller.py location)
     main_path = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -60,6 +68,7 @@ class MainController(AssertHelper):
     download_dir = 'temp/downloads'
     mock_cert_path = 'mock/certs'
     mock_query_path = 'mock/queries'
+    mock_wsdl_path = 'mock/service_wsdl'
 
     # Browser log. Relative to main_path or absolute.
     browser_log = 'firefox_console.txt'
@@ -114,6 +123,19 @@ class MainController(AssertHelper):
 
         self.disable_mock_service = not self.config.get_bool('mockrunner.enabled', True)
 
+        # Wait for AJAX requests and DOM changes to finish after clicks and page loads
+        self.settle_pages = self.config.get_bool('config.wait_settled', self.settle_pages)
+        self.settle_timeout = float(self.config.get('config.settle_timeout', self.settle_timeout))
+        self.settle_quiet_period = float(self.config.get('config.settle_quiet_period', self.settle_quiet_period))
+
+        # Reuse browser sessions between test classes
+        self.reuse_webdriver = self.config.get_bool('config.reuse_webdriver', self.reuse_webdriver)
+        webdriver_pool.pool.max_idle = self.config.get_int('config.webdriver_pool_size', webdriver_pool.pool.max_idle)
+        if self.reuse_webdriver:
+            # Start browsers in advance (once per process) so that tests do not have to wait for them
+            webdriver_pool.pool.warm_up(self.config.get_int('config.webdriver_warm_up', 0), self.start_webdriver,
+                                        self.driver_type)
+
         used_dirs = [self.temp_dir, self.download_dir, self.mock_cert_path, self.mock_query_path]
 
         # Create directories that do not already exist
@@ -129,6 +151,12 @@ class MainController(AssertHelper):
                         # Something else, raise an Exception
                         raise
 
+        # Timing spans of UI steps, SSH commands, SOAP queries and log checks (see helpers/timing.py)
+        if self.config.get_bool('config.timing', False):
+            timing.tracer.configure(True, json_file=self.get_temp_path('timing.jsonl'),
+                                    folded_file=self.get_temp_path('timing.folded'))
+        timing.tracer.set_test(case.id() if hasattr(case, 'id') else None)
+
         if self.debug:
             self.log('Default configuration: {0}'.format(self.configuration))
             self.log('INI file: {0}'.format(self.config.get('ini')))
@@ -181,7 +209,10 @@ class MainController(AssertHelper):
             # Close the driver
             if self.close_webdriver:
                 # self.driver.close()
-                self.driver.quit()
+                self.quit_webdriver()
+
+        # Write the timing spans of the test
+        timing.tracer.export()
 
     def save_exception_data(self, exctype=None, excvalue=None, exctrace=None):
         """
@@ -346,14 +377,13 @@ class MainController(AssertHelper):
 
     def get_xml_query(self, filename):
         '''
-        Reads an XML query data from a file.
+        Reads an XML query data from a file. Files are read only once, later calls return the cached contents.
         :param filename: str - filename
         :return: str - file contents
         '''
         file_path = self.get_query_path(filename)
 
-        with open(file_path, 'r') as f:
-            return f.read()
+        return soaptestclient.load_template(file_path).text
 
     def reset_webdriver(self, url, username=None, password=None, close_previous=True, init_new_webdriver=True):
         '''
@@ -368,15 +398,18 @@ class MainController(AssertHelper):
 
         # Close the current WebDriver instance if it exists and we're asked to do so.
         if close_previous and self.driver is not None:
-            self.driver.quit()
-            self.driver = None
+            self.quit_webdriver()
 
         # If WebDriver does not exist or we're asked to open a new instance, do it.
+        reused = False
         if init_new_webdriver or self.driver is None:
             try:
-                self.driver = webdriver_init.get_webdriver(self.driver_type, download_dir=self.get_download_path(),
-                                                           log_dir=self.get_temp_path(self.browser_log),
-                                                           marionette=self.config.get('config.marionette', False))
+                if self.reuse_webdriver:
+                    # Get a driver from the pool, preferably one that was logged in to the same server as the same user
+                    key = (self.driver_type, webdriver_pool.get_server_url(url), username)
+                    self.driver, reused = webdriver_pool.pool.acquire(key, self.start_webdriver)
+                else:
+                    self.driver = self.start_webdriver()
             except:
                 # If WebDriver fails to start, the test has failed.
                 assert False, 'MainController: failed to start WebDriver'
@@ -384,6 +417,10 @@ class MainController(AssertHelper):
         try:
             # Go to URL
             self.driver.get(url)
+            if reused and (username is None or not login.check_login(self, username)):
+                # Driver from the pool is not logged in as the requested user; start from a clean session
+                self.clear_webdriver_state()
+                self.driver.get(url)
         except:
             assert False, 'MainController: WebDriver failed, URL: '.format(url)
 
@@ -395,6 +432,49 @@ class MainController(AssertHelper):
         self.url = url
         self.username = username
         self.password = password
+        self.driver_key = (self.driver_type, webdriver_pool.get_server_url(url), username)
+
+    def start_webdriver(self):
+        '''
+        Starts a new WebDriver instance with the configured type, download directory and log.
+        :return: WebDriver object
+        '''
+        profile_template = self.config.get_string('config.profile_template', '')
+        driver = webdriver_init.get_webdriver(self.driver_type, download_dir=self.get_download_path(),
+                                              log_dir=self.get_temp_path(self.browser_log),
+                                              marionette=self.config.get('config.marionette', False),
+                                              headless=self.config.get_bool('config.headless', False),
+                                              lean=self.config.get_bool('config.lean_profile', False),
+                                              profile_template=self.get_path(profile_template) if profile_template
+                                              else None)
+        if self.settle_pages:
+            # Every click and page load waits until the page has settled
+            driver = EventFiringWebDriver(driver, page_settle.SettleListener(timeout=self.settle_timeout,
+                                                                             quiet_period=self.settle_quiet_period))
+        return driver
+
+    def quit_webdriver(self):
+        '''
+        Closes the current WebDriver instance, or returns it to the pool if webdriver reuse is enabled.
+        :return: None
+        '''
+        if self.reuse_webdriver:
+            webdriver_pool.pool.release(self.driver, self.driver_key or (self.driver_type, None, None))
+        else:
+            self.driver.quit()
+        self.driver = None
+        self.driver_key = None
+
+    def clear_webdriver_state(self):
+        '''
+        Deletes cookies and web storage of the current page's server, logging the user out.
+        :return: None
+        '''
+        self.driver.delete_all_cookies()
+        try:
+            self.driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+        except:
+            pass
 
     def reload_webdriver(self, url, username=None, password=None):
         '''
@@ -409,7 +489,8 @@ class MainController(AssertHelper):
 
     def start_mock_service(self):
         '''
-        Starts a mock service using SSH.
+        Starts a mock service using SSH, or the Python mock service (helpers/mock_service.py) in this process if
+        mockrunner.local is set.
         :return: None
         '''
 
@@ -418,7 +499,18 @@ class MainController(AssertHelper):
             self.log('Mock service starter disabled. Service needs to be already started for the tests to succeed.')
         else:
             # If mock service class has not been instantiated, do it now with settings specified in configuration.
-            if self.mock_service is None:
+            if self.mock_service is None and self.config.get_bool('mockrunner.local', False):
+                if self.debug:
+                    self.log('Creating MockService')
+                wsdl_files = [os.path.join(self.get_path(self.mock_wsdl_path), filename.strip()) for filename in
+                              self.config.get_string('mockrunner.local_wsdl', 'testservice.wsdl').split(',')]
+                self.mock_service = mock_service.MockService(wsdl_files,
+                                                             host=self.config.get_string('mockrunner.local_host',
+                                                                                         None),
+                                                             port=self.config.get_int('mockrunner.local_port', 8088),
+                                                             workers=self.config.get_int('mockrunner.local_workers', 1),
+                                                             log=self.log, behaviours=self.get_mock_behaviours())
+            elif self.mock_service is None:
                 if self.debug:
                     self.log('Creating MockRunner')
                 self.mock_service = mockrunner.MockRunner(self.config.get('mockrunner.ssh_host'),
@@ -430,6 +522,15 @@ class MainController(AssertHelper):
             # Start the service
             self.mock_service.start()
 
+    def get_mock_behaviours(self):
+        '''
+        Returns the response behaviours of the Python mock service from the mock_behaviour section of configuration.
+        :return: {str|None: mock_service.Behaviour} - behaviours by lowercase operation name
+        '''
+        prefix = 'mock_behaviour.'
+        return mock_service.get_behaviours(dict((key[len(prefix):], value) for key, value in self.config.config.items()
+                                                if key.startswith(prefix)))
+
     def save_screenshot(self, filename):
         '''
         Saves a screenshot of the WebDriver window to temporary directory.
@@ -542,6 +643,7 @@ class MainController(AssertHelper):
         driver_wait = WebDriverWait(self.driver, timeout)
         driver_wait.until(condition)
 
+    @timing.timed('ui')
     def wait_until_visible(self, element, type=None, timeout=10, multiple=False):
         """
         Waits until an element (or elements if multiple is True) is visible or timeout occurs, then returns the
@@ -586,6 +688,7 @@ class MainController(AssertHelper):
             self.log('Executing async JS: {0}'.format(script))
         return self.driver.execute_async_script(script, *args)
 
+    @timing.timed('ui')
     def wait_jquery(self, timeout=120):
         """
         Waits until jQuery.ajax request is finished (or timeout), then gives control back to the program.
@@ -596,6 +699,44 @@ class MainController(AssertHelper):
             self.log('Waiting for AJAX to load the data')
         return self.wait(lambda driver: driver.execute_script("return jQuery.active == 0"), timeout=timeout)
 
+    @timing.timed('ui')
+    def wait_settled(self, timeout=None, quiet_period=None, raise_timeout=True):
+        '''
+        Waits until the page has settled: no jQuery AJAX, XMLHttpRequest or fetch requests are pending and the DOM has
+        not changed for the quiet period. Unlike a fixed sleep, returns as soon as the page is ready.
+        :param timeout: float|None - maximum time in seconds to wait; configured default if None
+        :param quiet_period: float|None - time in seconds without requests or DOM changes; configured default if None
+        :param raise_timeout: bool - raise TimeoutException if the page does not settle in time, like wait_jquery;
+                                     False to return False and continue
+        :return: bool - True if the page settled, False on timeout if raise_timeout is False
+        '''
+        timeout = self.settle_timeout if timeout is None else timeout
+        settled = page_settle.wait_settled(self.driver, timeout=timeout,
+                                           quiet_period=self.settle_quiet_period if quiet_period is None
+                                           else quiet_period)
+        if not settled:
+            if raise_timeout:
+                raise TimeoutException('Page did not settle in {0} seconds'.format(timeout))
+            if self.debug:
+                self.log('Page did not settle in time, continuing')
+        return settled
+
+    def table_snapshot(self, table, type=None, rows_css='tbody tr', timeout=10):
+        '''
+        Reads all rows and cells of a table with one JavaScript call. Much faster than going through the rows and
+        cells with find_elements, which needs a WebDriver request for every cell.
+        :param table: WebElement|[WebElement]|str - table or tbody element, list of row elements, or a selector
+                                                     accompanied by "type" parameter
+        :param type: int|None - type of the table selector, comes from WebDriver By class
+        :param rows_css: str - CSS selector of the rows inside the table element
+        :param timeout: int - if type is set, maximum time in seconds to wait for the table to be visible
+        :return: helpers.table_snapshot.TableSnapshot - rows as dictionaries (element, id, classes, text, cells) with
+                                                        lookups by cell value
+        '''
+        if type is not None:
+            table = self.wait_until_visible(element=table, type=type, timeout=timeout)
+        return table_snapshot.get_snapshot(self.driver, table, rows_css=rows_css)
+
     def get_classes(self, element):
         """
         Returns element classes as a list
@@ -626,6 +767,8 @@ class MainController(AssertHelper):
         :param message: str - log message
         :return: None
         '''
+        # Use case numbers in log messages ("UC MEMBER_47 ...") mark the use case for timing spans
+        timing.tracer.set_use_case(message)
         print('{0} {1}'.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), message))
 
     def reset_page(self):
@@ -641,19 +784,20 @@ class MainController(AssertHelper):
         '''
         ActionChains(self.driver).double_click(element).perform()
 
+    @timing.timed('ui')
     def click(self, element, type=None, wait_until_clickable=True, timeout=60, wait_ajax=False, ajax_timeout=60):
         '''
         Clicks on a visible element and allows waiting for element to be enabled first.
         :param element: WebElement | str - element to be clicked on, or a selector accompanied by "type" parameter
         :param type: int|None - type of the element to be looked for, comes from WebDriver By class
         :param wait_until_clickable: bool - wait until element is clickable or not
-        :param wait_ajax: bool - wait until JQuery is finished
-        :param ajax_timeout: int - if wait_ajax is set, this is used as the JQuery timeout in seconds
+        :param wait_ajax: bool - wait until AJAX requests are finished and the page has settled
+        :param ajax_timeout: int - if wait_ajax is set, this is used as the settle timeout in seconds
         :return: WebElement - element that was found and clicked
         '''
         # If we need to wait for an ajax query to finish, do it
         if wait_ajax:
-            self.wait_jquery(timeout=ajax_timeout)
+            self.wait_settled(timeout=ajax_timeout)
 
         # If type is set, assume we need to look for the element first
         if type is not None:
@@ -20,6 +20,7 @@ class XroadAddCentralService(unittest.TestCase):
     Requires helper scenarios: xroad_configure_service_222, xroad_add_to_acl_218
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'ss1', 'ss2', 'wsdl'}
 
     def test_add_central_service_2_2_8(self):
         main = MainController(self)
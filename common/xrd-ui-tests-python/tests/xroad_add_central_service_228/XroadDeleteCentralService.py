@@ -15,6 +15,7 @@ class XroadDeleteCentralService(unittest.TestCase):
     Requires helper scenarios: xroad_configure_service_222, xroad_add_to_acl_218
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'ss1', 'ss2', 'wsdl'}
 
     def test_add_central_service_2_2_8(self):
         main = MainController(self)
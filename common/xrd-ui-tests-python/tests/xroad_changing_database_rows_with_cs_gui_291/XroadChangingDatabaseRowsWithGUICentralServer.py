@@ -23,6 +23,7 @@ class XroadChangingDatabaseRowsWithGUICentralServer(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'cs'}
 
     def test_changing_database_rows_with_cs_gui_2_9_1(self):
         main = MainController(self)
@@ -23,6 +23,7 @@ class XroadChangingDatabaseRowsWithGUISecurityServer(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ss1'}
 
     def test_changing_database_rows_with_ss_gui_2_10_1(self):
         main = MainController(self)
@@ -163,8 +163,7 @@ def user_1_actions(self, user, client):
 
     self.log('Click on OK')
     self.wait_until_visible(type=By.XPATH, element=popups.ADD_CLIENT_POPUP_OK_BTN_XPATH).click()
-    self.wait_jquery()
-    time.sleep(5)
+    self.wait_settled()
 
     # UC MEMBER_47 4, 5. System verifies new client
     self.log('MEMBER_47 4, 5. System verifies new client')
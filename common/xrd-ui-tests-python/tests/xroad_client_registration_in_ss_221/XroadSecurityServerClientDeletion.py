@@ -19,6 +19,7 @@ class XroadSecurityServerClientDeletion(unittest.TestCase):
     Requires helper scenarios: xroad_ss_client_certification_213
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'ca', 'ss1', 'ss2', 'global_groups'}
 
     def test_client_deletion(self):
         main = MainController(self)
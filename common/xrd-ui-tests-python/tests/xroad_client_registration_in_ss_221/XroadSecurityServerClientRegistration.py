@@ -27,6 +27,7 @@ class XroadSecurityServerClientRegistration(unittest.TestCase):
     Requires helper scenarios: xroad_ss_client_certification_213
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'ca', 'ss1', 'ss2', 'global_groups'}
 
     def test_client_registration(self):
         main = MainController(self)
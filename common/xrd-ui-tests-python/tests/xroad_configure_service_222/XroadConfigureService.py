@@ -30,6 +30,7 @@ class XroadConfigureService(unittest.TestCase):
     Requires helper scenarios: xroad_add_to_acl_218
     X-Road version: 6.16.0
     """
+    resources = {'ss2', 'wsdl'}
 
     def test_xroad_configure_service(self):
         main = MainController(self)
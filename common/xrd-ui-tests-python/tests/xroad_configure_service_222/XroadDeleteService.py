@@ -13,6 +13,7 @@ class XroadDeleteService(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ss2', 'wsdl'}
 
     def test_xroad_configure_service(self):
         main = MainController(self)
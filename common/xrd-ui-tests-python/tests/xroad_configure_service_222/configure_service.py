@@ -1,7 +1,6 @@
 # coding=utf-8
 
 import re
-import time
 import urllib
 
 from selenium.webdriver.common.by import By
@@ -854,8 +853,7 @@ def test_delete_service(case, client=None, client_name=None, client_id=None, wsd
         services_table = self.by_id(popups.CLIENT_DETAILS_POPUP_SERVICES_TABLE_ID)
         '''Wait until that table is visible (opened in a popup)'''
         self.wait_until_visible(services_table)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
         '''Find the service under the specified WSDL in service list 
         (and expand the WSDL services list if not open yet)'''''
         wsdl_element = clients_table_vm.client_services_popup_select_wsdl(self, wsdl_index=wsdl_index,
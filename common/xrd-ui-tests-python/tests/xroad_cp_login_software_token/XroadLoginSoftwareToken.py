@@ -33,7 +33,7 @@ class XroadLoginSoftwareToken(unittest.TestCase):
         '''
         commands = ['sudo su - xroad', cp_ssh_pass, 'signer-console ist', token_pin, token_pin, 'signer-console lt']
         main.log('Initializing software token with pin "{}"'.format(token_pin))
-        output = exec_commands(main, ssh_client, commands, timeout=3)
+        output = exec_commands(main, ssh_client, commands)
         main.log('Checking if token is initalized and in inactive state')
         main.is_true('Token: 0 (OK, writable, available, inactive)' in output)
         '''
@@ -65,7 +65,7 @@ class XroadLoginSoftwareToken(unittest.TestCase):
         '''
         commands = ['sudo su - xroad', cp_ssh_pass, 'signer-console li 0', str(token_pin), 'signer-console lt']
         main.log('CP_05 1-2. Logging in to software security token with pin "{}"'.format(token_pin))
-        output = exec_commands(main, ssh_client, commands, timeout=3)
+        output = exec_commands(main, ssh_client, commands)
         main.log('CP_05 3. System verifies the PIN code is correct and logs in to the token')
         main.log('Checking if software token is in "active" state')
         main.is_true('Token: 0 (OK, writable, available, active)' in output, msg='Software token not in "active" state')
@@ -29,7 +29,7 @@ class XroadLogoutSoftwareToken(unittest.TestCase):
         '''
         main.log('CP_07 1. CP administrator selects to log out of a token.')
         commands = ['sudo su - xroad', cp_ssh_pass, 'signer-console lo 0', 'signer-console lt']
-        output = exec_commands(main, ssh_client, commands, timeout=3)
+        output = exec_commands(main, ssh_client, commands)
 
         main.log('CP_07 2. System logs out of the token.')
         main.log('Checking if software token is in "inactive" state')
@@ -1,11 +1,10 @@
-import time
 import unittest
 
 from selenium.webdriver.common.by import By
 
 from helpers import xroad, ssh_client
 from helpers.auditchecker import AuditChecker
-from helpers.ssh_server_actions import refresh_ocsp
+from helpers.ssh_server_actions import refresh_ocsp, get_global_conf_hash, wait_for_global_conf
 from main.maincontroller import MainController
 from tests.xroad_configure_service_222.wsdl_validator_errors import wait_until_server_up
 from tests.xroad_cs_delete_member.deleting_in_cs import test_add_security_server_to_member
@@ -72,13 +71,15 @@ class deleteMemberSS(unittest.TestCase):
         test_activate_cert = activate_cert(main, ss_ssh_host, ss_ssh_user, ss_ssh_pass,
                                                                       registered=True)
         ss_ssh_client = ssh_client.SSHClient(ss_ssh_host, ss_ssh_user, ss_ssh_pass)
+        conf_version = None
         try:
             main.reload_webdriver(cs_host, cs_user, cs_pass)
+            conf_version = get_global_conf_hash(ss_ssh_client)
             delete_ss()
         finally:
             main.log('Restoring security server')
             main.log('Waiting until servers synced')
-            time.sleep(120)
+            wait_for_global_conf(ss_ssh_client, previous_hash=conf_version, timeout=120, log=main.log)
             main.log('Refresh security server ocsp and cert statuses')
             refresh_ocsp(ss_ssh_client)
             main.log('Wait until server is up again')
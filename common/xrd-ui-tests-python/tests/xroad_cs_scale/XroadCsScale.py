@@ -0,0 +1,104 @@
+import time
+import unittest
+
+from helpers import ssh_client, xroad
+from helpers.cs_db_seeder import CsDatabaseSeeder
+from main.maincontroller import MainController
+from tests.xroad_cs_scale import cs_scale
+
+
+class XroadCsScale(unittest.TestCase):
+    '''
+    Scale test of the central server. Seeds members, subsystems, security servers and global group memberships
+    directly into the central server database (or a local PostgreSQL stand-in) at the levels set in
+    configuration (cs_scale.levels, by default 1 000, 10 000 and 100 000 members) and at every level measures:
+    - database queries behind the members table: paging, search, count, member details, global group;
+    - central server UI: opening the members table, paging, search, opening member details;
+    - time until the seeded members are in the generated global configuration.
+    Seeded rows are removed at the end (cs_scale.cleanup).
+    '''
+
+    def test_cs_scale(self):
+        main = MainController(self)
+
+        # Set test name and number
+        main.test_number = 'CS_SCALE'
+        main.test_name = self.__class__.__name__
+
+        cs_host = main.config.get('cs.host')
+        cs_user = main.config.get('cs.user')
+        cs_pass = main.config.get('cs.pass')
+        cs_ssh_host = main.config.get('cs.ssh_host')
+        cs_ssh_user = main.config.get('cs.ssh_user')
+        cs_ssh_pass = main.config.get('cs.ssh_pass')
+
+        client = xroad.split_xroad_id(main.config.get('ss1.client_id'))
+        levels = [int(level) for level in main.config.get_string('cs_scale.levels', '1000,10000,100000').split(',')]
+        standin_db_host = main.config.get_string('cs_scale.standin_db_host', '')
+        run_ui = main.config.get_bool('cs_scale.ui', True) and not standin_db_host
+        conf_timeout = main.config.get_int('cs_scale.conf_timeout', 300)
+        cleanup = main.config.get_bool('cs_scale.cleanup', True)
+
+        db_user = main.config.get('xroad.centerui_db_user')
+        db_pass = main.config.get('xroad.centerui_db_pass')
+
+        sshclient = None
+        seeder = None
+        results = []
+        try:
+            if not standin_db_host:
+                # The database user is not an operating system user on the central server: create it for the run
+                # the same way as the database row tests do, and connect as it
+                cs_scale.add_database_user(cs_ssh_host, cs_ssh_user, cs_ssh_pass, db_user, db_pass)
+                sshclient = ssh_client.SSHClient(cs_ssh_host, username=db_user, password=db_pass)
+            seeder = CsDatabaseSeeder(sshclient, db_user=db_user, db_name=main.config.get('xroad.centerui_db_name'),
+                                      instance=main.config.get_string('cs_scale.instance', '') or client['instance'],
+                                      member_class=main.config.get_string('cs_scale.member_class', '') or
+                                      client['class'],
+                                      prefix=main.config.get_string('cs_scale.prefix', 'SCALE'),
+                                      subsystems=main.config.get_int('cs_scale.subsystems_per_member', 1),
+                                      members_per_server=main.config.get_int('cs_scale.members_per_server', 10),
+                                      group_code=main.config.get_string('cs_scale.group_code', 'SCALEGROUP'),
+                                      db_host=standin_db_host or None, log=main.log)
+            if standin_db_host:
+                seeder.create_schema()
+            if run_ui:
+                main.reload_webdriver(url=cs_host, username=cs_user, password=cs_pass)
+
+            for level in levels:
+                main.log('Scale level: {0} members'.format(level))
+                start_time = time.time()
+                seeder.seed(level)
+                steps = {'seed': [(time.time() - start_time) * 1000]}
+                steps.update(('db_' + name, times) for name, times in seeder.benchmark_queries(level).items())
+
+                member_code = seeder.get_member_code(level)
+                if run_ui:
+                    ui_results = cs_scale.test_members_ui(main,
+                                                          member_code=seeder.get_member_code(max(1, level // 2)))()
+                    steps.update(('ui_' + name, times) for name, times in ui_results.items())
+                if conf_timeout and not standin_db_host:
+                    conf_time = cs_scale.wait_conf_generation(cs_ssh_host, cs_ssh_user, cs_ssh_pass, member_code,
+                                                              timeout=conf_timeout, log=main.log)
+                    steps['conf_generation'] = [conf_time * 1000] if conf_time is not None else []
+                results.append((level, steps))
+
+            for line in cs_scale.get_report(results):
+                main.log(line)
+        except:
+            main.log('XroadCsScale: scale test failed')
+            main.save_exception_data()
+            assert False
+        finally:
+            try:
+                if cleanup and seeder is not None:
+                    seeder.cleanup()
+            finally:
+                try:
+                    if sshclient is not None:
+                        sshclient.close()
+                    if not standin_db_host:
+                        cs_scale.delete_database_user(cs_ssh_host, cs_ssh_user, cs_ssh_pass, db_user)
+                finally:
+                    # Test teardown
+                    main.tearDown()
@@ -0,0 +1,167 @@
+import time
+
+from selenium.webdriver.common.by import By
+
+from helpers import ssh_client, ssh_server_actions, ssh_user_actions
+from view_models import sidebar, members_table, popups
+
+# Directory where the central server keeps the global configuration it has generated
+CS_GENERATED_CONF_DIR = '/var/lib/xroad/public'
+
+
+def measure(self, results, name, action):
+    '''
+    Runs a UI action, waits for the page to settle and saves the time it took.
+    :param self: MainController object
+    :param results: dict - {step name: [milliseconds]}
+    :param name: str - step name
+    :param action: function - action to run
+    :return: float - milliseconds
+    '''
+    start_time = time.time()
+    action()
+    self.wait_settled()
+    elapsed = (time.time() - start_time) * 1000
+    results.setdefault(name, []).append(elapsed)
+    self.log('{0}: {1:.0f} ms'.format(name, elapsed))
+    return elapsed
+
+
+def test_members_ui(case, member_code, pages=5, repeat=3):
+    '''
+    MainController test function. Measures the members view of the central server: opening the table, paging, search
+    and opening the member details.
+    :param case: MainController object
+    :param member_code: str - code of a member to search for and open
+    :param pages: int - number of pages to move forward
+    :param repeat: int - number of times search and details are measured
+    :return: function - test function returning {step name: [milliseconds]}
+    '''
+    self = case
+
+    def open_members():
+        self.wait_until_visible(type=By.CSS_SELECTOR, element=sidebar.MEMBERS_CSS).click()
+        self.wait_until_visible(type=By.ID, element=members_table.MEMBERS_TABLE_ID)
+
+    def next_page():
+        self.by_id(members_table.MEMBERS_TABLE_NEXT_PAGE_BTN_ID).click()
+
+    def search():
+        self.input(self.by_css(members_table.MEMBERS_TABLE_SEARCH_CSS), member_code)
+
+    def open_details():
+        rows = self.table_snapshot(members_table.MEMBERS_TABLE_ID, type=By.ID)
+        row = rows.find_row(2, member_code)
+        if row is None:
+            raise RuntimeError('Member {0} not found in members table'.format(member_code))
+        row['element'].click()
+        self.by_id(members_table.MEMBERS_DETATILS_BTN_ID).click()
+
+    def members_ui():
+        results = {}
+        self.log('Open members table')
+        measure(self, results, 'open_members', open_members)
+
+        self.log('Move forward {0} pages'.format(pages))
+        for _ in range(pages):
+            next_buttons = self.driver.find_elements_by_id(members_table.MEMBERS_TABLE_NEXT_PAGE_BTN_ID)
+            if not next_buttons or 'disabled' in (next_buttons[0].get_attribute('class') or ''):
+                # No paging or already on the last page
+                break
+            measure(self, results, 'next_page', next_page)
+
+        for _ in range(repeat):
+            self.log('Search member {0}'.format(member_code))
+            measure(self, results, 'search', search)
+            self.log('Open member details')
+            measure(self, results, 'member_details', open_details)
+            popups.close_all_open_dialogs(self)
+        return results
+
+    return members_ui
+
+
+def add_database_user(ssh_host, ssh_username, ssh_password, username, password):
+    '''
+    Creates the central server database user as an operating system user, so that the seeder can log in with SSH and
+    run psql as it.
+    :param ssh_host: str - central server SSH host
+    :param ssh_username: str - SSH user with sudo rights
+    :param ssh_password: str - SSH password
+    :param username: str - database user name
+    :param password: str - database user password
+    :return: None
+    '''
+    client = ssh_client.SSHClient(ssh_host, username=ssh_username, password=ssh_password)
+    try:
+        ssh_user_actions.add_user(client, username, password)
+    finally:
+        client.close()
+
+
+def delete_database_user(ssh_host, ssh_username, ssh_password, username):
+    '''
+    Deletes the operating system user created by add_database_user.
+    :param ssh_host: str - central server SSH host
+    :param ssh_username: str - SSH user with sudo rights
+    :param ssh_password: str - SSH password
+    :param username: str - database user name
+    :return: None
+    '''
+    client = ssh_client.SSHClient(ssh_host, username=ssh_username, password=ssh_password)
+    try:
+        ssh_user_actions.delete_user(client, username=username)
+    finally:
+        client.close()
+
+
+def wait_conf_generation(ssh_host, ssh_username, ssh_password, member_code, timeout=300, log=None):
+    '''
+    Waits until the global configuration generated by the central server contains the member.
+    :param ssh_host: str - central server SSH host
+    :param ssh_username: str - SSH username
+    :param ssh_password: str - SSH password
+    :param member_code: str - code of the member to look for
+    :param timeout: int - maximum time in seconds to wait
+    :param log: function|None - logging function
+    :return: float|None - seconds until the member appeared; None on timeout
+    '''
+    client = ssh_client.SSHClient(ssh_host, username=ssh_username, password=ssh_password)
+    start_time = time.time()
+    try:
+        found = ssh_server_actions.wait_for_global_conf(client, contains='<memberCode>{0}</memberCode>'.format(
+            member_code), timeout=timeout, interval=2, conf_dir=CS_GENERATED_CONF_DIR, log=log)
+    finally:
+        client.close()
+    return time.time() - start_time if found else None
+
+
+def median(values):
+    '''
+    Returns the median of the values.
+    :param values: [float]
+    :return: float|None
+    '''
+    if not values:
+        return None
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def get_report(results):
+    '''
+    Formats the measurements of all levels as a table.
+    :param results: [(int, dict)] - (number of members, {step name: [milliseconds]}) for every level
+    :return: [str] - report lines
+    '''
+    lines = ['{0:>8} {1:<24} {2:>6} {3:>12} {4:>12}'.format('members', 'step', 'count', 'median ms', 'max ms')]
+    for level, steps in results:
+        for name in sorted(steps):
+            values = steps[name]
+            if values:
+                lines.append('{0:>8} {1:<24} {2:>6} {3:>12.1f} {4:>12.1f}'.format(level, name, len(values),
+                                                                                  median(values), max(values)))
+            else:
+                lines.append('{0:>8} {1:<24} {2:>6} {3:>12} {4:>12}'.format(level, name, 0, '-', '-'))
+    return lines
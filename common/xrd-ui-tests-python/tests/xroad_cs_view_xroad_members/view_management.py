@@ -314,20 +314,17 @@ def test_view_member_management_requests(case):
                                 element=members_table.MANAGEMENT_REQUESTS_TAB).click()
         self.wait_jquery()
 
-        '''Get member details table'''
-        table = self.wait_until_visible(type=By.XPATH, element=members_table.MEMBER_MANAGEMENT_TABLE_XPATH)
-
         '''Verify that first Request ID is clickable'''
         request_id = self.wait_until_visible(type=By.XPATH, element="//a[@class='open_details']").is_enabled()
         self.is_true(request_id,
                      msg='"View of request detatails is not enabled')
 
+        '''Get member details table'''
+        table = self.table_snapshot(members_table.MEMBER_MANAGEMENT_TABLE_XPATH, type=By.XPATH, rows_css='tr')
+
 
         '''Get latest request details'''
-        request_id = table.find_elements_by_tag_name('td')[0].text
-        request_type = table.find_elements_by_tag_name('td')[1].text
-        created = table.find_elements_by_tag_name('td')[2].text
-        status = table.find_elements_by_tag_name('td')[3].text
+        request_id, request_type, created, status = table[0]['cells'][:4]
 
         self.log('UC MEMBER_09: 2. System displays the identifier of the request')
 
@@ -19,6 +19,7 @@ class XroadDeactivateWsdl(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ss2', 'wsdl'}
 
     def test_deactivate_wsdl(self):
         main = MainController(self)
@@ -1,7 +1,6 @@
-import time
 import unittest
 
-from helpers import xroad, auditchecker
+from helpers import xroad, auditchecker, ssh_server_actions
 from main.maincontroller import MainController
 from tests.xroad_client_registration_in_ss_221.client_registration_in_ss import add_client_to_ss, \
     add_sub_as_client_to_member
@@ -24,6 +23,9 @@ class testDeclineRegistrationRequest(unittest.TestCase):
         ss_user = main.config.get('ss1.user')
         ss_pass = main.config.get('ss1.pass')
         server_name = main.config.get('ss1.server_name')
+        ss_ssh_host = main.config.get('ss1.ssh_host')
+        ss_ssh_user = main.config.get('ss1.ssh_user')
+        ss_ssh_pass = main.config.get('ss1.ssh_pass')
 
         cs_host = main.config.get('cs.host')
         cs_user = main.config.get('cs.user')
@@ -44,7 +46,11 @@ class testDeclineRegistrationRequest(unittest.TestCase):
             main.log('MEMBER_56 Adding new subsystem to the member')
             add_subsystem_to_member(main, member=member)
 
-            time.sleep(120)
+            # Wait until the new subsystem has reached the security server
+            ssh_server_actions.wait_for_global_conf_update(
+                ss_ssh_host, ss_ssh_user, ss_ssh_pass,
+                contains='<subsystemCode>{0}</subsystemCode>'.format(member['subsystem_code']), timeout=120,
+                log=main.log)
             main.reload_webdriver(ss_host, ss_user, ss_pass)
             add_client_to_ss(main, member)
             certify_client_in_ss(main, ss_host, ss_user, ss_pass, member)
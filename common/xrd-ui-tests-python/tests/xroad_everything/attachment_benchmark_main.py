@@ -0,0 +1,92 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import os
+import unittest
+
+from helpers import attachment_benchmark, mock_service, soap_load_runner, soaptestclient, ssh_client
+from main.maincontroller import MainController
+
+
+class TestAttachmentBenchmark(unittest.TestCase):
+    '''
+    Attachment benchmark: sends requests with attachments from 1 MB to 2 GB (multipart/related, SOAP with attachments
+    or MTOM, streamed from disk) to the mockSwaRef or mockMtom operation of mock/service_wsdl/mock.wsdl through the
+    security server. Throughput and the peak memory use of the client and the security server proxies are saved as
+    CSV. Settings are in the [attachment_benchmark] section of the configuration.
+    '''
+
+    @staticmethod
+    def get_path(path):
+        '''
+        Returns the absolute path of a result file and creates its directory.
+        :param path: str - path relative to the tests root or absolute
+        :return: str - absolute path
+        '''
+        if not os.path.isabs(path):
+            path = os.path.join(MainController.main_path, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        return path
+
+    def test_attachments(self):
+        config = MainController.config
+        mtom = config.get_bool('attachment_benchmark.mtom', False)
+
+        url = config.get_string('attachment_benchmark.url', '') or config.get('ss1.service_path')
+        client_id = config.get_string('attachment_benchmark.client_id', '') or config.get('ss1.client_id')
+        service_id = config.get_string('attachment_benchmark.service_id', '') or '{0} : {1}'.format(
+            config.get('ss2.client_id'), 'mockMtom.v1' if mtom else 'mockSwaRef.v1')
+        params = soap_load_runner.get_params(client_id, service_id,
+                                             protocol_version=config.get_string('services.xroad_protocol', '4.0'),
+                                             issue=str(config.get('services.xroad_issue', '12345')),
+                                             user_id=config.get_string('services.xroad_userid', 'EE12345678901'))
+        params['requestBody'] = config.get_string('attachment_benchmark.request_body', '')
+
+        query_dir = config.get_string('config.query_dir', 'mock/queries')
+        template = soaptestclient.load_template(os.path.join(
+            MainController.main_path, query_dir, config.get_string('attachment_benchmark.request_template_filename',
+                                                                   'attachment.xml'))).text
+
+        # Proxy memory of the security servers, polled over SSH
+        monitors = []
+        for server in config.get_string('attachment_benchmark.memory_servers', '').split(','):
+            server = server.strip()
+            if not server:
+                continue
+            ssh = ssh_client.SSHClient(config.get('{0}.ssh_host'.format(server)),
+                                       username=config.get('{0}.ssh_user'.format(server)),
+                                       password=config.get('{0}.ssh_pass'.format(server)))
+            monitors.append(attachment_benchmark.MemoryMonitor(server, attachment_benchmark.get_ssh_memory(
+                ssh, config.get_string('attachment_benchmark.memory_command',
+                                       attachment_benchmark.PROXY_MEMORY_COMMAND)),
+                interval=config.get_float('attachment_benchmark.memory_interval', 1.0)))
+
+        sizes = [mock_service.parse_size(size) for size in
+                 config.get_string('attachment_benchmark.sizes', '1MB,10MB,100MB,1GB,2GB').split(',')]
+        directory = os.path.join(MainController.main_path,
+                                 config.get_string('attachment_benchmark.directory', 'temp/attachments'))
+        csv_file = self.get_path(config.get_string('attachment_benchmark.results_csv', 'temp/attachment_benchmark.csv'))
+
+        timeout = config.get_float('attachment_benchmark.timeout', 900)
+        client = soaptestclient.SoapTestClient(url=url, query_timeout=timeout, mtom=mtom, share_session=False)
+        benchmark = attachment_benchmark.AttachmentBenchmark(
+            client, template, params, sizes=sizes, repeat=config.get_int('attachment_benchmark.repeat', 3),
+            directory=directory, monitors=monitors,
+            check_response=config.get_bool('attachment_benchmark.check_response', True))
+        print('Attachment benchmark of {0}: {1} to {2}'.format(url, client_id, service_id))
+        try:
+            benchmark.run()
+        finally:
+            client.close()
+        for line in benchmark.report():
+            print(line)
+        benchmark.export_csv(csv_file)
+        print('Results saved to {0}'.format(csv_file))
+
+        self.assertTrue(all(result['successful'] for result in benchmark.results),
+                        'No successful requests with some attachment sizes')
+
+
+if __name__ == '__main__':
+    unittest.main()
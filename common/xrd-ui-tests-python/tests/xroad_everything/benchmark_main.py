@@ -0,0 +1,52 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import fnmatch
+import os
+import unittest
+
+from helpers.suite_benchmark import SuiteBenchmark, TimingHistory, find_test_classes
+from main.maincontroller import MainController
+
+
+class TestBenchmark(unittest.TestCase):
+    '''
+    Runs the use case test classes (tests/*/Xroad*.py) one by one and records the time of every test with a breakdown
+    into UI, SSH, SOAP, audit log and sleep time into a SQLite history. Tests that take longer than the rolling median
+    of their earlier runs plus the threshold are reported as regressions. Settings are in the [benchmark] section of
+    the configuration.
+    '''
+
+    def test_benchmark(self):
+        config = MainController.config
+        tests_dir = os.path.join(MainController.main_path, 'tests')
+        history_file = config.get_string('benchmark.history', 'temp/benchmark_history.sqlite')
+        if not os.path.isabs(history_file):
+            history_file = os.path.join(MainController.main_path, history_file)
+        if not os.path.isdir(os.path.dirname(history_file)):
+            os.makedirs(os.path.dirname(history_file))
+
+        # Test classes to run and to leave out, as comma-separated patterns of "module.ClassName"
+        include = [p.strip() for p in config.get_string('benchmark.tests', '*').split(',') if p.strip()]
+        exclude = [p.strip() for p in config.get_string('benchmark.exclude', '').split(',') if p.strip()]
+        tests = [test for test in find_test_classes(tests_dir) if any(fnmatch.fnmatch(test, p) for p in include) and
+                 not any(fnmatch.fnmatch(test, p) for p in exclude)]
+
+        history = TimingHistory(history_file)
+        try:
+            benchmark = SuiteBenchmark(tests, history, label=config.get_string('benchmark.label', '') or None,
+                                       threshold=float(config.get('benchmark.threshold', 0.2)),
+                                       window=config.get_int('benchmark.window', 10),
+                                       min_runs=config.get_int('benchmark.min_runs', 3))
+            benchmark.run()
+        finally:
+            history.close()
+
+        for line in benchmark.report():
+            print(line)
+        if config.get_bool('benchmark.fail_on_regression', False):
+            self.assertFalse(benchmark.regressions(), 'Some of the tests are slower than before')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import os
+import unittest
+
+from helpers import fan_out_runner, soaptestclient
+from main.maincontroller import MainController
+
+
+class TestFanOut(unittest.TestCase):
+    '''
+    Multi-server fan-out: sends the mock/queries/service.xml workload to the consumer_proxy of every security server in
+    the [fanout] section of the configuration at the same time and compares the latency percentiles and errors of the
+    servers, flagging the ones that are much slower than the others. The comparison is saved as CSV and the latency
+    histograms by server as JSON.
+    '''
+
+    @staticmethod
+    def get_path(path):
+        '''
+        Returns the absolute path of a result file and creates its directory.
+        :param path: str - path relative to the tests root or absolute
+        :return: str - absolute path
+        '''
+        if not os.path.isabs(path):
+            path = os.path.join(MainController.main_path, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        return path
+
+    def test_fan_out(self):
+        config = MainController.config
+
+        servers = fan_out_runner.get_servers(config, get_path=lambda path: os.path.join(MainController.main_path,
+                                                                                         path))
+        query_dir = config.get_string('config.query_dir', 'mock/queries')
+        template = soaptestclient.load_template(os.path.join(
+            MainController.main_path, query_dir, config.get_string('fanout.request_template_filename',
+                                                                   'service.xml'))).text
+        jtl_file = config.get_string('fanout.jtl_file', '')
+        json_file = self.get_path(config.get_string('fanout.statistics_json', 'temp/fanout.json'))
+        csv_file = self.get_path(config.get_string('fanout.comparison_csv', 'temp/fanout.csv'))
+
+        runner = fan_out_runner.FanOutRunner(
+            servers, template,
+            config.get_string('fanout.request_body', '') or config.get('services.testservice_request_body'),
+            response_contains=config.get_string('fanout.response_contains', '') or None,
+            threads=config.get_int('fanout.threads', 5), duration=config.get_float('fanout.duration', 30),
+            rampup=config.get_float('fanout.rampup', 5), timeout=config.get_float('fanout.timeout', 90),
+            slow_factor=config.get_float('fanout.slow_factor', 1.5),
+            protocol_version=config.get_string('services.xroad_protocol', '4.0'),
+            issue=str(config.get('services.xroad_issue', '12345')),
+            user_id=config.get_string('services.xroad_userid', 'EE12345678901'),
+            jtl_file=self.get_path(jtl_file) if jtl_file else None)
+        for server in servers:
+            print('{0}: {1}, {2} to {3}'.format(server.name, server.url, server.client_id, server.service_id))
+        runner.run()
+        for line in runner.report():
+            print(line)
+        runner.statistics.export_json(json_file)
+        runner.export_csv(csv_file)
+        print('Results saved to {0} and {1}'.format(csv_file, json_file))
+
+        if config.get_bool('fanout.fail_on_slow', False):
+            self.assertEqual(runner.slow_servers(), [], 'Slow security servers')
+
+
+if __name__ == '__main__':
+    unittest.main()
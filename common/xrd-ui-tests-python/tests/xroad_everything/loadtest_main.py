@@ -0,0 +1,74 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import os
+import unittest
+
+from helpers import soap_load_runner, soaptestclient
+from main.maincontroller import MainController
+
+
+class TestLoad(unittest.TestCase):
+    '''
+    SOAP load test, the Python version of the JMeter test in common/xrd-jmeter-tests. Runs a warm-up phase and the main
+    phase with ramp-up and writes every request to a JMeter CSV result (JTL) file. Latency percentiles, throughput over
+    time and error rates per fault code of every phase are saved as JSON (with mergeable histograms) and CSV. Settings
+    are in the [loadtest] section of the configuration and use the same names as the JMeter test parameters.
+    '''
+
+    @staticmethod
+    def get_path(path):
+        '''
+        Returns the absolute path of a result file and creates its directory.
+        :param path: str - path relative to the tests root or absolute
+        :return: str - absolute path
+        '''
+        if not os.path.isabs(path):
+            path = os.path.join(MainController.main_path, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        return path
+
+    def test_load(self):
+        config = MainController.config
+
+        if config.get_string('loadtest.host', ''):
+            url = soap_load_runner.get_url(config.get_string('loadtest.proto', 'http'), config.get('loadtest.host'),
+                                           config.get('loadtest.port', 80), config.get_string('loadtest.path', '/'))
+        else:
+            url = config.get('ss1.service_path')
+
+        client_id = config.get_string('loadtest.client_id', '') or config.get('ss1.client_id')
+        service_id = config.get_string('loadtest.service_id', '') or '{0} : {1}'.format(
+            config.get('ss2.client_id'), config.get('services.test_service'))
+        params = soap_load_runner.get_params(client_id, service_id,
+                                             protocol_version=config.get_string('services.xroad_protocol', '4.0'),
+                                             issue=str(config.get('services.xroad_issue', '12345')),
+                                             user_id=config.get_string('services.xroad_userid', 'EE12345678901'))
+
+        query_dir = config.get_string('config.query_dir', 'mock/queries')
+        template = soaptestclient.load_template(os.path.join(
+            MainController.main_path, query_dir, config.get_string('loadtest.request_template_filename',
+                                                                   'loadtest.xml'))).text
+
+        jtl_file = self.get_path(config.get_string('loadtest.jtl_file', 'temp/loadtest.jtl'))
+        json_file = self.get_path(config.get_string('loadtest.statistics_json', 'temp/loadtest.json'))
+        csv_file = self.get_path(config.get_string('loadtest.statistics_csv', 'temp/loadtest.csv'))
+
+        phases = soap_load_runner.get_phases(config, config.get('services.testservice_request_body'))
+        runner = soap_load_runner.LoadRunner(url, template, params, phases, jtl_file=jtl_file,
+                                             timeout=config.get_float('loadtest.timeout', 90))
+        print('Load test of {0}: {1} to {2}'.format(url, client_id, service_id))
+        results = runner.run()
+        runner.statistics.export_json(json_file)
+        runner.statistics.export_csv(csv_file)
+        for line in runner.statistics.report():
+            print(line)
+        print('Results saved to {0}, {1} and {2}'.format(jtl_file, json_file, csv_file))
+
+        main_result = results[-1][1]
+        self.assertGreater(main_result.successful, 0, 'No successful requests in the main phase')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import unittest
+
+from tests.xroad_everything import parallel_main
+
+
+class Test2_1_2_9Parallel(unittest.TestCase):
+    '''
+    Runs the tests of test_2_1-2_9.py in parallel worker processes, see parallel_main.py.
+    '''
+
+    def test_all(self):
+        parallel_main.run_suite(self, parallel_main.SUITE_2_1_2_9)
+
+
+if __name__ == '__main__':
+    unittest.main()
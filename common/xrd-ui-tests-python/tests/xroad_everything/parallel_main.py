@@ -0,0 +1,110 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import unittest
+
+from helpers import ssh_server_actions
+from helpers.suite_scheduler import SuiteEntry, SuiteScheduler
+from main.maincontroller import MainController
+
+
+def get_ss1_conf_version():
+    '''
+    Saves the global configuration version of security server 1 to detect when the changes have reached it.
+    :return: str - global configuration hash
+    '''
+    config = MainController.config
+    return ssh_server_actions.get_global_conf_version(config.get('ss1.ssh_host'), config.get('ss1.ssh_user'),
+                                                      config.get('ss1.ssh_pass'))
+
+
+def wait_ss1_conf_update(conf_version):
+    '''
+    Waits up to 120 seconds until the global configuration of security server 1 has changed.
+    :param conf_version: str - global configuration hash before the changes
+    :return: None
+    '''
+    config = MainController.config
+    print('Waiting up to 120 seconds for changes')
+    ssh_server_actions.wait_for_global_conf_update(config.get('ss1.ssh_host'), config.get('ss1.ssh_user'),
+                                                   config.get('ss1.ssh_pass'), previous_hash=conf_version, timeout=120)
+
+
+# Same tests as in test_main.py. Every test class declares the resources (servers, shared data) it changes in its
+# "resources" attribute; "wsdl" is the test service host.
+CLIENT_REGISTRATION = 'tests.xroad_client_registration_in_ss_221.XroadSecurityServerClientRegistration.' \
+                      'XroadSecurityServerClientRegistration'
+CONFIGURE_SERVICE = 'tests.xroad_configure_service_222.XroadConfigureService.XroadConfigureService'
+REFRESH_WSDL = 'tests.xroad_refresh_wsdl_225.XroadRefreshWsdl.XroadRefreshWsdl'
+DEACTIVATE_WSDL = 'tests.xroad_deactivate_wsdl_226.XroadDeactivateWsdl.XroadDeactivateWsdl'
+LOCAL_TLS = 'tests.xroad_tls_227.XroadLocalTls.XroadLocalTls'
+DELETE_LOCAL_TLS = 'tests.xroad_tls_227.XroadDeleteLocalTls.XroadDeleteLocalTls'
+ADD_CENTRAL_SERVICE = 'tests.xroad_add_central_service_228.XroadAddCentralService.XroadAddCentralService'
+MEMBER_ACCESS = 'tests.xroad_member_access_229.XroadMemberAccess.XroadMemberAccess'
+DELETE_CENTRAL_SERVICE = 'tests.xroad_add_central_service_228.XroadDeleteCentralService.XroadDeleteCentralService'
+DELETE_SERVICE = 'tests.xroad_configure_service_222.XroadDeleteService.XroadDeleteService'
+CLIENT_DELETION = 'tests.xroad_client_registration_in_ss_221.XroadSecurityServerClientDeletion.' \
+                  'XroadSecurityServerClientDeletion'
+
+SUITE = [
+    SuiteEntry('test_01_xroad_security_server_client_registration', CLIENT_REGISTRATION),
+    SuiteEntry('test_02_xroad_configure_service', CONFIGURE_SERVICE),
+    SuiteEntry('test_03_xroad_refresh_wsdl', REFRESH_WSDL),
+    SuiteEntry('test_04_xroad_deactivate_wsdl', DEACTIVATE_WSDL),
+    SuiteEntry('test_05_xroad_Local_tls', LOCAL_TLS),
+    SuiteEntry('test_06_xroad_delete_local_tls', DELETE_LOCAL_TLS),
+    SuiteEntry('test_07_xroad_add_central_service', ADD_CENTRAL_SERVICE),
+    SuiteEntry('test_08_xroad_member_access', MEMBER_ACCESS),
+    SuiteEntry('test_09_xroad_delete_central_service', DELETE_CENTRAL_SERVICE),
+    SuiteEntry('test_10_xroad_delete_service', DELETE_SERVICE),
+    SuiteEntry('test_11_xroad_security_server_client_deletion', CLIENT_DELETION,
+               before=get_ss1_conf_version, after=wait_ss1_conf_update),
+    SuiteEntry('test_12_xroad_changing_database_rows_with_gui_in_central_server',
+               'tests.xroad_changing_database_rows_with_cs_gui_291.XroadChangingDatabaseRowsWithGUICentralServer.'
+               'XroadChangingDatabaseRowsWithGUICentralServer'),
+    SuiteEntry('test_13_xroad_changing_database_rows_with_gui_in_security_server',
+               'tests.xroad_changing_database_rows_with_ss_gui_2101.XroadChangingDatabaseRowsWithGUISecurityServer.'
+               'XroadChangingDatabaseRowsWithGUISecurityServer'),
+    SuiteEntry('test_14_xroad_logging_in_central_server',
+               'tests.xroad_logging_in_cs_2111.XroadCsLogging.XroadLoggingInCentralServer'),
+    SuiteEntry('test_15_XroadLoggingInSecurityServer',
+               'tests.xroad_logging_service_ss_2112.XroadSsLogging.XroadLoggingInSecurityServer'),
+    SuiteEntry('test_16_security_server_client_registration_failures',
+               'tests.xroad_ss_client_certification_213.XroadSecurityServerClientRegistrationFailures.'
+               'XroadSecurityServerClientRegistrationFailures'),
+]
+
+# Same tests as in test_2_1-2_9.py: scenarios 2.2.1-2.2.9 and their undo steps. Nothing runs after the client
+# deletion, so there is no need to wait for the global configuration to change.
+SUITE_2_1_2_9 = SUITE[:10] + [SuiteEntry('test_11_xroad_security_server_client_deletion', CLIENT_DELETION)]
+
+
+def run_suite(case, suite):
+    '''
+    Runs the suite in parallel, prints the report and fails the test case if any of the tests failed. Number of workers
+    is set in configuration (config.parallel_workers).
+    :param case: unittest.TestCase - test case that runs the suite
+    :param suite: [SuiteEntry] - tests in the sequential order
+    :return: None
+    '''
+    workers = MainController.config.get_int('config.parallel_workers', 4)
+    scheduler = SuiteScheduler(suite, workers=workers)
+    scheduler.run()
+    for line in scheduler.report():
+        print(line)
+    case.assertTrue(scheduler.successful(), 'Some of the tests failed')
+
+
+class TestAllParallel(unittest.TestCase):
+    '''
+    Runs the tests of test_main.py in parallel worker processes. Tests that do not share any resources run at the same
+    time; the others run in the same order as in test_main.py. Number of workers is set in configuration
+    (config.parallel_workers).
+    '''
+
+    def test_all(self):
+        run_suite(self, SUITE)
+
+
+if __name__ == '__main__':
+    unittest.main()
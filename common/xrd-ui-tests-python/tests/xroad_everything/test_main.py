@@ -1,7 +1,6 @@
 # coding=utf-8
 from __future__ import absolute_import
 
-import time
 import unittest
 
 
@@ -152,15 +151,23 @@ class TestAll(unittest.TestCase):
     def test_11_xroad_security_server_client_deletion(self):
         from tests.xroad_client_registration_in_ss_221.XroadSecurityServerClientDeletion import \
             XroadSecurityServerClientDeletion
+        from main.maincontroller import MainController
+        from helpers import ssh_server_actions
         print('\n test_11_xroad_security_server_client_deletion STARTED\n')
+
+        # Save the global configuration version of security server 1 to detect when the changes have reached it
+        config = MainController.config
+        ss1_ssh = (config.get('ss1.ssh_host'), config.get('ss1.ssh_user'), config.get('ss1.ssh_pass'))
+        conf_version = ssh_server_actions.get_global_conf_version(*ss1_ssh)
+
         suite = unittest.TestLoader().loadTestsFromTestCase(XroadSecurityServerClientDeletion)
         ret = unittest.TextTestRunner().run(suite)
         if len(ret.failures) > 0:
             assert False
         elif len(ret.errors) > 0:
             assert False
-        print('Waiting 120 seconds for changes')
-        time.sleep(120)
+        print('Waiting up to 120 seconds for changes')
+        ssh_server_actions.wait_for_global_conf_update(*ss1_ssh, previous_hash=conf_version, timeout=120)
         print('\n test_11_xroad_security_server_client_deletion FINISHED')
         del XroadSecurityServerClientDeletion
         return
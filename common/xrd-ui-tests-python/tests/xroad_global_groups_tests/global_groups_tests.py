@@ -48,6 +48,10 @@ def add_member_to_group(self, client, group, ss2_host, ss2_user, ss2_pass,
     current_log_lines = None
     if log_checker is not None:
         current_log_lines = log_checker.get_line_count()
+    if testclient is not None:
+        # Save the global configuration version of the service provider to detect when group membership has reached it
+        ss2_ssh = (self.config.get('ss2.ssh_host'), self.config.get('ss2.ssh_user'), self.config.get('ss2.ssh_pass'))
+        conf_version = ssh_server_actions.get_global_conf_version(*ss2_ssh)
     subject_list = ['GLOBALGROUP : {0} : {1}'.format(identifier, group)]
     client_name = client['name']
     client_subsystem = client['subsystem']
@@ -87,7 +91,8 @@ def add_member_to_group(self, client, group, ss2_host, ss2_user, ss2_pass,
                                                                   allow_remove_all=False,
                                                                   remove_current=True)
         self.log('Wait until servers synced')
-        time.sleep(120)
+        ssh_server_actions.wait_for_global_conf_update(*ss2_ssh, previous_hash=conf_version, timeout=120,
+                                                       log=self.log)
         self.log('Add global group to {0} service ACL'.format(service_name))
         self.reload_webdriver(ss2_host, ss2_user, ss2_pass)
         current_subjects = test_configure_service_acl()
@@ -343,8 +348,14 @@ def check_logs_for(ssh_client, event, user):
     :return: bool - True if event was logged; False otherwise
     """
     print 'Checking logs for {0}'.format(event)
-    # Wait 15 seconds for sync
-    time.sleep(15)
+    # Wait until the event has been logged (up to 15 seconds)
+    log_checker = auditchecker.AuditChecker(client=ssh_client, logfile=LOG_FILE_LOCATION, sudo=True, incremental=False)
+    log_entry = log_checker.wait_for({'event': event, 'user': user}, timeout=15, lines=1, component=MSG_SERVICE_CENTER)
+    if log_entry is not None:
+        date_time = datetime.strptime(log_entry['timestamp'][:19], '%Y-%m-%dT%H:%M:%S')
+        return True, log_entry['data'], date_time
+
+    # Event was not found, return the last log line for the caller to report
     log = ssh_server_actions.get_log_lines(ssh_client, LOG_FILE_LOCATION, 1)
     date_time = datetime.strptime(' '.join([log['date'], log['time']]), "%Y-%m-%d %H:%M:%S")
     datetime.strptime(datetime.strftime(date_time, "%Y-%m-%d %H:%M:%S.000000"), '%Y-%m-%d %H:%M:%S.%f')
@@ -488,6 +499,8 @@ def test_remove_from_global_group(self, group, log_checker, delete_member=None,
         self.is_true(testclient.check_success(), msg='Query as global group member failed')
 
         current_log_lines = log_checker.get_line_count()
+        ss2_ssh = (self.config.get('ss2.ssh_host'), self.config.get('ss2.ssh_user'), self.config.get('ss2.ssh_pass'))
+        conf_version = ssh_server_actions.get_global_conf_version(*ss2_ssh)
         self.log('Opening global groups view')
         self.wait_until_visible(type=By.CSS_SELECTOR, element=GLOBAL_GROUPS_CSS).click()
         self.wait_jquery()
@@ -514,7 +527,8 @@ def test_remove_from_global_group(self, group, log_checker, delete_member=None,
         logs_found = log_checker.check_log(expected_log_msg, from_line=current_log_lines + 1)
         self.is_true(logs_found)
         self.log('Waiting servers sync')
-        time.sleep(120)
+        ssh_server_actions.wait_for_global_conf_update(*ss2_ssh, previous_hash=conf_version, timeout=120,
+                                                       log=self.log)
         self.log('SERVICE_34 3. System removes the selected members from the global group.\n'
                  'The access rights granted for the group will not be available for the removed members.')
         self.log('Testing query to service where the only access right is global group')
@@ -35,6 +35,7 @@ class XroadLoggingInCentralServer(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'global_groups'}
 
     def test_loggin_in_central_server_2_11_1(self):
         main = MainController(self)
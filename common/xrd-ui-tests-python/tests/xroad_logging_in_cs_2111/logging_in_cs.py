@@ -5,7 +5,7 @@ from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.select import Select
 
-from helpers import ssh_server_actions, ssh_user_actions, xroad
+from helpers import ssh_server_actions, ssh_user_actions, xroad, auditchecker
 from view_models import members_table, sidebar, groups_table, cs_security_servers, popups, messages
 from view_models.log_constants import *
 from view_models.messages import MEMBER_ALREADY_EXISTS_ERROR
@@ -139,8 +139,7 @@ def test_test(ssh_host, ssh_username, ssh_password, users, client_id, client_nam
                         self.wait_jquery()
                         self.wait_until_visible(type=By.CSS_SELECTOR,
                                                 element=sidebar.MANAGEMENT_REQUESTS_CSS).click()
-                        self.wait_jquery()
-                        time.sleep(5)
+                        self.wait_settled()
 
                         try:
                             td = self.by_xpath(members_table.get_requests_row_by_td_text('SUBMITTED FOR APPROVAL'))
@@ -152,8 +151,7 @@ def test_test(ssh_host, ssh_username, ssh_password, users, client_id, client_nam
                                 td.click()
                                 self.wait_until_visible(type=By.ID,
                                                         element=members_table.MANAGEMENT_REQUEST_DETAILS_BTN_ID).click()
-                                self.wait_jquery()
-                                time.sleep(1)
+                                self.wait_settled()
                                 self.log('MEMBER_39 Revoking request')
                                 self.wait_until_visible(type=By.XPATH,
                                                         element=members_table.DECLINE_REQUEST_BTN_XPATH).click()
@@ -483,8 +481,7 @@ def register_subsystem_to_security_server(self, ssh_client, user, member, server
                                      [member['name'], member['code'], member['class'], member['subsystem'],
                                       ssh_server_actions.get_server_name(self),
                                       'SUBSYSTEM']).click()
-    self.wait_jquery()
-    time.sleep(1)
+    self.wait_settled()
     self.wait_until_visible(type=By.XPATH, element=cs_security_servers.SELECT_MEMBER_BTN_XPATH).click()
     self.wait_jquery()
 
@@ -714,8 +711,14 @@ def check_logs_for(ssh_client, event, user):
     :return: bool - True if event was logged; False otherwise
     '''
     print('Checking logs for {0}'.format(event))
-    # Wait 15 seconds for sync
-    time.sleep(15)
+    # Wait until the event has been logged (up to 15 seconds)
+    log_checker = auditchecker.AuditChecker(client=ssh_client, logfile=LOG_FILE_LOCATION, sudo=True, incremental=False)
+    log_entry = log_checker.wait_for({'event': event, 'user': user}, timeout=15, lines=1, component=MSG_SERVICE_CENTER)
+    if log_entry is not None:
+        date_time = datetime.strptime(log_entry['timestamp'][:19], '%Y-%m-%dT%H:%M:%S')
+        return True, log_entry['data'], date_time
+
+    # Event was not found, return the last log line for the caller to report
     log = ssh_server_actions.get_log_lines(ssh_client, LOG_FILE_LOCATION, 1)
     date_time = datetime.strptime(' '.join([log['date'], log['time']]), "%Y-%m-%d %H:%M:%S")
     datetime.strptime(datetime.strftime(date_time, "%Y-%m-%d %H:%M:%S.000000"), '%Y-%m-%d %H:%M:%S.%f')
@@ -39,6 +39,7 @@ class XroadLoggingInSecurityServer(unittest.TestCase):
     Requires helper scenarios: add_to_acl
     X-Road version: 6.16.0
     """
+    resources = {'cs', 'ss1'}
 
     def test_logging_in_security_server(self):
         main = MainController(self)
@@ -56,8 +56,10 @@ def test_test(ssh_host, ssh_username, ssh_password,
             self.log('SSH: Add users to Security Server with service administrator rights')
             add_users_to_system(ssh_host, ssh_username, ssh_password, users)
 
-            self.log('Wait 120 seconds before continuing with security server')
-            time.sleep(120)
+            self.log('Wait until the new member has reached the security server')
+            ssh_server_actions.wait_for_global_conf_update(
+                ssh_host, ssh_username, ssh_password,
+                contains='<memberCode>{0}</memberCode>'.format(client['code']), timeout=120, log=self.log)
 
             self.log('USER 1 ACTIONS')
             user = users['user1']
@@ -254,8 +256,7 @@ def add_group_to_client(self, sec_host, sec_username, sec_password, ssh_host, ss
     self.log('Waiting 120 seconds for changes')
     time.sleep(120)
     self.driver.refresh()
-    self.wait_jquery()
-    time.sleep(5)
+    self.wait_settled()
     self.log('Open client local groups tab')
     added_client_row(self, client).find_element_by_css_selector(clients_table.LOCAL_GROUPS_TAB_CSS).click()
     self.log('Check if local groups table is empty and contains expected message')
@@ -746,8 +747,7 @@ def remove_client(self, client):
     # Open client details and unregister client
     self.log('Opening client details')
     added_client_row(self, client).find_element_by_css_selector(clients_table.DETAILS_TAB_CSS).click()
-    self.wait_jquery()
-    time.sleep(1)
+    self.wait_settled()
     self.log('MEMBER_52 1-6. Unregister Client')
     is_delete_needed = False
     try:
@@ -803,8 +803,18 @@ def check_logs_for(self, ssh_host, ssh_username, ssh_password, event, user):
     :param user: str - username to look for in the logs
     :return: bool - True if event was logged; False otherwise
     '''
-    time.sleep(10)
     s_client = ssh_server_actions.get_client(ssh_host, ssh_username, ssh_password)
+
+    # Wait until the event has been logged (up to 10 seconds)
+    log_checker = auditchecker.AuditChecker(client=s_client, logfile=self.xroad_audit_log, sudo=True, incremental=False)
+    log_entry = log_checker.wait_for({'event': event, 'user': user}, timeout=10, lines=1, component='X-Road Proxy UI')
+    if log_entry is not None:
+        s_client.close()
+        self.log(log_entry)
+        date_time = datetime.strptime(log_entry['timestamp'][:19], '%Y-%m-%dT%H:%M:%S')
+        return True, log_entry['data'], date_time
+
+    # Event was not found, return the last log line for the caller to report
     log = ssh_server_actions.get_log_lines(s_client, self.xroad_audit_log, 1)
     s_client.close()
     self.log(log)
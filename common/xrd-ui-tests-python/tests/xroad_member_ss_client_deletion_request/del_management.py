@@ -103,8 +103,7 @@ def test_add_subsystem_to_server_client(case, ss1_code=None, wait_input=3, rando
         # Submit the form
         self.wait_until_visible(type=By.ID,
                                 element=cs_security_servers.SECURITYSERVER_CLIENT_REGISTER_SUBMIT_BTN_ID).click()
-        self.wait_jquery()
-        time.sleep(5)
+        self.wait_settled()
     return add_subsystem_to_server_client
 
 def open_servers_clients(self, ss1_code=None):
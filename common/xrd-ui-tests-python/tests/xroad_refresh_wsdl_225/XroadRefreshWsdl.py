@@ -17,6 +17,7 @@ class XroadRefreshWsdl(unittest.TestCase):
     Requires helper scenarios: xroad_add_to_acl_218
     X-Road version: 6.16.0
     """
+    resources = {'ss2', 'wsdl'}
 
     def test_refresh_wsdl(self):
         main = MainController(self)
@@ -461,8 +461,7 @@ def successful_reupload(self, local_path, backup_conf_file_name):
                  msg='Wrong message for existing file')
 
     self.wait_until_visible(type=By.XPATH, element=ss_system_parameters.SELECT_CLIENT_POPUP_OK_BTN_XPATH).click()
-    self.wait_jquery()
-    time.sleep(3)
+    self.wait_settled()
 
     '''Save message "New backup file uploaded successfully"'''
     notice = messages.get_notice_message(self)
@@ -511,8 +510,7 @@ def successful_upload(self, local_path, backup_conf_file_name):
 
     '''Click "OK" button'''
     self.by_id(popups.FILE_UPLOAD_SUBMIT_BUTTON_ID).click()
-    self.wait_jquery()
-    time.sleep(3)
+    self.wait_settled()
     self.log('UC SS_18 7.System saves the backup file to the system configuration and displays the message “New backup file uploaded successfully” to the SS administrator.')
 
     '''Save message "New backup file uploaded successfully"'''
@@ -541,8 +539,7 @@ def test_ss_restore_backup_conf(case, ssh_host=None, ssh_username=None, ssh_pass
     def backup_conf_restore():
         '''Click "Back Up and Restore" button'''
         self.wait_until_visible(type=By.CSS_SELECTOR, element=sidebar.BACKUP_AND_RESTORE_BTN_CSS).click()
-        self.wait_jquery()
-        time.sleep(1)
+        self.wait_settled()
         self.log(
             'SS_15 1. SS administrator selects to restore security server configuration from a backup file saved in the system configuration.')
         '''Click on "Restore" button'''
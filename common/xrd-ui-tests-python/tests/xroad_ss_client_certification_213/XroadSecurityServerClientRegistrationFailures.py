@@ -15,6 +15,7 @@ class XroadSecurityServerClientRegistrationFailures(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ca', 'ss2'}
 
     def test_registration_failures_213(self):
         main = MainController(self)
@@ -9,7 +9,7 @@ from selenium.webdriver.support.select import Select
 
 import tests.xroad_parse_users_inputs.xroad_parse_user_inputs as user_input_check
 from helpers import ssh_client, ssh_server_actions, xroad, login, auditchecker
-from helpers.ssh_server_actions import get_key_conf_keys_count, get_key_conf_token_count, get_key_conf_csr_count
+from helpers.ssh_server_actions import get_key_conf_keys_count, get_key_conf_token_count, get_key_conf_counts
 from tests.xroad_configure_service_222.wsdl_validator_errors import wait_until_server_up
 from tests.xroad_global_groups_tests import global_groups_tests
 from view_models import sidebar as sidebar_constants, keys_and_certificates_table as keyscertificates_constants, \
@@ -163,12 +163,8 @@ def delete_csr(self, sshclient, log_checker=None, client_code=None, client_class
     """
     self.log('Wait until keyconf is updated')
     time.sleep(120)
-    self.log('Get signing keys count in system configuration')
-    signing_keys_count = get_key_conf_keys_count(sshclient, "SIGNING")
-    self.log('Get token count in system configuration')
-    token_count = get_key_conf_token_count(sshclient)
-    self.log('Get csr count in system configuration')
-    csr_count = get_key_conf_csr_count(sshclient)
+    self.log('Get signing keys, token and csr count in system configuration')
+    signing_keys_count, token_count, csr_count = get_key_conf_counts(sshclient, "SIGNING")
     if log_checker is not None:
         current_log_lines = log_checker.get_line_count()
     '''Row, which is in table after key row'''
@@ -196,11 +192,9 @@ def delete_csr(self, sshclient, log_checker=None, client_code=None, client_class
     self.log('Wait until System Configuration is updated')
     time.sleep(120)
     self.log('SS_39 4. System deletes the CSR from system configuration')
-    signing_keys_count_after_deletion = get_key_conf_keys_count(sshclient, "SIGNING")
-    self.log('Get token count in system configuration')
-    token_count_after_deletion = get_key_conf_token_count(sshclient)
-    self.log('Get key count in system configuration')
-    csr_count_after = get_key_conf_csr_count(sshclient)
+    self.log('Get signing keys, token and csr count in system configuration')
+    signing_keys_count_after_deletion, token_count_after_deletion, csr_count_after = \
+        get_key_conf_counts(sshclient, "SIGNING")
     if key_has_other_cert_or_csr:
         self.log('SS_39 4. System deletes only CSR when key has more certificates or csrs')
         self.is_equal(signing_keys_count, signing_keys_count_after_deletion)
@@ -672,8 +666,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         except:
             # If no warning, there is still no problem.
             self.log('No warning')
-        self.wait_jquery()
-        time.sleep(2)
+        self.wait_settled()
         # Confirm adding the client
         popups.confirm_dialog_click(self)
 
@@ -700,8 +693,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
             # Confirm unregistering
             self.log('Confirm unregistering')
             popups.confirm_dialog_click(self)
-            self.wait_jquery()
-            time.sleep(3)
+            self.wait_settled()
 
             # Confirm deletion
             self.log('Confirm deleting')
@@ -771,8 +763,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
 
             '''Try to import the certificate'''
             import_cert(self, file_cert_path)
-            self.wait_jquery()
-            time.sleep(2)
+            self.wait_settled()
 
             expected_error_msg = messages.CERTIFICATE_NOT_VALID
             self.log('SS_30 11a.1 System displays the error message {0}'.format(expected_error_msg))
@@ -863,8 +854,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
             # Try to import the certificate
             self.log('Trying to import certificate')
             import_cert(self, file_cert_path)
-            self.wait_jquery()
-            time.sleep(2)
+            self.wait_settled()
 
             # Check if we got an error message
             self.log('SS_30 10a.1. System displays the error message {0}'.format(messages.CA_NOT_VALID_AS_SERVICE))
@@ -904,8 +894,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
             self.driver.get(self.config.get('cs.host'))
 
             self.wait_until_visible(type=By.CSS_SELECTOR, element=sidebar_constants.CERTIFICATION_SERVICES_CSS).click()
-            self.wait_jquery()
-            time.sleep(3)
+            self.wait_settled()
 
             table = self.wait_until_visible(type=By.ID, element=certification_services.CERTIFICATION_SERVICES_TABLE_ID)
             rows = table.find_element_by_tag_name('tbody').find_elements_by_tag_name('tr')
@@ -1012,8 +1001,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         # Try to import certificate
         self.log('SS_30 9a. Trying to import authentication certificate as signing certificate. Should fail.')
         import_cert(self, file_cert_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         self.log('SS_30 9a.1. System displays the error message {0}'.format(messages.CERTIFICATE_NOT_SIGNING_KEY))
         self.is_equal(messages.CERTIFICATE_NOT_SIGNING_KEY, messages.get_error_message(self))
@@ -1067,8 +1055,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         # Try to import the certificate that does not have a key any more
         self.log('SS_30 7a. Try to import the certificate. Should fail.')
         import_cert(self, file_cert_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         self.log('SS_30 7a.1. System displays the error message {0}'.format(messages.NO_KEY_FOR_CERTIFICATE))
         self.is_equal(messages.NO_KEY_FOR_CERTIFICATE, messages.get_error_message(self))
@@ -1125,8 +1112,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         # Try to import the certificate. Should fail.
         self.log('SS_30 6a. Import a certificate that is issued to the client that was just removed. Should fail.')
         import_cert(self, file_cert_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         self.log('SS_30 6a.1. System displays the error message {0}'.format(messages.NO_CLIENT_FOR_CERTIFICATE))
         self.is_true(messages.get_error_message(self).startswith(messages.NO_CLIENT_FOR_CERTIFICATE))
@@ -1168,8 +1154,7 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         # Try to import the text file as a certificate. Should fail.
         self.log('SS_30 4a. Trying to import a non-PEM/non-DER file. Should fail.')
         import_cert(self, temp_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         self.log('SS_30 4a.1. System displays the error message {0}'.format(messages.WRONG_FORMAT_CERTIFICATE))
         self.is_equal(messages.WRONG_FORMAT_CERTIFICATE, messages.get_error_message(self))
@@ -1221,14 +1206,12 @@ def failing_tests(file_client_name, file_client_class, file_client_code, file_cl
         # Import the signing certificate. Should succeed.
         self.log('SS_30 8a. Import the signing certificate.')
         import_cert(self, file_cert_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         # Import the same signing certificate. Should fail.
         self.log('SS_30 8a. Import the same signing certificate. Should fail.')
         import_cert(self, file_cert_path)
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
 
         self.log('SS_30 8a.1. System displays the error message {0}'.format(messages.CERTIFICATE_ALREADY_EXISTS))
         self.is_true(messages.get_error_message(self).startswith(messages.CERTIFICATE_ALREADY_EXISTS))
@@ -1781,8 +1764,7 @@ def check_import(self, client_class, client_code):
     :return: None
     '''
     # UC SS_30 13-14. Check if certificate import succeeded
-    self.wait_jquery()
-    time.sleep(0.5)
+    self.wait_settled()
     td = self.wait_until_visible(type=By.XPATH,
                                  element=keyscertificates_constants.get_generated_row_row_by_td_text(
                                      ' : '.join([client_class, client_code])))
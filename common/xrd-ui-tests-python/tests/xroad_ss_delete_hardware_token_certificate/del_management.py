@@ -145,8 +145,7 @@ def register_cert(self, ssh_host, ssh_user, ssh_pass, client, ca_ssh_host, ca_ss
 
         import_cert(self, local_cert_path)
 
-        self.wait_jquery()
-        time.sleep(3)
+        self.wait_settled()
         self.wait_until_visible(type=By.XPATH,
                                 element=keys_and_certificates_table.HARD_TOKEN_CERT_BY_KEY_LABEL.format(
                                     'delete')).click()
@@ -456,8 +455,7 @@ def check_import(self, client_class, client_code):
     :return: None
     '''
     # UC SS_30 13-14. Check if certificate import succeeded
-    self.wait_jquery()
-    time.sleep(0.5)
+    self.wait_settled()
     td = self.wait_until_visible(type=By.XPATH,
                                  element=keyscertificates_constants.get_generated_row_row_by_td_text(
                                      ' : '.join([client_class, client_code])))
@@ -3,7 +3,7 @@ import unittest
 
 from selenium.webdriver.common.by import By
 
-from helpers import ssh_client
+from helpers import ssh_client, ssh_server_actions
 from main.maincontroller import MainController
 from tests.xroad_cs_ca import ca_management
 from tests.xroad_cs_ca.ca_management import test_add_ca
@@ -84,9 +84,13 @@ class XroadImportCertFromTokenSigning(unittest.TestCase):
             expire_globalconf()
             import_cert_from_token_global_conf_error()
         finally:
+            conf_version = ssh_server_actions.get_global_conf_version(ss_ssh_host, ss_ssh_user, ss_ssh_pass,
+                                                                      file_pattern='*.metadata')
             start_conf_client()
             main.log('Waiting until global configuration is up to date')
-            time.sleep(60)
+            ssh_server_actions.wait_for_global_conf_update(ss_ssh_host, ss_ssh_user, ss_ssh_pass,
+                                                           previous_hash=conf_version, timeout=60,
+                                                           file_pattern='*.metadata', log=main.log)
             main.tearDown()
 
     def test_cimport_cert_from_token_no_ca(self):
@@ -134,17 +138,23 @@ class XroadImportCertFromTokenSigning(unittest.TestCase):
         delete_ca = ca_management.test_delete_ca(case=main, ca_name=ca_name)
         try:
             main.reload_webdriver(cs_host, cs_user, cs_pass)
+            conf_version = ssh_server_actions.get_global_conf_version(ss_ssh_host, ss_ssh_user, ss_ssh_pass)
             delete_ca()
-            main.log('Wait 120 seconds for changes')
-            time.sleep(120)
+            main.log('Wait up to 120 seconds for changes')
+            ssh_server_actions.wait_for_global_conf_update(ss_ssh_host, ss_ssh_user, ss_ssh_pass,
+                                                           previous_hash=conf_version, timeout=120, log=main.log)
             main.reload_webdriver(ss_host, ss_user, ss_pass)
             import_cert_from_token_no_ca_error()
         finally:
             main.reload_webdriver(cs_host, cs_user, cs_pass)
+            conf_version = ssh_server_actions.get_global_conf_version(ss_ssh_host, ss_ssh_user, ss_ssh_pass)
             restore_ca()
             close_all_open_dialogs(main)
             restore_ocsp()
-            time.sleep(120)
+            # CA and OCSP responder are restored in separate steps, wait until the latter is visible too
+            ssh_server_actions.wait_for_global_conf_update(ss_ssh_host, ss_ssh_user, ss_ssh_pass,
+                                                           previous_hash=conf_version, contains=ocsp_url,
+                                                           timeout=120, log=main.log)
             main.tearDown()
 
     def test_dimport_cert_from_token_no_client(self):
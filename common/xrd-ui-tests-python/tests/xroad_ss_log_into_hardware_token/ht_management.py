@@ -60,8 +60,7 @@ def test_hardtoken_login(case, ssh_host=None, ssh_username=None, ssh_password=No
 
         '''Refresh website'''
         self.driver.refresh()
-        self.wait_jquery()
-        time.sleep(1)
+        self.wait_settled()
         self.log('SS_25 4.System verifies that the token is not locked.')
 
         try:
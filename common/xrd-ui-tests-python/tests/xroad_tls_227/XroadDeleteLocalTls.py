@@ -16,6 +16,7 @@ class XroadDeleteLocalTls(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ss1', 'ss2'}
 
     def test_tls_227(self):
         main = MainController(self)
@@ -24,6 +24,7 @@ class XroadLocalTls(unittest.TestCase):
     Requires helper scenarios:
     X-Road version: 6.16.0
     """
+    resources = {'ss1', 'ss2'}
 
     def test_tls_227(self):
         main = MainController(self)
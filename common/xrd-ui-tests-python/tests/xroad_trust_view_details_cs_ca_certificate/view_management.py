@@ -2,7 +2,6 @@
 from selenium.webdriver.common.by import By
 from view_models import certification_services, sidebar, ss_system_parameters
 import re
-import time
 
 
 def test_ca_cs_details_view_cert(case, ca_host=None):
@@ -33,8 +32,7 @@ def view_cert_data(self,ca_host=None):
 
     '''Click on "VIEW CERTIFICATE" button'''
     self.by_id(certification_services.CA_DETAILS_VIEW_CERT).click()
-    self.wait_jquery()
-    time.sleep(2)
+    self.wait_settled()
 
     self.log('UC TRUST_03: 2.System displays the following information: the contents of the certificate.')
 
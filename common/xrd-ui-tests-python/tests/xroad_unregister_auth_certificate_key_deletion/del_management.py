@@ -723,8 +723,7 @@ def check_import(self, client_class, client_code):
     :return: None
     '''
     # UC SS_30 13-14. Check if certificate import succeeded
-    self.wait_jquery()
-    time.sleep(0.5)
+    self.wait_settled()
     td = self.wait_until_visible(type=By.XPATH,
                                  element=keyscertificates_constants.get_generated_row_row_by_td_text(
                                      ' : '.join([client_class, client_code])))
@@ -957,8 +956,7 @@ def test_disable_wsdl(case, ssh_host=None, ssh_username=None, ssh_password=None,
         disable_notice_input = self.by_id(popups.DISABLE_WSDL_POPUP_NOTICE_ID)
         # Click "OK" button to save the data
         disable_dialog_ok_button.click()
-        self.wait_jquery()
-        time.sleep(2)
+        self.wait_settled()
         # Find the service under the specified WSDL in service list (and expand the WSDL services list if not open yet)
         wsdl_element = clients_table_vm.client_services_popup_select_wsdl(self, wsdl_index=None,
                                                                           wsdl_url=wsdl_url)
@@ -4,7 +4,7 @@ import re
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.support.ui import Select
-from helpers import xroad
+from helpers import xroad, table_snapshot
 import messages
 
 MEMBER_SUBSYSTEM_CODE_AND_RESULTS = [['', '', True, 'Missing parameter: {0}', 'add_member_code', False],
@@ -110,7 +110,7 @@ def find_row_by_client(table_rows, client=None, client_name=None, client_id=None
     Finds a client index (zero-based) in list of table rows by comparing the values in the table with the string
     supplied as a parameter.
 
-    :param table_rows: WebElement - already found table rows
+    :param table_rows: [WebElement] | TableSnapshot - already found table rows or their snapshot
     :param client_name: string - client name
     :return: int | None - client row index (zero-based) or None if client was not found
     """
@@ -127,11 +127,14 @@ def find_row_by_client(table_rows, client=None, client_name=None, client_id=None
         # We don't know what we're looking for, return nothing
         return None
 
-    for i, row in enumerate(table_rows):
-        row_client_data = row.find_elements_by_tag_name('td')[cell_index]
-        if row_client_data.text == compare_text:
+    if len(table_rows):
+        # Read all rows at once and look the client up from the index
+        if not isinstance(table_rows, table_snapshot.TableSnapshot):
+            table_rows = table_snapshot.get_snapshot(table_rows[0].parent, table_rows)
+        row_index = table_rows.find(cell_index, compare_text)
+        if row_index is not None:
             # We found our client! Return the row ID.
-            return i
+            return row_index
 
     print('Client not found: {0}'.format(compare_text))
     # Client not found, return none
@@ -148,14 +151,11 @@ def find_wsdl_by_name(self, wsdl_name):
     :return: int | None - WSDL row index (zero-based) or None if client was not found
     """
 
-    services_table_rows = self.by_css(popups.CLIENT_DETAILS_POPUP_WSDL_CSS, multiple=True)
-
-    for i, row in enumerate(services_table_rows):
-        # Get the second table cell
-        row_wsdl_name = row.find_elements_by_tag_name("td")[1]
+    services_table_rows = self.table_snapshot(self.by_css(popups.CLIENT_DETAILS_POPUP_WSDL_CSS, multiple=True))
 
-        # See if its content matches the WSDL address
-        if re.match(popups.CLIENT_DETAILS_POPUP_WSDL_REGEX.format(re.escape(wsdl_name)), row_wsdl_name.text):
+    for i, row_wsdl_name in enumerate(services_table_rows.column(1)):
+        # See if the second cell matches the WSDL address
+        if re.match(popups.CLIENT_DETAILS_POPUP_WSDL_REGEX.format(re.escape(wsdl_name)), row_wsdl_name):
             # Match - return index
             return i
 
@@ -283,10 +283,10 @@ def get_service_parameters(self, service_row):
                 timeout: int, refresh: str} | None
     '''
     try:
-        # Get all cells of the row. Our values start from the second cell
-        cells = service_row.find_elements_by_tag_name('td')
+        # Get all cells of the row with one request. Our values start from the second cell
+        cells = table_snapshot.get_snapshot(service_row.parent, [service_row])[0]['cells']
 
-        service_code_cell = cells[1].text
+        service_code_cell = cells[1]
         service_matches = re.search(popups.CLIENT_DETAILS_POPUP_SERVICE_CODE_REGEX, service_code_cell)
 
         service_code = service_matches.group(1)
@@ -294,13 +294,13 @@ def get_service_parameters(self, service_row):
         service_version = service_matches.group(3)
         service_acl_count = int(service_matches.group(4))
 
-        service_title = cells[2].text
-        service_url = cells[3].text
+        service_title = cells[2]
+        service_url = cells[3]
         try:
-            service_timeout = int(cells[4].text)
+            service_timeout = int(cells[4])
         except:
             service_timeout = None
-        service_refresh = cells[5].text
+        service_refresh = cells[5]
 
         return {'code': service_code, 'name': service_name, 'version': service_version, 'acl_count': service_acl_count,
                 'title': service_title, 'url': service_url, 'timeout': service_timeout, 'refresh': service_refresh}
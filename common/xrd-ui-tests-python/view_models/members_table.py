@@ -1,3 +1,5 @@
+from helpers import table_snapshot
+
 ADD_MEMBER_TEXTS_AND_RESULTS = [['', '', '', True, 'Missing parameter: {0}', 'memberClass', False],
                                 ['MEMBER_TEST', '', 'TEST_MEMBER', True, 'Missing parameter: {0}', 'memberClass', False],
                                 ['MEMBER_TEST', 'GOV', '', True, 'Missing parameter: {0}', 'memberCode', False],
@@ -42,6 +44,8 @@ MEMBER_EDIT_NAME_POPUP_CANCEL_BTN_XPATH = MEMBER_EDIT_POPUP_XPATH + '//div[@clas
 MEMBERS_TABLE_ID = 'members'
 MANAGEMENT_REQUEST_TABLE_ID = 'management_requests_all'
 MEMBERS_TABLE_ROWS_CSS = '#members tbody tr'
+MEMBERS_TABLE_NEXT_PAGE_BTN_ID = 'members_next'
+MEMBERS_TABLE_SEARCH_CSS = '#members_filter input'
 MANAGEMENT_REQUEST_DETAILS_BTN_ID = 'request_details'
 APPROVE_REQUEST_BTN_XPATH = '//div[not(contains(@style,"display: none")) and contains(@data-name, "reg_request_edit_dialog")]//button[span= "Approve"]'
 DECLINE_REQUEST_BTN_XPATH = '//div[not(contains(@style,"display: none")) and contains(@data-name, "reg_request_edit_dialog")]//button[span= "Decline"]'
@@ -123,11 +127,8 @@ def get_row_by_columns(table, values):
     :param values: list of member values, ordered as: [name, class,  code]
     :return: row
     """
-    rows = table.find_elements_by_tag_name('tr')
-    for row in rows:
-        if row.text == ' '.join(values):
-            return row
-    return None
+    row = table_snapshot.get_snapshot(table.parent, table, rows_css='tr').find_row('text', ' '.join(values))
+    return row['element'] if row is not None else None
 
 
 def get_member_data_from_table(nr, text):